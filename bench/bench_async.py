@@ -0,0 +1,118 @@
+"""比较同步(Flask, 多线程)和异步(ASGI, uvicorn)两种部署方式的并发吞吐量
+
+    python bench/bench_async.py --users 10000 --posts 50000 --concurrency 8 64 256 --duration 10
+
+写入种子数据后分别以子进程启动 `flask run`(每个请求一个线程) 和 `uvicorn asgi:app`
+(单进程事件循环)，对两者都提供的只读接口在每个并发数下各压测 --duration 秒。
+异步客户端不支持 mongomock，只能连接真实的 mongod；未安装 uvicorn 时只测同步模式。
+"""
+import importlib.util
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from common import SRC, make_parser, open_db, emit
+from load import run_scenario, request_once
+from seed import FIRST_PHONE, add_seed_arguments, seed
+
+
+def scenarios(args) -> list:
+    """两种模式都提供的 GET 接口，格式与 load.scenarios 相同"""
+    rng = random.Random(args.seed)
+    user_count = max(1, args.users)
+    return [
+        ("GET /user?all=true", "GET", lambda: "/user?all=true&limit=50", None, False),
+        ("GET /user?phone_number=", "GET",
+         lambda: f"/user?phone_number={FIRST_PHONE + rng.randrange(user_count)}", None, False),
+        ("GET /user?name=", "GET", lambda: f"/user?name=user{rng.randrange(user_count)}"[:16], None, False),
+        ("GET /user_search", "GET",
+         lambda: f"/user_search?phone_number={FIRST_PHONE + rng.randrange(user_count)}", None, False),
+        ("GET /post", "GET", lambda: "/post?limit=50", None, False),
+        ("GET /post?expand=author", "GET", lambda: "/post?limit=50&expand=author", None, False),
+        ("GET /post?title=", "GET", lambda: "/post?title=python", None, False),
+        ("GET /post?q=", "GET", lambda: "/post?q=%E6%9C%BA%E5%99%A8%E5%AD%A6%E4%B9%A0", None, False),
+        ("GET /admin?name=", "GET", lambda: "/admin?name=%E7%AE%A1%E7%90%86%E5%91%98", None, False),
+    ]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(name: str, command: list, port: int, args):
+    """启动服务并等待 /metrics 可以访问，返回 (进程, 地址, 日志文件)"""
+    env = dict(os.environ, MONGO_URI=args.uri, MONGO_DB=args.db)
+    # 访问日志写到临时文件，管道写满会阻塞服务进程
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, cwd=SRC, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"{name} server exited: {log.read().decode(errors='replace')[-2000:]}")
+        try:
+            urllib.request.urlopen(base_url + "/metrics", timeout=1).read()
+            return process, base_url, log
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+def run_mode(name: str, command: list, port: int, args) -> dict:
+    process, base_url, log = start_server(name, command, port, args)
+    try:
+        opener = urllib.request.build_opener()
+        results = {}
+        for scenario in scenarios(args):
+            if args.only and not any(part in scenario[0] for part in args.only):
+                continue
+            # 预热：建立连接、加载全文检索索引
+            request_once(opener, base_url, scenario[1], scenario[2](), None)
+            for concurrency in args.concurrency:
+                results.setdefault(str(concurrency), {})[scenario[0]] = run_scenario(
+                    opener, base_url, scenario, concurrency, args.duration)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        log.close()
+
+
+def main():
+    parser = make_parser(__doc__)
+    add_seed_arguments(parser)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64, 256], help="并发请求数")
+    parser.add_argument("--duration", type=float, default=5, help="每个接口每个并发数持续的秒数")
+    parser.add_argument("--only", nargs="*", help="只压测名称包含这些字符串的接口")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 工作进程数")
+    args = parser.parse_args()
+    if args.mock:
+        parser.error("异步模式使用 AsyncMongoClient，需要真实的 mongod，不支持 --mock")
+
+    seed(open_db(args), args.users, args.posts, max(1, args.admins), args.seed)
+
+    results = {}
+    port = free_port()
+    results["sync"] = run_mode("sync", [sys.executable, "-m", "flask", "--app", "app", "run",
+                                        "--port", str(port), "--with-threads"], port, args)
+    if importlib.util.find_spec("uvicorn") is None:
+        results["async"] = {"skipped": "uvicorn is not installed (pip install uvicorn)"}
+    else:
+        port = free_port()
+        results["async"] = run_mode("async", [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port),
+                                              "--workers", str(args.workers), "--log-level", "warning"],
+                                    port, args)
+    emit("async", args, {"users": args.users, "posts": args.posts, "duration": args.duration, **results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""DAO 方法的延迟分位数和吞吐量
+
+    python bench/bench_dao.py --users 10000 --posts 50000 --repeat 200
+"""
+import random
+
+from common import make_parser, open_db, measure, emit
+from seed import FIRST_PHONE, add_seed_arguments, seed
+from dao.impl.adminDaoImpl import AdminDaoImpl
+from dao.impl.postDaoImpl import PostDaoImpl
+from dao.impl.userDaoImpl import UserDaoImpl, user_cache
+
+
+def scenarios(args, ids: dict) -> dict:
+    """场景名 -> 无参函数；每次调用随机挑选参数，避免只测到同一条记录"""
+    users, posts, admins = UserDaoImpl(), PostDaoImpl(), AdminDaoImpl()
+    rng = random.Random(args.seed)
+    user_count = max(1, len(ids["users"]))
+    user_ids = [str(user_id) for user_id in ids["users"]] or ["000000000000000000000000"]
+
+    def phone():
+        return FIRST_PHONE + rng.randrange(user_count)
+
+    def find_user_by_number_uncached():
+        user_cache.clear()
+        users.find_user_by_number(phone())
+
+    result = {
+        "user.find_user_by_number": lambda: users.find_user_by_number(phone()),
+        "user.find_user_by_number_uncached": find_user_by_number_uncached,
+        "user.find_user_by_email": lambda: users.find_user_by_email(f"user{rng.randrange(user_count)}@bench.test"),
+        "user.find_user_by_name": lambda: users.find_user_by_name(f"user{rng.randrange(user_count)}"[:6]),
+        "user.find_users_page": lambda: users.find_users_page(50),
+        "user.find_users_by_ids": lambda: users.find_users_by_ids(rng.sample(user_ids, min(50, len(user_ids)))),
+        "user.count_users": lambda: users.count_users(estimated=False),
+        "post.find_posts_page": lambda: posts.find_posts_page(50),
+        "post.find_post_by_title": lambda: posts.find_post_by_title("python"),
+        "post.search_posts": lambda: posts.search_posts("机器学习 python"),
+        "post.find_posts_by_user_ids": lambda: posts.find_posts_by_user_ids(
+            rng.sample(user_ids, min(50, len(user_ids)))),
+    }
+    if not args.mock:
+        # $lookup 中的 $convert 在 mongomock 中没有实现
+        result["post.find_posts_page_expand_author"] = lambda: posts.find_posts_page(50, expand_author=True)
+    if ids["admins"]:
+        result["admin.find_admin_by_account"] = lambda: admins.find_admin_by_account("admin0")
+    return result
+
+
+def main():
+    parser = make_parser(__doc__)
+    add_seed_arguments(parser)
+    parser.add_argument("--only", nargs="*", help="只运行名称包含这些字符串的场景")
+    args = parser.parse_args()
+
+    db = open_db(args)
+    ids = seed(db, args.users, args.posts, args.admins, args.seed)
+    # 倒排索引在计时前建立
+    PostDaoImpl().build_search_index(use_snapshot=False)
+    results = {}
+    for name, fn in scenarios(args, ids).items():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        results[name] = measure(fn, args.repeat)
+    emit("dao", args, {"users": args.users, "posts": args.posts, "admins": args.admins,
+                       "scenarios": results})
+
+
+if __name__ == "__main__":
+    main()
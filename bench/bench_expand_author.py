@@ -0,0 +1,81 @@
+"""帖子列表附带作者信息的三种方式：逐条查询作者(N+1)、$in 批量查询、$lookup 聚合
+
+    python bench/bench_expand_author.py --users 1000 --posts 20000 --limit 50
+
+$lookup 中的 $convert 在 mongomock 中没有实现，此脚本需要真实的 mongod (5.0+)。
+"""
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import make_parser, open_db, measure, emit
+from util.schema import INDEXES
+from dao.impl.postDaoImpl import PostDaoImpl, POST_PROJECTION, AUTHOR_PROJECTION
+
+
+def seed(db, users: int, posts: int):
+    db["users"].drop()
+    db["posts"].drop()
+    db["users"].create_indexes(INDEXES["users"])
+    db["posts"].create_indexes(INDEXES["posts"])
+    user_ids = db["users"].insert_many([
+        {"nickname": f"user{i}", "phone_number": 13000000000 + i, "email": f"user{i}@bench.test",
+         "password": "x" * 60, "salt": "x" * 29}
+        for i in range(users)
+    ]).inserted_ids
+    rng = random.Random(posts)
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(posts):
+        batch.append({"user_id": str(rng.choice(user_ids)), "title": f"post {i}", "content": "",
+                      "date": start + timedelta(minutes=i)})
+        if len(batch) == 1000:
+            db["posts"].insert_many(batch)
+            batch = []
+    if batch:
+        db["posts"].insert_many(batch)
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    db = open_db(args)
+    seed(db, args.users, args.posts)
+    dao = PostDaoImpl()
+    posts, users = db["posts"], db["users"]
+
+    def page():
+        return list(posts.find({}, POST_PROJECTION).sort([("date", -1), ("_id", -1)]).limit(args.limit))
+
+    def per_post():
+        result = page()
+        for post in result:
+            post["author"] = users.find_one({"_id": ObjectId(post["user_id"])}, AUTHOR_PROJECTION)
+        return result
+
+    def batched():
+        result = page()
+        ids = list({ObjectId(post["user_id"]) for post in result})
+        authors = {doc["_id"]: doc for doc in users.find({"_id": {"$in": ids}}, AUTHOR_PROJECTION)}
+        for post in result:
+            post["author"] = authors.get(ObjectId(post["user_id"]))
+        return result
+
+    results = {
+        "limit": args.limit,
+        "per_post_lookup": measure(per_post, args.repeat),
+        "batched_in": measure(batched, args.repeat),
+        "aggregate_lookup": measure(lambda: dao.find_posts_page(args.limit, expand_author=True), args.repeat),
+    }
+    posts.drop()
+    users.drop()
+    emit("expand_author", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""大列表响应的编码耗时：逐字段构造字典 + 标准库 vs 直接投影 + util.serialize（标准库 / orjson）
+
+    python bench/bench_json.py --sizes 100 1000 10000
+
+不访问数据库，--uri/--mock 参数被忽略。
+"""
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import make_parser, measure, emit
+from util import serialize
+from util.serialize import project
+
+POST_FIELDS = ("_id", "user_id", "title", "date", "content")
+
+
+def make_docs(size: int) -> list:
+    start = datetime(2024, 1, 1)
+    return [{"_id": ObjectId(), "user_id": str(ObjectId()), "title": f"帖子标题 {i}",
+             "content": "内容" * 20, "date": start + timedelta(minutes=i)} for i in range(size)]
+
+
+def legacy(docs: list) -> bytes:
+    """改动前的写法：循环构造字典，手动转换 ObjectId 和 datetime"""
+    post_list = []
+    for post in docs:
+        post_list.append({
+            "_id": str(post["_id"]),
+            "user_id": post["user_id"],
+            "title": post["title"],
+            "date": post["date"].isoformat(),
+            "content": post.get("content", "")
+        })
+    return json.dumps({"code": 200, "data": post_list}).encode()
+
+
+def projected(docs: list, backend) -> bytes:
+    serialize.orjson = backend
+    return serialize.dumps({"code": 200, "data": [project(post, POST_FIELDS) for post in docs]})
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    fast = serialize.orjson
+    results = []
+    for size in args.sizes:
+        docs = make_docs(size)
+        result = {
+            "size": size,
+            "legacy_stdlib": measure(lambda: legacy(docs), args.repeat),
+            "projected_stdlib": measure(lambda: projected(docs, None), args.repeat),
+        }
+        if fast is not None:
+            result["projected_orjson"] = measure(lambda: projected(docs, fast), args.repeat)
+        results.append(result)
+    serialize.orjson = fast
+    emit("json", args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""构造大量列表对象的内存和吞吐：普通 dataclass vs 带 slots 的 Post vs 只读 PostRow vs 原始文档
+
+    python bench/bench_po.py --count 1000000
+
+不访问数据库，文档在内存中生成；内存用 tracemalloc 统计，只计算 DAO 转换新分配的对象。
+"""
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from common import make_parser, emit
+from po.post import Post, PostRow
+
+
+@dataclass
+class LegacyPost:
+    """改动前的 po.Post：没有 slots，每个实例带 __dict__"""
+    user_id : str
+    date : datetime
+    title : str
+    content : str = ""
+
+
+def legacy(docs: list) -> list:
+    """改动前 DAO 的写法：逐字段关键字参数构造"""
+    return [LegacyPost(user_id=d["user_id"], title=d["title"], content=d["content"], date=d["date"])
+            for d in docs]
+
+
+SHAPES = {
+    "legacy_dataclass": legacy,
+    "slotted_from_doc": lambda docs: list(map(Post.from_doc, docs)),
+    "row_from_doc": lambda docs: list(map(PostRow.from_doc, docs)),
+    "raw_dict": list,
+}
+
+
+def make_docs(count: int) -> list:
+    start = datetime(2024, 1, 1)
+    user_id = str(ObjectId())
+    return [{"_id": ObjectId(), "user_id": user_id, "title": f"post {i}", "content": "",
+             "date": start + timedelta(seconds=i)} for i in range(count)]
+
+
+def run(convert, docs: list) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = convert(docs)
+    elapsed = time.perf_counter() - start
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return {
+        "seconds": round(elapsed, 3),
+        "objects_per_sec": round(len(docs) / elapsed, 1) if elapsed > 0 else 0.0,
+        "allocated_mb": round(allocated / 2 ** 20, 1),
+        "peak_mb": round(peak / 2 ** 20, 1),
+        "bytes_per_object": round(allocated / len(docs), 1),
+    }
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    docs = make_docs(args.count)
+    results = {"count": args.count}
+    for name, convert in SHAPES.items():
+        results[name] = run(convert, docs)
+    emit("po", args, results)
+
+
+if __name__ == "__main__":
+    main()
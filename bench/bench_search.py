@@ -0,0 +1,54 @@
+"""搜索延迟随集合大小的变化：未锚定的 $regex 扫描 vs util.search 索引搜索
+
+    python bench/bench_search.py --sizes 1000 10000 100000
+"""
+import random
+from datetime import datetime
+
+from common import make_parser, open_db, measure, emit
+from util import search
+from util.schema import INDEXES
+
+WORDS = ["Python", "入门", "教程", "机器学习", "Flask", "数据库", "MongoDB", "笔记",
+         "高级", "技巧", "前端", "性能", "优化", "索引", "搜索", "测试"]
+QUERIES = ["python", "机器学习", "索引", "flask 笔记", "性能优化"]
+
+
+def seed(collection, size: int):
+    collection.drop()
+    collection.create_indexes(INDEXES["posts"])
+    rng = random.Random(size)
+    batch = []
+    for i in range(size):
+        title = " ".join(rng.sample(WORDS, 3)) + f" {i}"
+        batch.append({"user_id": "bench", "title": title, "content": "", "date": datetime.now(),
+                      **search.search_fields("title", title)})
+        if len(batch) == 1000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--limit", type=int, default=search.DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    db = open_db(args)
+    collection = db["posts"]
+    results = []
+    for size in args.sizes:
+        seed(collection, size)
+        for query in QUERIES:
+            regex = measure(lambda: list(collection.find(
+                {"title": {"$regex": query, "$options": "i"}}).limit(args.limit)), args.repeat)
+            indexed = measure(lambda: search.search(collection, "title", query, args.limit), args.repeat)
+            results.append({"size": size, "query": query, "regex_scan": regex, "indexed_search": indexed})
+    collection.drop()
+    emit("search", args, results)
+
+
+if __name__ == "__main__":
+    main()
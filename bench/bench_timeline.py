@@ -0,0 +1,100 @@
+"""帖子总数增长时，用户时间线和全局最新帖子的每页延迟
+
+    python bench/bench_timeline.py --users 1000 --steps 10000 100000 1000000 --limit 20
+
+帖子数依次增长到 --steps 中的每个值(不重新写入已有数据)，每一步测量:
+用户时间线首页、游标翻页、按时间范围筛选、只取ID的覆盖查询，以及全局最新帖子的首页和
+翻到一半处的游标分页；同时测量同样深度的 skip 分页作为对照(延迟随数据量线性增长)。
+连接真实的 mongod 时还会输出每个查询的 explain 统计(扫描的索引键数、文档数)。
+"""
+import random
+from datetime import datetime, timedelta
+
+from common import make_parser, open_db, measure, emit
+from dao.impl.postDaoImpl import PostDaoImpl, POST_PROJECTION, ID_PROJECTION, TIMELINE_SORT, _page_query
+from seed import _insert
+from util.pagination import encode_cursor
+from util.schema import INDEXES
+
+START = datetime(2024, 1, 1)
+
+
+def grow(db, user_ids: list, start: int, stop: int, rng: random.Random):
+    """写入第 start..stop-1 条帖子，第 i 条的发布时间为 START 之后 i 分钟"""
+    _insert(db["posts"], (
+        {"user_id": rng.choice(user_ids), "title": f"post {i}", "content": "", "date": START + timedelta(minutes=i)}
+        for i in range(start, stop)
+    ))
+
+
+def cursor_at(db, query: dict, position: int) -> str:
+    """按时间线顺序第 position 条帖子处的游标，用于测量深翻页"""
+    doc = db["posts"].find(query, ID_PROJECTION).sort(TIMELINE_SORT).skip(position).limit(1).next()
+    return encode_cursor(doc["_id"], doc["date"])
+
+
+def explain(db, query: dict, projection: dict, limit: int) -> dict:
+    stats = db["posts"].find(query, projection).sort(TIMELINE_SORT).limit(limit).explain()["executionStats"]
+    return {"keys_examined": stats["totalKeysExamined"], "docs_examined": stats["totalDocsExamined"],
+            "returned": stats["nReturned"]}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--steps", type=int, nargs="+", default=[10000, 100000, 1000000], help="帖子总数")
+    parser.add_argument("--limit", type=int, default=20, help="每页数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args()
+
+    db = open_db(args)
+    db["posts"].drop()
+    db["posts"].create_indexes(INDEXES["posts"])
+    rng = random.Random(args.seed)
+    user_ids = [str(i) for i in range(args.users)]
+    user_id = user_ids[0]
+    dao = PostDaoImpl()
+
+    results = []
+    total = 0
+    for step in sorted(args.steps):
+        grow(db, user_ids, total, step, rng)
+        total = step
+        user_posts = db["posts"].count_documents({"user_id": user_id})
+        user_cursor = cursor_at(db, {"user_id": user_id}, user_posts // 2)
+        feed_cursor = cursor_at(db, {}, total // 2)
+        # 最近一天(1440分钟)内的帖子
+        since = START + timedelta(minutes=total - 1440)
+
+        scenarios = {
+            "user_first_page": lambda: dao.find_posts_by_user(user_id, args.limit),
+            "user_keyset_middle": lambda: dao.find_posts_by_user(user_id, args.limit, before=user_cursor),
+            "user_since_last_day": lambda: dao.find_posts_by_user(user_id, args.limit, since=since),
+            "user_ids_only_middle": lambda: dao.find_posts_by_user(user_id, args.limit, before=user_cursor,
+                                                                   ids_only=True),
+            "user_skip_middle": lambda: list(db["posts"].find({"user_id": user_id}, POST_PROJECTION)
+                                             .sort(TIMELINE_SORT).skip(user_posts // 2).limit(args.limit)),
+            "feed_first_page": lambda: dao.find_posts_page(args.limit),
+            "feed_keyset_middle": lambda: dao.find_posts_page(args.limit, feed_cursor),
+            "feed_skip_middle": lambda: list(db["posts"].find({}, POST_PROJECTION)
+                                             .sort(TIMELINE_SORT).skip(total // 2).limit(args.limit)),
+        }
+        result = {"posts": total, "user_posts": user_posts,
+                  "latency": {name: measure(fn, args.repeat) for name, fn in scenarios.items()}}
+        if not args.mock:
+            # mongomock 没有 explain
+            result["explain"] = {
+                "user_keyset_middle": explain(db, {"user_id": user_id, **_page_query(user_cursor)},
+                                              POST_PROJECTION, args.limit),
+                "user_ids_only_middle": explain(db, {"user_id": user_id, **_page_query(user_cursor)},
+                                                ID_PROJECTION, args.limit),
+                "feed_keyset_middle": explain(db, _page_query(feed_cursor), POST_PROJECTION, args.limit),
+            }
+        results.append(result)
+
+    db["posts"].drop()
+    emit("timeline", args, {"limit": args.limit, "users": args.users, "steps": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""基准测试公共工具
+
+所有基准脚本都可以连接真实的 mongod（--uri，推荐，索引行为才真实），
+或者用 --mock 在内存中的 mongomock 上运行（只用于检查脚本本身）。
+结果以JSON输出，便于在不同提交之间比较。
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Add the src directory to the Python path
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+if SRC not in sys.path:
+    sys.path.insert(0, SRC)
+
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--uri", default=os.environ.get("MONGO_URI", "mongodb://localhost:27017"),
+                        help="MongoDB连接串")
+    parser.add_argument("--db", default="ManageDb_bench", help="基准测试使用的数据库（会被清空）")
+    parser.add_argument("--mock", action="store_true", help="使用 mongomock 代替真实数据库")
+    parser.add_argument("--repeat", type=int, default=50, help="每个场景的重复次数")
+    parser.add_argument("--output", help="结果JSON的输出文件，默认打印到标准输出")
+    return parser
+
+
+def open_db(args):
+    """按参数连接数据库，并让 DAO 使用同一个数据库"""
+    from util.dbutil import DBUtil
+
+    if args.mock:
+        import mongomock
+        client = mongomock.MongoClient()
+        DBUtil._client = client
+        DBUtil._pid = os.getpid()
+        DBUtil._collections = {}
+        DBUtil._overrides["db_name"] = args.db
+        return client[args.db]
+    DBUtil.configure(uri=args.uri, db_name=args.db)
+    return DBUtil.connect()
+
+
+def measure(fn, repeat: int) -> dict:
+    """重复执行 fn 并返回延迟分位数（毫秒）和吞吐量"""
+    fn()  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return {
+        "repeat": repeat,
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "ops_per_sec": round(1000 / mean, 1) if mean > 0 else 0.0,
+    }
+
+
+def percentile(sorted_samples: list, pct: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(pct / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def git_commit() -> str:
+    """当前提交，用于比较不同提交之间的结果"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit(name: str, args, results) -> None:
+    """输出机器可读的结果"""
+    report = {
+        "benchmark": name,
+        "backend": "mongomock" if args.mock else args.uri,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
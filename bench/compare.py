@@ -0,0 +1,64 @@
+"""比较两次基准测试的JSON结果，列出延迟变化超过阈值的场景
+
+    python bench/compare.py before.json after.json --threshold 10
+
+结果中所有带 p95_ms 的条目按路径配对，比较 mean_ms(没有时用 p50_ms) 和 p95_ms。
+有退化时以状态码 1 退出，便于在CI中使用。
+"""
+import argparse
+import json
+
+
+def collect(node, path: str = "", out: dict = None) -> dict:
+    """找出所有带延迟分位数的条目，键为它在结果中的路径"""
+    if out is None:
+        out = {}
+    if isinstance(node, dict):
+        if "p95_ms" in node:
+            out[path] = node
+            return out
+        for key, value in node.items():
+            collect(value, f"{path}/{key}", out)
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            label = value.get("size", value.get("query", i)) if isinstance(value, dict) else i
+            collect(value, f"{path}[{label}]", out)
+    return out
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10, help="视为退化的变化百分比")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    old, new = collect(before["results"]), collect(after["results"])
+
+    regressions = 0
+    rows = []
+    for path in sorted(set(old) & set(new)):
+        metric = "mean_ms" if "mean_ms" in old[path] else "p50_ms"
+        central = change(old[path][metric], new[path][metric])
+        tail = change(old[path]["p95_ms"], new[path]["p95_ms"])
+        regressed = central > args.threshold or tail > args.threshold
+        regressions += regressed
+        rows.append({"scenario": path, metric: [old[path][metric], new[path][metric]],
+                     "change_pct": round(central, 1), "p95_change_pct": round(tail, 1),
+                     "regressed": regressed})
+    print(json.dumps({"before": before.get("commit"), "after": after.get("commit"),
+                      "threshold_pct": args.threshold, "regressions": regressions, "scenarios": rows},
+                     ensure_ascii=False, indent=2))
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
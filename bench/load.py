@@ -0,0 +1,163 @@
+"""并发HTTP负载测试：对每个接口在固定时间内持续发请求，统计吞吐量、错误数和延迟分位数
+
+    # 在进程内启动应用并写入种子数据(配合 --mock 可以不依赖 mongod)
+    python bench/load.py --concurrency 16 --duration 10
+    # 压测已经运行的服务(不写入数据，只压测 GET 接口和可以登录时的管理后台)
+    python bench/load.py --base-url http://127.0.0.1:5000 --users 10000
+
+每个接口的结果包含请求数、错误数(HTTP >= 400 或响应体 code >= 400)、每秒请求数和 p50/p95/p99。
+"""
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.cookiejar import CookieJar
+
+from common import make_parser, open_db, percentile, emit
+from seed import ADMIN_PASSWORD, FIRST_PHONE, add_seed_arguments, seed
+
+
+def scenarios(args, user_ids: list) -> list:
+    """(名称, 方法, 生成路径的函数, 生成请求体的函数, 是否需要登录)"""
+    rng = random.Random(args.seed)
+    user_count = max(1, args.users)
+    ids = user_ids or ["000000000000000000000000"]
+
+    def sample_ids():
+        return rng.sample(ids, min(50, len(ids)))
+
+    result = [
+        ("GET /user?all=true", "GET", lambda: "/user?all=true&limit=50", None, False),
+        ("GET /user?phone_number=", "GET",
+         lambda: f"/user?phone_number={FIRST_PHONE + rng.randrange(user_count)}", None, False),
+        ("GET /user?name=", "GET", lambda: f"/user?name=user{rng.randrange(user_count)}"[:16], None, False),
+        ("GET /post", "GET", lambda: "/post?limit=50", None, False),
+        ("GET /post?title=", "GET", lambda: "/post?title=python", None, False),
+        ("GET /post?q=", "GET", lambda: "/post?q=%E6%9C%BA%E5%99%A8%E5%AD%A6%E4%B9%A0", None, False),
+        ("POST /user/batch", "POST", lambda: "/user/batch", lambda: {"ids": sample_ids()}, False),
+        ("POST /post/batch", "POST", lambda: "/post/batch", lambda: {"user_ids": sample_ids()}, False),
+        ("GET /metrics", "GET", lambda: "/metrics", None, False),
+    ]
+    if not args.mock:
+        # 管理后台和 expand=author 使用的 $convert 在 mongomock 中没有实现
+        result.append(("GET /post?expand=author", "GET", lambda: "/post?limit=50&expand=author", None, False))
+        result.append(("GET /admin_dashboard", "GET", lambda: "/admin_dashboard", None, True))
+    if args.base_url:
+        # 外部服务开启了 CSRF 校验，只压测 GET 接口
+        result = [item for item in result if item[1] == "GET"]
+    return result
+
+
+def request_once(opener, base_url: str, method: str, path: str, body) -> bool:
+    """发送一个请求，返回是否成功"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"} if data else {})
+    try:
+        with opener.open(req, timeout=30) as response:
+            payload = response.read()
+            if "json" in response.headers.get("Content-Type", ""):
+                code = json.loads(payload).get("code", 200)
+                return not (isinstance(code, int) and code >= 400)
+            return True
+    except (urllib.error.URLError, OSError, ValueError):
+        return False
+
+
+def run_scenario(opener, base_url: str, scenario: tuple, concurrency: int, duration: float) -> dict:
+    _, method, path_fn, body_fn, _ = scenario
+    deadline = time.perf_counter() + duration
+    samples = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    lock = threading.Lock()
+
+    def worker(index: int):
+        while time.perf_counter() < deadline:
+            # 路径和请求体的随机数生成器不是线程安全的
+            with lock:
+                path = path_fn()
+                body = body_fn() if body_fn else None
+            start = time.perf_counter()
+            ok = request_once(opener, base_url, method, path, body)
+            samples[index].append((time.perf_counter() - start) * 1000)
+            errors[index] += not ok
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(sample for worker_samples in samples for sample in worker_samples)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def start_server(args):
+    """写入种子数据并在后台线程中启动应用，返回 (地址, 用户ID列表)"""
+    from werkzeug.serving import make_server
+    # 导入应用时会按环境变量重新配置数据库连接，必须在 open_db 之前导入
+    import app as application
+    from dao.impl.postDaoImpl import PostDaoImpl
+
+    ids = seed(open_db(args), args.users, args.posts, max(1, args.admins), args.seed)
+    application.app.config["WTF_CSRF_ENABLED"] = False
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    PostDaoImpl().build_search_index(use_snapshot=False)
+    server = make_server("127.0.0.1", 0, application.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", [str(user_id) for user_id in ids["users"]], server
+
+
+def login(opener, base_url: str) -> bool:
+    return request_once(opener, base_url, "POST", "/api/admin_login",
+                        {"adminAccount": "admin0", "adminPassword": ADMIN_PASSWORD})
+
+
+def main():
+    parser = make_parser(__doc__)
+    add_seed_arguments(parser)
+    parser.add_argument("--base-url", help="压测已经运行的服务，不启动应用也不写入数据")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数")
+    parser.add_argument("--duration", type=float, default=5, help="每个接口持续的秒数")
+    parser.add_argument("--only", nargs="*", help="只压测名称包含这些字符串的接口")
+    args = parser.parse_args()
+
+    server = None
+    if args.base_url:
+        base_url, user_ids = args.base_url.rstrip("/"), []
+    else:
+        base_url, user_ids, server = start_server(args)
+
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+    logged_in = login(opener, base_url)
+    results = {}
+    try:
+        for scenario in scenarios(args, user_ids):
+            name, needs_login = scenario[0], scenario[4]
+            if args.only and not any(part in name for part in args.only):
+                continue
+            if needs_login and not logged_in:
+                results[name] = {"skipped": "admin login failed"}
+                continue
+            results[name] = run_scenario(opener, base_url, scenario, args.concurrency, args.duration)
+    finally:
+        if server is not None:
+            server.shutdown()
+    emit("load", args, {"base_url": base_url, "concurrency": args.concurrency,
+                        "duration": args.duration, "endpoints": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""向基准测试数据库写入指定数量的用户、帖子和管理员（会先清空这三个集合）
+
+    python bench/seed.py --users 10000 --posts 100000 --admins 10
+"""
+import random
+from datetime import datetime, timedelta
+
+from common import make_parser, open_db
+from util import search
+from util.passwords import hash_password
+from util.schema import ensure_indexes
+
+WORDS = ["Python", "入门", "教程", "机器学习", "Flask", "数据库", "MongoDB", "笔记",
+         "高级", "技巧", "前端", "性能", "优化", "索引", "搜索", "测试"]
+BATCH_SIZE = 1000
+# 管理员登录的明文密码，负载测试用它登录
+ADMIN_PASSWORD = "bench-password"
+# 种子数据中第一个用户的手机号，其余依次递增
+FIRST_PHONE = 13000000000
+
+
+def _insert(collection, docs) -> list:
+    ids = []
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == BATCH_SIZE:
+            ids += collection.insert_many(batch).inserted_ids
+            batch = []
+    if batch:
+        ids += collection.insert_many(batch).inserted_ids
+    return ids
+
+
+def seed(db, users: int, posts: int, admins: int, seed_value: int = 0) -> dict:
+    """清空并写入数据，返回各集合的 _id 列表；相同参数生成相同的数据"""
+    rng = random.Random(seed_value)
+    for name in ("users", "posts", "admins"):
+        db[name].drop()
+    ensure_indexes()
+
+    # 用户密码不会被校验，用最低工作因子哈希一次后复用
+    user_password, user_salt = hash_password("bench", rounds=4)
+    user_ids = _insert(db["users"], (
+        {"nickname": f"user{i}", "phone_number": FIRST_PHONE + i, "email": f"user{i}@bench.test",
+         "password": user_password, "salt": user_salt, **search.search_fields("nickname", f"user{i}")}
+        for i in range(users)
+    ))
+
+    start = datetime(2024, 1, 1)
+
+    def post_docs():
+        for i in range(posts):
+            title = " ".join(rng.sample(WORDS, 3)) + f" {i}"
+            yield {"user_id": str(rng.choice(user_ids)) if user_ids else "bench", "title": title,
+                   "content": " ".join(rng.sample(WORDS, 8)), "date": start + timedelta(minutes=i),
+                   **search.search_fields("title", title)}
+    post_ids = _insert(db["posts"], post_docs())
+
+    # 管理员使用默认工作因子，登录耗时与生产一致
+    admin_password, admin_salt = hash_password(ADMIN_PASSWORD)
+    admin_ids = _insert(db["admins"], (
+        {"adminAccount": f"admin{i}", "adminName": f"管理员{i}", "adminPassword": admin_password,
+         "salt": admin_salt, **search.search_fields("adminName", f"管理员{i}")}
+        for i in range(admins)
+    ))
+    return {"users": user_ids, "posts": post_ids, "admins": admin_ids}
+
+
+def add_seed_arguments(parser):
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--admins", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+
+
+def main():
+    parser = make_parser(__doc__)
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+    ids = seed(open_db(args), args.users, args.posts, args.admins, args.seed)
+    print({name: len(values) for name, values in ids.items()})
+
+
+if __name__ == "__main__":
+    main()
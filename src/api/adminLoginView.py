@@ -2,7 +2,9 @@ from flask import request, make_response, jsonify
 from flask_restful import Resource
 from dao.impl.adminDaoImpl import AdminDaoImpl
 from po.admin import Admin
-import bcrypt
+from api.payloads import PayloadError, parse_login
+from util.session import SESSION_COOKIE, SESSION_MAX_AGE, issue_token
+from util.passwords import HashPoolBusy, hash_pool, needs_rehash
 
 class AdminLoginView(Resource):
     """管理员登录视图类，处理管理员登录相关API"""
@@ -21,18 +23,27 @@ class AdminLoginView(Resource):
             dict: 包含状态码和操作结果的字典
                 - 成功: 200状态码和成功消息
                 - 失败: 400/401状态码和错误信息
+                - 繁忙: 429状态码，密码校验队列已满
         """
-        data = request.get_json()
-        if not data or "adminAccount" not in data or "adminPassword" not in data:
-            return {"code": 400, "message": "缺少账号或密码参数"}
+        try:
+            account, password = parse_login(request.get_json())
+        except PayloadError as e:
+            return {"code": 400, "message": str(e)}
             
         try:
-            admin = self.dao.find_admin_by_account(data["adminAccount"])
+            admin = self.dao.find_admin_by_account(account)
             if not admin:
                 return {"code": 401, "message": "账号或密码错误"}
                 
-            # 验证密码
-            if bcrypt.checkpw(data["adminPassword"].encode(), admin.adminPassword.encode()):
+            # 在哈希线程池中验证密码
+            if hash_pool.check(password, admin.adminPassword):
+                # 工作因子与当前配置不同时顺便重新哈希，失败不影响登录
+                if needs_rehash(admin.adminPassword):
+                    try:
+                        hashed, salt = hash_pool.hash(password)
+                        self.dao.update_admin_password(admin.adminAccount, hashed, salt)
+                    except (HashPoolBusy, ValueError):
+                        pass
                 response = make_response(jsonify({
                     'code': 200,
                     'message': '登录成功',
@@ -41,9 +52,13 @@ class AdminLoginView(Resource):
                         'adminName': admin.adminName
                     }
                 }))
-                response.set_cookie('adminAccount', admin.adminAccount)
+                # 签名令牌，后台页面在本地校验，无需查询数据库
+                response.set_cookie(SESSION_COOKIE, issue_token(admin), max_age=SESSION_MAX_AGE,
+                                    httponly=True, samesite='Lax')
                 return response
             else:
                 return {"code": 401, "message": "账号或密码错误"}
+        except HashPoolBusy:
+            return {"code": 429, "message": "登录请求过多，请稍后再试"}, 429
         except Exception as e:
             return {"code": 400, "message": f"登录失败: {str(e)}"}
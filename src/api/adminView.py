@@ -2,36 +2,41 @@ from flask import request
 from flask_restful import Resource
 from dao.impl.adminDaoImpl import AdminDaoImpl
 from po.admin import Admin
-import bcrypt
+from api.payloads import admin_list
+from util.passwords import HashPoolBusy
+from util.pagination import parse_limit
+from util.conditional import conditional
+from util import search
 
 class AdminView(Resource):
     """管理员视图类，提供管理员相关的RESTful API接口"""
     def __init__(self):
         self.dao = AdminDaoImpl()
 
+    @conditional("admins")
     def get(self):
         """根据名称查询管理员信息
         
         Args:
-            name (str): 通过URL参数传递的管理员名称
+            name (str): 通过URL参数传递的管理员名称（前缀或子串，不区分大小写）
+            limit (int, optional): 最多返回条数，默认20，最大100
             
         Returns:
             dict: 包含状态码和查询结果的字典
-                - 成功: 200状态码和管理员数据
+                - 成功: 200状态码和按匹配程度排序的管理员数据，带 ETag/Last-Modified，内容未变时返回 304
                 - 失败: 400/404状态码和错误信息
         """
         name = request.args.get("name")
-        result = []
         if not name:
             return {"code": 400, "message": "缺少参数 name"}, 400
-        admins = self.dao.find_admin_by_name(name)
+        try:
+            limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT, maximum=search.MAX_LIMIT)
+        except ValueError as e:
+            return {"code": 400, "message": str(e)}, 400
+        admins = self.dao.find_admin_by_name(name, limit)
         if not admins:
             return {"code": 404, "message": f"未找到管理员: {name}"}
-        for admin in admins:
-            if "_id" in admin:
-                admin.pop("_id")
-                result.append(admin)
-        return {"code": 200, "data": result}
+        return {"code": 200, "data": admin_list(admins)}
 
     def put(self):
         """更新管理员信息
@@ -93,5 +98,7 @@ class AdminView(Resource):
             admin = Admin(**data)
             self.dao.insert_admin(admin)
             return {"code": 201, "message": "注册成功"}
+        except HashPoolBusy:
+            return {"code": 429, "message": "请求过多，请稍后再试"}, 429
         except Exception as e:
             return {"code": 400, "message": f"创建失败: {str(e)}"}
@@ -0,0 +1,339 @@
+"""ASGI 入口的异步视图
+
+与 userView/postView/adminView/adminLoginView 中的同名接口行为一致：参数校验、
+错误信息和响应格式来自 api.payloads 和 util.pagination，数据库访问换成异步 DAO。
+"""
+from api.payloads import (USER_FIELDS, SEARCH_RESULT_FIELDS, PayloadError, parse_new_user, parse_user_update,
+                          parse_new_post, parse_post_update, parse_login, parse_stats_args, with_nicknames,
+                          user_summary, post_list, admin_list)
+from dao.impl.asyncUserDaoImpl import AsyncUserDaoImpl
+from dao.impl.asyncPostDaoImpl import AsyncPostDaoImpl
+from dao.impl.postDaoImpl import SearchIndexWarming
+from dao.impl.asyncAdminDaoImpl import AsyncAdminDaoImpl
+from po.admin import Admin
+from util.asgi import json_response
+from util.conditional import conditional_async
+from util.pagination import parse_page_args, parse_timeline_args, parse_count_mode, parse_limit
+from util.passwords import HashPoolBusy, hash_pool, needs_rehash
+from util.serialize import project
+from util.session import SESSION_COOKIE, SESSION_MAX_AGE, issue_token
+from util import search, stats
+
+
+class AsyncUserView:
+    """/user，对应 UserView"""
+    def __init__(self):
+        self.dao = AsyncUserDaoImpl()
+
+    @conditional_async("users")
+    async def get(self, request):
+        try:
+            if request.args.get("all") == "true":
+                try:
+                    limit, after = parse_page_args(request.args)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+
+                users, next_cursor = await self.dao.find_users_page(limit, after)
+                if not users and not after:
+                    return {"code": 404, "message": "未找到任何用户"}
+
+                user_list = [project(user, USER_FIELDS) for user in users]
+                result = {"code": 200, "data": user_list, "next": next_cursor,
+                          "message": f"找到 {len(user_list)} 个用户"}
+                estimated = parse_count_mode(request.args)
+                if estimated is not None:
+                    result["total"] = await self.dao.count_users(estimated=estimated)
+                return result
+
+            name = request.args.get("name")
+            if name:
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                users = await self.dao.find_user_by_name(name, limit)
+                if not users:
+                    return {"code": 404, "message": f"未找到昵称为 {name} 的用户"}
+                return {"code": 200, "data": [project(user, USER_FIELDS) for user in users]}
+
+            email = request.args.get("email")
+            if email:
+                user = await self.dao.find_user_by_email(email)
+                return {"code": 200, "data": user_summary(user)}
+
+            phone_number = request.args.get("phone_number")
+            if phone_number:
+                try:
+                    user = await self.dao.find_user_by_number(int(phone_number))
+                    return {"code": 200, "data": user_summary(user)}
+                except ValueError:
+                    return {"code": 400, "message": "手机号格式不正确"}
+
+            return {"code": 400, "message": "请提供查询参数: name, email, phone_number 或 all=true"}
+
+        except Exception as e:
+            return {"code": 500, "message": f"查询失败: {str(e)}"}
+
+    async def post(self, request):
+        try:
+            try:
+                user = parse_new_user(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            await self.dao.insert_user(user)
+            return {"code": 201, "message": "用户创建成功", "data": user_summary(user)}
+        except HashPoolBusy:
+            return {"code": 429, "message": "请求过多，请稍后再试"}, 429
+        except Exception as e:
+            return {"code": 400, "message": f"创建用户失败: {str(e)}"}
+
+    async def put(self, request):
+        try:
+            nickname = request.args.get("nickname")
+            if not nickname:
+                return {"code": 400, "message": "缺少参数 nickname"}
+            try:
+                update_data = parse_user_update(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            await self.dao.update_user_by_nickname(nickname, **update_data)
+            return {"code": 200, "message": f"用户 {nickname} 更新成功"}
+        except Exception as e:
+            return {"code": 400, "message": f"更新用户失败: {str(e)}"}
+
+    async def delete(self, request):
+        try:
+            nickname = request.args.get("nickname")
+            phone_number = request.args.get("phone_number")
+            if not nickname or not phone_number:
+                return {"code": 400, "message": "缺少参数: nickname 和 phone_number 都是必需的"}
+            await self.dao.delete_user_by_number(int(phone_number))
+            return {"code": 200, "message": f"用户 {nickname} 删除成功"}
+        except Exception as e:
+            return {"code": 404, "message": f"删除用户失败: {str(e)}"}
+
+
+class AsyncUserSearchView:
+    """/user_search，对应 UserSearchView"""
+    def __init__(self):
+        self.dao = AsyncUserDaoImpl()
+
+    @conditional_async("users")
+    async def get(self, request):
+        try:
+            phone_number = request.args.get("phone_number")
+            if phone_number:
+                try:
+                    user = await self.dao.find_user_by_number(int(phone_number))
+                    return {"code": 200, "data": {"user": user_summary(user)}}
+                except ValueError:
+                    return {"code": 400, "message": "手机号格式不正确"}
+            return {"code": 400, "message": "请提供查询参数: phone_number"}
+        except Exception as e:
+            return {"code": 404, "message": f"搜索失败: {str(e)}"}
+
+
+class AsyncPostView:
+    """/post，对应 PostView"""
+    def __init__(self):
+        self.dao = AsyncPostDaoImpl()
+
+    @conditional_async("posts", "users")
+    async def get(self, request):
+        try:
+            query = request.args.get("q")
+            if query:
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                    page = max(1, int(request.args.get("page", 1)))
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                try:
+                    posts, total = await self.dao.search_posts(query, limit, (page - 1) * limit)
+                except SearchIndexWarming as e:
+                    return {"code": 503, "message": str(e)}, 503
+                results = [project(post, SEARCH_RESULT_FIELDS) for post in posts]
+                return {"code": 200, "data": results, "total": total, "page": page}
+
+            try:
+                limit, before, since, until = parse_timeline_args(request.args)
+            except ValueError as e:
+                return {"code": 400, "message": str(e)}
+            ids_only = request.args.get("ids_only") == "true"
+
+            user_id = request.args.get("user_id")
+            if user_id:
+                posts, next_cursor = await self.dao.find_posts_by_user(user_id, limit, before, since, until,
+                                                                       ids_only=ids_only)
+                if not posts and not before:
+                    return {"code": 404, "message": f"没有用户id为{user_id}的帖子"}
+                return {"code": 200, "data": post_list(posts), "next": next_cursor}
+
+            title = request.args.get("title")
+            if title:
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                posts = await self.dao.find_post_by_title(title, limit, shape="dict")
+                if not posts:
+                    return {"code": 404, "message": f"没有找到标题为'{title}'的帖子"}
+                return {"code": 200, "data": post_list(posts)}
+
+            expand_author = request.args.get("expand") == "author" and not ids_only
+            posts, next_cursor = await self.dao.find_posts_page(limit, before, expand_author, since, until,
+                                                                ids_only=ids_only)
+            result = {"code": 200, "data": post_list(posts, expand_author), "next": next_cursor}
+            estimated = parse_count_mode(request.args)
+            if estimated is not None:
+                result["total"] = await self.dao.count_posts(estimated=estimated)
+            return result
+
+        except Exception as e:
+            return {"code": 500, "message": f"查找帖子出现错误：{str(e)}"}
+
+    async def post(self, request):
+        try:
+            try:
+                post = parse_new_post(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            await self.dao.insert_post(post)
+            return {"code": 201, "message": "成功创建帖子"}
+        except Exception as e:
+            return {"code": 400, "message": f"创建帖子失败: {str(e)}"}
+
+    async def put(self, request):
+        try:
+            user_id = request.args.get("user_id")
+            if not user_id:
+                return {"code": 400, "message": "未填写user_id字段"}
+            try:
+                update_data = parse_post_update(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            await self.dao.update_post_by_userId(user_id, **update_data)
+            return {"code": 200, "message": "Post updated successfully"}
+        except Exception as e:
+            return {"code": 400, "message": f"Failed to update post: {str(e)}"}
+
+    async def delete(self, request):
+        try:
+            user_id = request.args.get("user_id")
+            if not user_id:
+                return {"code": 400, "message": "Missing user_id parameter"}
+            await self.dao.delete_post_by_userId(user_id)
+            return {"code": 200, "message": "Post deleted successfully"}
+        except Exception as e:
+            return {"code": 400, "message": f"Failed to delete post: {str(e)}"}
+
+
+class AsyncStatsView:
+    """/stats，对应 StatsView"""
+    async def get(self, request):
+        try:
+            try:
+                days, top, user_id = parse_stats_args(request.args)
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            summary = await stats.read_stats_async(days, top, user_id)
+            users = await AsyncUserDaoImpl().find_users_by_ids([row["user_id"] for row in summary["top_users"]])
+            return {"code": 200, "data": with_nicknames(summary, users)}
+        except Exception as e:
+            return {"code": 500, "message": f"获取统计失败: {str(e)}"}
+
+
+class AsyncAdminView:
+    """/admin，对应 AdminView"""
+    def __init__(self):
+        self.dao = AsyncAdminDaoImpl()
+
+    @conditional_async("admins")
+    async def get(self, request):
+        name = request.args.get("name")
+        if not name:
+            return {"code": 400, "message": "缺少参数 name"}, 400
+        try:
+            limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT, maximum=search.MAX_LIMIT)
+        except ValueError as e:
+            return {"code": 400, "message": str(e)}, 400
+        admins = await self.dao.find_admin_by_name(name, limit)
+        if not admins:
+            return {"code": 404, "message": f"未找到管理员: {name}"}
+        return {"code": 200, "data": admin_list(admins)}
+
+    async def put(self, request):
+        name = request.args.get("name")
+        try:
+            admin = Admin(**request.get_json())
+            if name is None:
+                return {"code": 400, "message": "参数没有名字"}
+            await self.dao.update_admin_by_name(name, admin)
+            return {"code": 200, "message": f"管理员 {name} 更新成功"}
+        except Exception as e:
+            return {"code": 400, "message": f"更新失败: {str(e)}"}
+
+    async def delete(self, request):
+        name = request.args.get("name")
+        if not name:
+            return {"code": 400, "message": "缺少参数 name"}
+        try:
+            await self.dao.delete_admin_by_name(name)
+            return {"code": 200, "message": f"管理员 {name} 删除成功"}
+        except Exception as e:
+            return {"code": 404, "message": f"删除失败: {str(e)}"}
+
+    async def post(self, request):
+        try:
+            admin = Admin(**request.get_json())
+            await self.dao.insert_admin(admin)
+            return {"code": 201, "message": "注册成功"}
+        except HashPoolBusy:
+            return {"code": 429, "message": "请求过多，请稍后再试"}, 429
+        except Exception as e:
+            return {"code": 400, "message": f"创建失败: {str(e)}"}
+
+
+class AsyncAdminLoginView:
+    """/api/admin_login，对应 AdminLoginView，登录成功后设置同样的会话 Cookie"""
+    # 会话令牌的签名密钥，由 asgi.py 设置为与同步应用相同的 SECRET_KEY
+    secret_key = None
+
+    def __init__(self):
+        self.dao = AsyncAdminDaoImpl()
+
+    async def post(self, request):
+        try:
+            account, password = parse_login(request.get_json())
+        except PayloadError as e:
+            return {"code": 400, "message": str(e)}
+
+        try:
+            admin = await self.dao.find_admin_by_account(account)
+            if not await hash_pool.check_async(password, admin.adminPassword):
+                return {"code": 401, "message": "账号或密码错误"}
+            if needs_rehash(admin.adminPassword):
+                try:
+                    hashed, salt = await hash_pool.hash_async(password)
+                    await self.dao.update_admin_password(admin.adminAccount, hashed, salt)
+                except (HashPoolBusy, ValueError):
+                    pass
+            response = json_response({
+                'code': 200,
+                'message': '登录成功',
+                'data': {
+                    'adminAccount': admin.adminAccount,
+                    'adminName': admin.adminName
+                }
+            })
+            response.set_cookie(SESSION_COOKIE, issue_token(admin, self.secret_key), max_age=SESSION_MAX_AGE,
+                                httponly=True, samesite='Lax')
+            return response
+        except HashPoolBusy:
+            return {"code": 429, "message": "登录请求过多，请稍后再试"}, 429
+        except Exception as e:
+            return {"code": 400, "message": f"登录失败: {str(e)}"}
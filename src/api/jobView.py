@@ -0,0 +1,89 @@
+from flask import request, send_file
+from flask_restful import Resource
+from util.jobs import jobs, SUCCEEDED
+from util.session import SESSION_COOKIE, verify_token
+
+
+def _unauthorized():
+    """未登录管理员时返回 401 响应，否则返回 None"""
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return {"code": 401, "message": "请先登录"}, 401
+    return None
+
+
+class JobListView(Resource):
+    """后台任务列表"""
+
+    def get(self):
+        """列出进程内保存的所有后台任务，仅限已登录的管理员
+
+        Returns:
+            dict: 200状态码和任务状态列表（最新的在前）
+                - 失败: 401状态码(未登录)
+        """
+        unauthorized = _unauthorized()
+        if unauthorized is not None:
+            return unauthorized
+        return {"code": 200, "data": [job.to_dict() for job in jobs.list()]}
+
+
+class JobView(Resource):
+    """后台任务视图类，查询进度和取消任务"""
+
+    def get(self, job_id):
+        """查询任务进度
+
+        Args:
+            job_id (str): 提交任务时返回的任务ID
+
+        Returns:
+            dict: 包含状态码和任务状态的字典
+                - 成功: 200状态码，data 中包含 status/processed/failed/rows_per_second/result
+                - 失败: 404状态码和错误信息
+        """
+        try:
+            return {"code": 200, "data": jobs.get(job_id).to_dict()}
+        except KeyError:
+            return {"code": 404, "message": f"未找到任务: {job_id}"}, 404
+
+    def delete(self, job_id):
+        """取消任务；已写入数据库的批次不会回滚
+
+        Args:
+            job_id (str): 任务ID
+
+        Returns:
+            dict: 包含状态码和任务状态的字典
+                - 成功: 200状态码和任务状态
+                - 失败: 404状态码和错误信息
+        """
+        try:
+            job = jobs.cancel(job_id)
+            return {"code": 200, "message": f"已请求取消任务 {job_id}", "data": job.to_dict()}
+        except KeyError:
+            return {"code": 404, "message": f"未找到任务: {job_id}"}, 404
+
+
+class JobResultView(Resource):
+    """下载导出任务生成的文件"""
+
+    def get(self, job_id):
+        """下载已完成的导出任务结果，仅限已登录的管理员
+
+        Args:
+            job_id (str): 导出任务ID
+
+        Returns:
+            Response: 文件下载
+                - 失败: 401/404/409状态码和错误信息
+        """
+        unauthorized = _unauthorized()
+        if unauthorized is not None:
+            return unauthorized
+        try:
+            job = jobs.get(job_id)
+        except KeyError:
+            return {"code": 404, "message": f"未找到任务: {job_id}"}, 404
+        if job.status != SUCCEEDED or not job.files:
+            return {"code": 409, "message": f"任务尚未完成或没有可下载的结果: {job.status}"}, 409
+        return send_file(job.files[0], as_attachment=True, download_name=job.result["filename"])
@@ -0,0 +1,129 @@
+from datetime import datetime
+from po.user import User
+from po.post import Post
+from util.pagination import parse_limit
+from util.serialize import project
+from util import stats
+
+# 接口返回的用户字段，不包含密码和盐值
+USER_FIELDS = ("_id", "nickname", "phone_number", "email")
+# 接口返回的帖子字段，ObjectId 和 datetime 由响应编码器转换
+POST_FIELDS = ("_id", "user_id", "title", "date", "content")
+SEARCH_RESULT_FIELDS = POST_FIELDS + ("score",)
+AUTHOR_FIELDS = ("_id", "nickname", "phone_number", "email")
+
+USER_REQUIRED_FIELDS = ("nickname", "phone_number", "email", "password")
+USER_UPDATE_FIELDS = ("nickname", "phone_number", "email", "password")
+POST_REQUIRED_FIELDS = ("user_id", "title")
+POST_UPDATE_FIELDS = ("title", "content")
+
+
+class PayloadError(ValueError):
+    """请求体不合法，异常信息直接作为 400 响应的 message 返回"""
+
+
+def _require_body(data) -> dict:
+    if not data:
+        raise PayloadError("请求体不能为空")
+    return data
+
+
+def parse_phone(value) -> int:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        raise PayloadError("手机号必须是数字")
+
+
+def parse_new_user(data) -> User:
+    """校验创建用户的请求体"""
+    data = _require_body(data)
+    for field in USER_REQUIRED_FIELDS:
+        if field not in data:
+            raise PayloadError(f"缺少必需字段: {field}")
+    return User(
+        nickname=data["nickname"],
+        phone_number=parse_phone(data["phone_number"]),
+        email=data["email"],
+        password=data["password"]
+    )
+
+
+def parse_user_update(data) -> dict:
+    """取出允许更新的用户字段，忽略其他字段"""
+    data = _require_body(data)
+    update_data = {}
+    for field, value in data.items():
+        if field in USER_UPDATE_FIELDS:
+            update_data[field] = parse_phone(value) if field == "phone_number" else value
+    if not update_data:
+        raise PayloadError("没有可更新的字段")
+    return update_data
+
+
+def parse_new_post(data) -> Post:
+    """校验创建帖子的请求体，发布时间取当前时间"""
+    data = _require_body(data)
+    for field in POST_REQUIRED_FIELDS:
+        if field not in data:
+            raise PayloadError(f"未填写字段：{field}")
+    return Post(
+        user_id=data["user_id"],
+        title=data["title"],
+        date=datetime.now(),
+        content=data.get("content", "")
+    )
+
+
+def parse_post_update(data) -> dict:
+    """只允许更新标题和内容"""
+    data = _require_body(data)
+    update_data = {field: data[field] for field in POST_UPDATE_FIELDS if field in data}
+    if not update_data:
+        raise PayloadError("没有字段可更新")
+    return update_data
+
+
+def parse_login(data) -> tuple:
+    """Returns: tuple: (账号, 密码)"""
+    if not data or "adminAccount" not in data or "adminPassword" not in data:
+        raise PayloadError("缺少账号或密码参数")
+    return data["adminAccount"], data["adminPassword"]
+
+
+def parse_stats_args(args) -> tuple:
+    """Returns: tuple: (天数, 发帖最多的用户数, 用户ID 或 None)"""
+    try:
+        days = parse_limit(args.get("days"), default=stats.DEFAULT_DAYS, maximum=stats.MAX_DAYS)
+        top = parse_limit(args.get("top"), default=stats.DEFAULT_TOP_USERS, maximum=stats.MAX_TOP_USERS)
+    except ValueError:
+        raise PayloadError("days 和 top 必须是数字")
+    return days, top, args.get("user_id") or None
+
+
+def with_nicknames(summary: dict, users: dict) -> dict:
+    """给统计中的用户附带昵称，users 为 find_users_by_ids 的结果(已删除的用户昵称为 None)"""
+    for row in summary["top_users"]:
+        user = users.get(row["user_id"])
+        row["nickname"] = user["nickname"] if user else None
+    return summary
+
+
+def user_summary(user: User) -> dict:
+    """按手机号/邮箱查询时返回的用户信息"""
+    return {"nickname": user.nickname, "phone_number": user.phone_number, "email": user.email}
+
+
+def post_list(posts: list, expand_author: bool = False) -> list:
+    """帖子列表的响应数据，expand_author 时附带作者(作者不存在时为 None)"""
+    result = [project(post, POST_FIELDS) for post in posts]
+    if expand_author:
+        for post_dict, post in zip(result, posts):
+            author = post.get("author")
+            post_dict["author"] = project(author, AUTHOR_FIELDS) if author else None
+    return result
+
+
+def admin_list(admins: list) -> list:
+    """管理员搜索结果，不返回 _id"""
+    return [{key: value for key, value in admin.items() if key != "_id"} for admin in admins]
@@ -1,69 +1,107 @@
 from flask import request
 from flask_restful import Resource
-from dao.impl.postDaoImpl import PostDaoImpl
-from po.post import Post
-from datetime import datetime
+from dao.impl.postDaoImpl import PostDaoImpl, EXPORT_FIELDS, SearchIndexWarming
+from api.payloads import SEARCH_RESULT_FIELDS, PayloadError, parse_new_post, parse_post_update, post_list
+from util.pagination import parse_timeline_args, parse_count_mode, parse_limit, parse_batch_ids, \
+    DEFAULT_PER_USER, MAX_PER_USER
+from util import search
+from util.export import EXPORT_FORMATS, DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, export_response, run_export_job
+from util.jobs import jobs, remove_file
+from util.jsonstream import iter_json_array
+from util.conditional import conditional
+from util.serialize import project
 from bson import ObjectId
+import csv
+import io
+import os
+import tempfile
+from functools import partial
+
 
 class PostView(Resource):
     """帖子视图类，提供帖子相关的RESTful API接口"""
     def __init__(self):
         self.dao = PostDaoImpl()
 
+    @conditional("posts", "users")
     def get(self):
         """获取帖子信息
         
         Args:
-            user_id (str, optional): 通过URL参数传递的用户ID
-            title (str, optional): 通过URL参数传递的帖子标题
+            q (str, optional): 全文检索标题和内容，按相关度排序，配合 limit/page 分页
+            page (int, optional): 全文检索的页码，从1开始
+            user_id (str, optional): 通过URL参数传递的用户ID，按发布时间倒序分页返回该用户的帖子
+            title (str, optional): 通过URL参数传递的帖子标题（前缀或子串，不区分大小写，按匹配程度排序）
+            limit (int, optional): 列表每页数量，默认50，最大500；标题搜索时默认20，最大100
+            before (str, optional): 上一页返回的 next 游标（也可以用 after 传递）
+            since (str, optional): ISO 8601 时间，只返回此时间及之后发布的帖子
+            until (str, optional): ISO 8601 时间，只返回此时间之前发布的帖子
+            ids_only (str, optional): 值为"true"时列表只返回 _id 和 date（由索引覆盖查询）
+            count (str, optional): true/estimated 返回估算总数，exact 返回精确总数
+            expand (str, optional): 值为"author"时列表中每个帖子附带作者信息(同一次查询)
             
         Returns:
             dict: 包含状态码和查询结果的字典
-                - 成功: 200状态码和帖子数据
-                - 失败: 400/404/500状态码和错误信息
+                - 成功: 200状态码和帖子数据，带 ETag/Last-Modified；
+                  请求头 If-None-Match/If-Modified-Since 表明内容未变时返回 304
+                - 失败: 400/404/500状态码和错误信息；全文检索索引尚未建立完成时返回503
         """
         try:
-            # Get posts by user ID
+            # 全文检索标题和内容
+            query = request.args.get("q")
+            if query:
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                    page = max(1, int(request.args.get("page", 1)))
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                try:
+                    posts, total = self.dao.search_posts(query, limit, (page - 1) * limit)
+                except SearchIndexWarming as e:
+                    return {"code": 503, "message": str(e)}, 503
+                results = [project(post, SEARCH_RESULT_FIELDS) for post in posts]
+                return {"code": 200, "data": results, "total": total, "page": page}
+
+            try:
+                limit, before, since, until = parse_timeline_args(request.args)
+            except ValueError as e:
+                return {"code": 400, "message": str(e)}
+            ids_only = request.args.get("ids_only") == "true"
+
+            # 用户的帖子时间线
             user_id = request.args.get("user_id")
             if user_id:
-                post = self.dao.find_post_by_userId(user_id)
-                if not post:
+                posts, next_cursor = self.dao.find_posts_by_user(user_id, limit, before, since, until,
+                                                                 ids_only=ids_only)
+                if not posts and not before:
                     return {"code": 404, "message": f"没有用户id为{user_id}的帖子"}
                 
-                post_dict = {
-                    "user_id": post.user_id,
-                    "title": post.title,
-                    "date": post.date,
-                    "content": post.content
-                }
-                return {"code": 200, "data": post_dict}
+                return {"code": 200, "data": post_list(posts), "next": next_cursor}
 
             # Search posts by title
             title = request.args.get("title")
             if title:
-                posts = self.dao.find_post_by_title(title)
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                posts = self.dao.find_post_by_title(title, limit, shape="dict")
                 if not posts:
                     return {"code": 404, "message": f"没有找到标题为'{title}'的帖子"}
                 
-                post_list = []
-                for post in posts:
-                    post_list.append({
-                        "user_id": post.user_id,
-                        "title": post.title,
-                        "date": post.date.isoformat(),
-                        "content": post.content
-                    })
-                return {"code": 200, "data": post_list}
-            posts = self.dao.find_all_posts()
-            post_list = []
-            for post in posts:
-                post_list.append({
-                    "user_id": post.user_id,
-                    "title": post.title,
-                    "date": post.date.isoformat(),
-                    "content": post.content
-                })
-            return {"code": 200, "data": post_list}
+                return {"code": 200, "data": post_list(posts)}
+
+            # 分页获取全部帖子(最新的在前)
+            expand_author = request.args.get("expand") == "author" and not ids_only
+            posts, next_cursor = self.dao.find_posts_page(limit, before, expand_author, since, until,
+                                                          ids_only=ids_only)
+            result = {"code": 200, "data": post_list(posts, expand_author), "next": next_cursor}
+            estimated = parse_count_mode(request.args)
+            if estimated is not None:
+                result["total"] = self.dao.count_posts(estimated=estimated)
+            return result
 
         except Exception as e:
             return {"code": 500, "message": f"查找帖子出现错误：{str(e)}"}
@@ -85,23 +123,11 @@ class PostView(Resource):
                 - 失败: 400状态码和错误信息
         """
         try:
-            data = request.get_json()
-            if not data:
-                return {"code": 400, "message": "请求体不能为空"}
-
-            # Validate required fields
-            required_fields = ["user_id", "title"]
-            for field in required_fields:
-                if field not in data:
-                    return {"code": 400, "message": f"未填写字段：{field}"}
-            
-            # Create post object
-            post = Post(
-                user_id=data["user_id"],
-                title=data["title"],
-                date=datetime.now(),
-                content=data.get("content", "")
-            )
+            # Validate required fields and create post object
+            try:
+                post = parse_new_post(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
 
             # Insert post
             self.dao.insert_post(post)
@@ -132,19 +158,11 @@ class PostView(Resource):
             if not user_id:
                 return {"code": 400, "message": "未填写user_id字段"}
 
-            data = request.get_json()
-            if not data:
-                return {"code": 400, "message": "请求体不能为空"}
-
             # Only allow updating title and content
-            update_data = {}
-            allowed_fields = ["title", "content"]
-            for field in allowed_fields:
-                if field in data:
-                    update_data[field] = data[field]
-
-            if not update_data:
-                return {"code": 400, "message": "没有字段可更新"}
+            try:
+                update_data = parse_post_update(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
 
             # Update post
             self.dao.update_post_by_userId(user_id, **update_data)
@@ -177,3 +195,144 @@ class PostView(Resource):
 
         except Exception as e:
             return {"code": 400, "message": f"Failed to delete post: {str(e)}"}
+
+
+class PostBatchView(Resource):
+    """批量获取多个用户的帖子"""
+    def __init__(self):
+        self.dao = PostDaoImpl()
+
+    def post(self):
+        """按用户ID批量获取帖子
+
+        Args:
+            通过请求体JSON传递用户ID列表，格式:
+            {
+                "user_ids": ["用户ID", ...],  (最多500个)
+                "per_user": 10  (可选，每个用户最多返回的最新帖子数，默认10，最大100)
+            }
+
+        Returns:
+            dict: 包含状态码和查询结果的字典
+                - 成功: 200状态码，data 为 {用户ID: 按发布时间倒序的最新帖子列表}
+                - 失败: 400/500状态码和错误信息
+        """
+        try:
+            try:
+                data = request.get_json(silent=True)
+                user_ids = parse_batch_ids(data, "user_ids")
+                per_user = parse_limit((data or {}).get("per_user"), DEFAULT_PER_USER, MAX_PER_USER)
+            except ValueError as e:
+                return {"code": 400, "message": str(e)}
+
+            posts_by_user = self.dao.find_posts_by_user_ids(user_ids, per_user=per_user)
+            data = {}
+            for user_id, posts in posts_by_user.items():
+                data[user_id] = post_list(posts)
+            return {"code": 200, "data": data}
+
+        except Exception as e:
+            return {"code": 500, "message": f"查找帖子出现错误：{str(e)}"}
+
+
+def _import_posts_job(job, file_path, batch_size, validate_users):
+    """后台导入任务：从临时文件导入，临时文件由任务的 cleanup 删除"""
+    if file_path.endswith(".csv"):
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+            return PostDaoImpl().import_posts(csv.DictReader(csvfile), batch_size=batch_size,
+                                              validate_users=validate_users, progress=job.progress)
+    with open(file_path, 'rb') as jsonfile:
+        return PostDaoImpl().import_posts(iter_json_array(jsonfile), batch_size=batch_size,
+                                          validate_users=validate_users, progress=job.progress)
+
+
+class PostImportExportView(Resource):
+    """帖子数据导入导出视图类"""
+    def __init__(self):
+        self.dao = PostDaoImpl()
+
+    def get(self):
+        """流式导出帖子数据，直接下载，不在服务器上写文件
+        
+        Args:
+            format (str, optional): csv / json / ndjson，默认json
+            batch_size (int, optional): 每次从数据库读取的文档数，默认1000，最大10000
+            async (str, optional): 值为"true"时提交后台导出任务，返回任务ID
+            
+        Returns:
+            Response: 分块传输的文件下载
+                - 后台任务: 202状态码和任务ID，完成后从 /jobs/<id>/result 下载
+                - 失败: 400状态码和错误信息
+        """
+        fmt = request.args.get("format", "json").lower()
+        if fmt not in EXPORT_FORMATS:
+            return {"code": 400, "message": f"不支持的导出格式: {fmt}"}
+        try:
+            batch_size = parse_limit(request.args.get("batch_size"),
+                                     default=DEFAULT_BATCH_SIZE, maximum=MAX_BATCH_SIZE)
+        except ValueError as e:
+            return {"code": 400, "message": str(e)}
+        try:
+            if request.args.get("async") == "true":
+                job = jobs.submit("export_posts", run_export_job,
+                                  self.dao.export_cursor(batch_size), fmt, EXPORT_FIELDS, "posts")
+                return {"code": 202, "message": "导出任务已提交",
+                        "data": {"job_id": job.id, "status_url": f"/jobs/{job.id}"}}, 202
+            return export_response(self.dao.export_cursor(batch_size), fmt, EXPORT_FIELDS, "posts")
+        except Exception as e:
+            return {"code": 400, "message": f"导出失败: {str(e)}"}
+
+    def post(self):
+        """从上传的CSV或JSON文件批量导入帖子
+
+        上传内容逐行读取，按批写入数据库。
+        
+        Args:
+            file: 通过表单上传的 .csv 或 .json 文件
+            batch_size (int, optional): 每批写入的文档数，默认1000，最大10000
+            validate_users (str, optional): 值为"true"时校验 user_id 是否存在
+            async (str, optional): 值为"true"时保存上传文件并提交后台导入任务，立即返回任务ID
+            
+        Returns:
+            dict: 包含状态码和导入汇总的字典
+                - 成功: 200状态码，data 中包含 rows/inserted/failed/errors/rows_per_second
+                - 后台任务: 202状态码和任务ID，进度通过 /jobs/<id> 查询
+                - 失败: 400状态码和错误信息
+        """
+        try:
+            file = request.files.get("file")
+            if not file or not file.filename:
+                return {"code": 400, "message": "请选择要上传的文件"}
+
+            filename = file.filename.lower()
+            if not filename.endswith((".csv", ".json")):
+                return {"code": 400, "message": "只支持CSV或JSON文件"}
+
+            try:
+                batch_size = parse_limit(request.args.get("batch_size"),
+                                         default=DEFAULT_BATCH_SIZE, maximum=MAX_BATCH_SIZE)
+            except ValueError as e:
+                return {"code": 400, "message": str(e)}
+            validate_users = request.args.get("validate_users") == "true"
+
+            if request.args.get("async") == "true":
+                fd, file_path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1])
+                os.close(fd)
+                file.save(file_path)
+                job = jobs.submit("import_posts", _import_posts_job, file_path, batch_size, validate_users,
+                                  cleanup=partial(remove_file, file_path))
+                return {"code": 202, "message": "导入任务已提交",
+                        "data": {"job_id": job.id, "status_url": f"/jobs/{job.id}"}}, 202
+
+            if filename.endswith(".csv"):
+                records = csv.DictReader(io.TextIOWrapper(file.stream, encoding="utf-8-sig"))
+            else:
+                records = iter_json_array(file.stream)
+
+            summary = self.dao.import_posts(records, batch_size=batch_size, validate_users=validate_users)
+            return {"code": 200,
+                    "message": f"导入完成: 成功 {summary['inserted']} 条，失败 {summary['failed']} 条，"
+                               f"{summary['rows_per_second']} 行/秒",
+                    "data": summary}
+        except Exception as e:
+            return {"code": 400, "message": f"导入失败: {str(e)}"}
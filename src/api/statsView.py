@@ -0,0 +1,33 @@
+from flask import request
+from flask_restful import Resource
+from dao.impl.userDaoImpl import UserDaoImpl
+from api.payloads import PayloadError, parse_stats_args, with_nicknames
+from util import stats
+
+
+class StatsView(Resource):
+    """统计视图类，读取 DAO 写操作时增量维护的物化计数"""
+
+    def get(self):
+        """获取用户数、帖子数、平均每个用户的帖子数和每天的帖子数
+
+        Args:
+            days (int, optional): 返回最近多少天的每日帖子数，默认30，最大366
+            top (int, optional): 返回帖子最多的用户数，默认10，最大100
+            user_id (str, optional): 同时返回该用户的帖子数
+
+        Returns:
+            dict: 包含状态码和统计数据的字典
+                - 成功: 200状态码，data 中包含 users/posts/posts_per_user/posts_per_day/top_users
+                - 失败: 400/500状态码和错误信息
+        """
+        try:
+            try:
+                days, top, user_id = parse_stats_args(request.args)
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
+            summary = stats.read_stats(days, top, user_id)
+            users = UserDaoImpl().find_users_by_ids([row["user_id"] for row in summary["top_users"]])
+            return {"code": 200, "data": with_nicknames(summary, users)}
+        except Exception as e:
+            return {"code": 500, "message": f"获取统计失败: {str(e)}"}
@@ -1,66 +1,80 @@
 from flask import request, redirect, url_for, flash
 from flask_restful import Resource
-from dao.impl.userDaoImpl import UserDaoImpl
-from po.user import User
+from dao.impl.userDaoImpl import UserDaoImpl, EXPORT_FIELDS
+from api.payloads import USER_FIELDS, PayloadError, parse_new_user, parse_user_update, user_summary
+from util.pagination import parse_page_args, parse_count_mode, parse_limit, parse_batch_ids
+from util import search
+from util.export import EXPORT_FORMATS, DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, export_response, run_export_job
+from util.jobs import jobs, remove_file
+from util.passwords import HashPoolBusy
+from util.jsonstream import iter_json_array
+from util.conditional import conditional
+from util.serialize import project
 from bson import ObjectId
 import json
+import os
+import tempfile
+from functools import partial
+
 
 class UserView(Resource):
     """用户视图类，提供用户相关的RESTful API接口"""
     def __init__(self):
         self.dao = UserDaoImpl()
 
+    @conditional("users")
     def get(self):
         """获取用户信息
         
         Args:
-            name (str, optional): 通过URL参数传递的用户昵称
+            name (str, optional): 通过URL参数传递的用户昵称（前缀或子串，不区分大小写，按匹配程度排序）
             email (str, optional): 通过URL参数传递的用户邮箱
             phone_number (str, optional): 通过URL参数传递的用户手机号
-            all (str, optional): 值为"true"时获取所有用户
+            all (str, optional): 值为"true"时分页获取所有用户
+            limit (int, optional): 每页数量，默认50，最大500；昵称搜索时默认20，最大100
+            after (str, optional): 上一页返回的 next 游标
+            count (str, optional): true/estimated 返回估算总数，exact 返回精确总数
             
         Returns:
             dict: 包含状态码和查询结果的字典
-                - 成功: 200状态码和用户数据
+                - 成功: 200状态码和用户数据，带 ETag/Last-Modified，内容未变时返回 304
                 - 失败: 400/404/500状态码和错误信息
         """
         try:
-            # 获取所有用户
+            # 分页获取所有用户
             if request.args.get("all") == "true":
-                users = self.dao.find_all_user()
-                if not users:
+                try:
+                    limit, after = parse_page_args(request.args)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+
+                users, next_cursor = self.dao.find_users_page(limit, after)
+                if not users and not after:
                     return {"code": 404, "message": "未找到任何用户"}
-                
-                # 转换MongoDB文档为可序列化的格式
-                user_list = []
-                for user in users:
-                    user_dict = {
-                        "_id": str(user._id),
-                        "nickname": user.nickname,
-                        "phone_number": user.phone_number,
-                        "email": user.email
-                    }
-                    user_list.append(user_dict)
-                
-                return {"code": 200, "data": user_list, "message": f"找到 {len(user_list)} 个用户"}
+
+                # 直接从MongoDB文档取字段，ObjectId 由响应编码器转换
+                user_list = [project(user, USER_FIELDS) for user in users]
+
+                result = {"code": 200, "data": user_list, "next": next_cursor,
+                          "message": f"找到 {len(user_list)} 个用户"}
+                estimated = parse_count_mode(request.args)
+                if estimated is not None:
+                    result["total"] = self.dao.count_users(estimated=estimated)
+                return result
 
             # 根据昵称查询
             name = request.args.get("name")
             if name:
-                users = self.dao.find_user_by_name(name)
+                try:
+                    limit = parse_limit(request.args.get("limit"), default=search.DEFAULT_LIMIT,
+                                        maximum=search.MAX_LIMIT)
+                except ValueError as e:
+                    return {"code": 400, "message": str(e)}
+                users = self.dao.find_user_by_name(name, limit)
                 if not users:
                     return {"code": 404, "message": f"未找到昵称为 {name} 的用户"}
                 
-                user_list = []
-                for user in users:
-                    user_dict = {
-                        "_id": str(user._id),
-                        "nickname": user.nickname,
-                        "phone_number": user.phone_number,
-                        "email": user.email
-                    }
-                    user_list.append(user_dict)
-                
+                user_list = [project(user, USER_FIELDS) for user in users]
                 return {"code": 200, "data": user_list}
 
             # 根据邮箱查询
@@ -70,13 +84,7 @@ class UserView(Resource):
                 if not user:
                     return {"code": 404, "message": f"未找到邮箱为 {email} 的用户"}
                 
-                user_dict = {
-                    "nickname": user.nickname,
-                    "phone_number": user.phone_number,
-                    "email": user.email
-                }
-                
-                return {"code": 200, "data": user_dict}
+                return {"code": 200, "data": user_summary(user)}
 
             # 根据手机号查询
             phone_number = request.args.get("phone_number")
@@ -87,13 +95,7 @@ class UserView(Resource):
                     if not user:
                         return {"code": 404, "message": f"未找到手机号为 {phone_number} 的用户"}
                     
-                    user_dict = {
-                        "nickname": user.nickname,
-                        "phone_number": user.phone_number,
-                        "email": user.email,
-                    }
-                    
-                    return {"code": 200, "data": user_dict}
+                    return {"code": 200, "data": user_summary(user)}
                 except ValueError:
                     return {"code": 400, "message": "手机号格式不正确"}
 
@@ -120,39 +122,19 @@ class UserView(Resource):
                 - 失败: 400状态码和错误信息
         """
         try:
-            data = request.get_json()
-            if not data:
-                return {"code": 400, "message": "请求体不能为空"}
-
-            # 验证必需字段
-            required_fields = ["nickname", "phone_number", "email", "password"]
-            for field in required_fields:
-                if field not in data:
-                    return {"code": 400, "message": f"缺少必需字段: {field}"}
-
-            # 验证手机号格式
+            # 校验必需字段和手机号格式
             try:
-                phone_number = int(data["phone_number"])
-            except (ValueError, TypeError):
-                return {"code": 400, "message": "手机号必须是数字"}
-
-            # 创建用户对象
-            user = User(
-                nickname=data["nickname"],
-                phone_number=phone_number,
-                email=data["email"],
-                password=data["password"]
-            )
+                user = parse_new_user(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
 
             # 插入用户
             self.dao.insert_user(user)
             
-            return {"code": 201, "message": "用户创建成功", "data": {
-                "nickname": user.nickname,
-                "phone_number": user.phone_number,
-                "email": user.email
-            }}
+            return {"code": 201, "message": "用户创建成功", "data": user_summary(user)}
 
+        except HashPoolBusy:
+            return {"code": 429, "message": "请求过多，请稍后再试"}, 429
         except Exception as e:
             return {"code": 400, "message": f"创建用户失败: {str(e)}"}
 
@@ -179,26 +161,11 @@ class UserView(Resource):
             if not nickname:
                 return {"code": 400, "message": "缺少参数 nickname"}
 
-            data = request.get_json()
-            if not data:
-                return {"code": 400, "message": "请求体不能为空"}
-
             # 移除不允许更新的字段
-            update_data = {}
-            allowed_fields = ["nickname", "phone_number", "email", "password"]
-            
-            for field, value in data.items():
-                if field in allowed_fields:
-                    if field == "phone_number":
-                        try:
-                            update_data[field] = int(value)
-                        except (ValueError, TypeError):
-                            return {"code": 400, "message": "手机号必须是数字"}
-                    else:
-                        update_data[field] = value
-
-            if not update_data:
-                return {"code": 400, "message": "没有可更新的字段"}
+            try:
+                update_data = parse_user_update(request.get_json())
+            except PayloadError as e:
+                return {"code": 400, "message": str(e)}
 
             # 更新用户
             self.dao.update_user_by_nickname(nickname, **update_data)
@@ -241,6 +208,7 @@ class UserSearchView(Resource):
     def __init__(self):
         self.dao = UserDaoImpl()
 
+    @conditional("users")
     def get(self):
         """高级用户搜索
         
@@ -249,7 +217,7 @@ class UserSearchView(Resource):
             
         Returns:
             dict: 包含状态码和搜索结果的字典
-                - 成功: 200状态码和用户数据
+                - 成功: 200状态码和用户数据，带 ETag/Last-Modified，内容未变时返回 304
                 - 失败: 400/404状态码和错误信息
         """
         try:
@@ -258,7 +226,7 @@ class UserSearchView(Resource):
                 try:
                     phone_num = int(phone_number)
                     user = self.dao.find_user_by_number(phone_num)
-                    return {"code": 200, "data": {"user": user.__dict__}}
+                    return {"code": 200, "data": {"user": user_summary(user)}}
                 except ValueError:
                     return {"code": 400, "message": "手机号格式不正确"}
             
@@ -268,44 +236,100 @@ class UserSearchView(Resource):
             return {"code": 404, "message": f"搜索失败: {str(e)}"}
 
 
+class UserBatchView(Resource):
+    """批量获取用户，渲染帖子列表时一次取出所有作者"""
+    def __init__(self):
+        self.dao = UserDaoImpl()
+
+    def post(self):
+        """按ID批量获取用户
+
+        Args:
+            通过请求体JSON传递用户ID列表，格式:
+            {
+                "ids": ["用户ID", ...]  (最多500个)
+            }
+
+        Returns:
+            dict: 包含状态码和查询结果的字典
+                - 成功: 200状态码，data 为 {用户ID: 用户信息}，missing 为不存在的ID
+                - 失败: 400/500状态码和错误信息
+        """
+        try:
+            try:
+                ids = parse_batch_ids(request.get_json(silent=True), "ids")
+            except ValueError as e:
+                return {"code": 400, "message": str(e)}
+
+            users = self.dao.find_users_by_ids(ids)
+            user_map = {user_id: project(user, USER_FIELDS) for user_id, user in users.items()}
+            missing = [user_id for user_id in ids if user_id not in user_map]
+            return {"code": 200, "data": user_map, "missing": missing}
+
+        except Exception as e:
+            return {"code": 500, "message": f"查询失败: {str(e)}"}
+
+
+def _import_users_job(job, file_path):
+    """后台导入任务：从临时文件流式导入，临时文件由任务的 cleanup 删除"""
+    with open(file_path, 'rb') as jsonfile:
+        return UserDaoImpl().import_users(iter_json_array(jsonfile), progress=job.progress)
+
+
 class UserImportExportView(Resource):
     """用户数据导入导出视图类"""
     def __init__(self):
         self.dao = UserDaoImpl()
 
     def get(self):
-        """导出用户数据为JSON文件
+        """流式导出用户数据，直接下载，不在服务器上写文件
         
         Args:
-            file_path (str): 通过URL参数传递的导出文件路径
+            format (str, optional): csv / json / ndjson，默认json
+            batch_size (int, optional): 每次从数据库读取的文档数，默认1000，最大10000
+            async (str, optional): 值为"true"时提交后台导出任务，返回任务ID
             
         Returns:
-            dict: 包含状态码和操作结果的字典
-                - 成功: 200状态码和成功消息
+            Response: 分块传输的文件下载
+                - 后台任务: 202状态码和任务ID，完成后从 /jobs/<id>/result 下载
                 - 失败: 400状态码和错误信息
         """
+        fmt = request.args.get("format", "json").lower()
+        if fmt not in EXPORT_FORMATS:
+            return {"code": 400, "message": f"不支持的导出格式: {fmt}"}
         try:
-            file_path = request.args.get("file_path")
-            if not file_path:
-                return {"code": 400, "message": "缺少参数 file_path"}
-            
-            if self.dao.export_to_json(file_path):
-                return {"code": 200, "message": f"用户数据已成功导出到 {file_path}"}
-            return {"code": 400, "message": "导出失败，没有用户数据"}
+            batch_size = parse_limit(request.args.get("batch_size"),
+                                     default=DEFAULT_BATCH_SIZE, maximum=MAX_BATCH_SIZE)
+        except ValueError as e:
+            return {"code": 400, "message": str(e)}
+        try:
+            if request.args.get("async") == "true":
+                job = jobs.submit("export_users", run_export_job,
+                                  self.dao.export_cursor(batch_size), fmt, EXPORT_FIELDS, "users")
+                return {"code": 202, "message": "导出任务已提交",
+                        "data": {"job_id": job.id, "status_url": f"/jobs/{job.id}"}}, 202
+            return export_response(self.dao.export_cursor(batch_size), fmt, EXPORT_FIELDS, "users")
         except Exception as e:
             return {"code": 400, "message": f"导出失败: {str(e)}"}
 
     def post(self):
         """从上传的JSON文件导入用户数据
+
+        上传内容被流式解析，按批写入数据库，不会整体读入内存。
         
         Args:
             json_file: 通过表单上传的JSON文件
+            async (str, optional): 值为"true"时保存上传文件并提交后台导入任务，立即返回任务ID
             
         Returns:
-            dict: 包含状态码和操作结果的字典
-                - 成功: 200状态码和成功消息
-                - 失败: 400状态码和错误信息
+            重定向到管理页面并提示导入汇总；
+            请求头 Accept 为 application/json 时返回导入汇总字典:
+                - inserted: 成功导入数
+                - skipped: 因重复而跳过的数量
+                - failed: 校验或写入失败的数量
+                - errors: 逐行错误信息（最多100条）
         """
+        wants_json = request.accept_mimetypes.best == "application/json"
         try:
             if 'json_file' not in request.files:
                 return {"code": 400, "message": "请选择要上传的JSON文件"}
@@ -320,42 +344,30 @@ class UserImportExportView(Resource):
                 
             if not filename.lower().endswith('.json'):
                 return {"code": 400, "message": "只支持JSON文件"}
-                
-            # 保存临时文件
-            import tempfile
-            import os
-            from werkzeug.utils import secure_filename
-            
-            temp_dir = tempfile.mkdtemp()
-            safe_filename = secure_filename(filename)
-            file_path = os.path.join(temp_dir, safe_filename)
-            
-            try:
+
+            if request.args.get("async") == "true":
+                fd, file_path = tempfile.mkstemp(suffix=".json")
+                os.close(fd)
                 file.save(file_path)
-                
-                # 导入数据
-                result = self.dao.import_from_json(file_path)
-                
-                if result:
-                    flash("用户数据导入成功", "success")
-                    return redirect(url_for('adminview'))
-                flash("导入失败", "danger")
-                return redirect(url_for('adminview'))
-                
-            except Exception as e:
-                flash(f"文件处理失败: {str(e)}", "danger")
-                return redirect(url_for('adminview'))
-                
-            finally:
-                # 确保删除临时文件
-                try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                    if os.path.exists(temp_dir):
-                        os.rmdir(temp_dir)
-                except Exception as e:
-                    print(f"清理临时文件失败: {str(e)}")
+                job = jobs.submit("import_users", _import_users_job, file_path,
+                                  cleanup=partial(remove_file, file_path))
+                return {"code": 202, "message": "导入任务已提交",
+                        "data": {"job_id": job.id, "status_url": f"/jobs/{job.id}"}}, 202
+
+            # 直接从上传流中逐条解析并批量导入
+            summary = self.dao.import_users(iter_json_array(file.stream))
+            message = (f"导入完成: 成功 {summary['inserted']} 条，"
+                       f"跳过 {summary['skipped']} 条，失败 {summary['failed']} 条")
+            if wants_json:
+                return {"code": 200, "message": message, "data": summary}
+
+            flash(message, "success" if not summary["failed"] else "warning")
+            for error in summary["errors"][:5]:
+                flash(f"第 {error['row'] + 1} 条: {error['error']}", "danger")
+            return redirect(url_for('adminview'))
                     
         except Exception as e:
+            if wants_json:
+                return {"code": 400, "message": f"导入失败: {str(e)}"}
             flash(f"导入失败: {str(e)}", "danger")
             return redirect(url_for('admin'))
@@ -1,32 +1,125 @@
-from flask import Flask, render_template, request, redirect, jsonify
+from flask import Flask, Response, render_template, request, redirect, jsonify
 from flask_cors import CORS
 from flask_restful import Api, Resource
 from flask_wtf.csrf import CSRFProtect
 from api.adminView import AdminView
-from api.postView import PostView
-from api.userView import UserSearchView, UserView, UserImportExportView
+from api.postView import PostView, PostBatchView, PostImportExportView
+from api.userView import UserSearchView, UserView, UserBatchView, UserImportExportView
 from api.adminLoginView import AdminLoginView
+from api.jobView import JobListView, JobView, JobResultView
+from api.statsView import StatsView
+from api.payloads import with_nicknames
+import atexit
 import os
+import threading
+from pymongo.errors import PyMongoError
 
-from dao.impl.adminDaoImpl import AdminDaoImpl
+from dao.impl.adminDaoImpl import AdminDaoImpl, admin_cache
 from po.admin import Admin
+from util.dbutil import DBUtil
+from util.schema import ensure_indexes, backfill_search_fields
+from util.jobs import jobs
+from util.session import SESSION_COOKIE, verify_token
+from util.passwords import HashPoolBusy, hash_pool, import_hash_pool
+from util.serialize import FastJSONProvider, output_json
+from util.conditional import validators
+from util import metrics
+from util.changes import SSE_MAX_CLIENTS, hub, watcher, sse_stream
+from util import stats
+from dao.impl.postDaoImpl import PostDaoImpl, save_post_index, start_search_index_build
+from dao.impl.userDaoImpl import UserDaoImpl, user_cache
 
 app = Flask(__name__, template_folder='../templates')
 
 app.config['WTF_CSRF_ENABLED'] = True
-app.config['SECRET_KEY'] = 'your-secret-key-here'
+# 会话令牌用该密钥签名，生产环境请通过环境变量设置
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+# 先注册计时钩子，使被 CSRF 校验拒绝的请求也被统计；/metrics 输出 Prometheus 文本格式
+metrics.init_app(app)
 csrf = CSRFProtect(app)
+# API 响应和 jsonify 统一使用 util.serialize 的编码器（安装了 orjson 时使用 orjson）
+app.json = FastJSONProvider(app)
 api = Api(app)
+api.representations['application/json'] = output_json
 CORS(app)
 
+# 数据库连接池配置（未设置时使用环境变量或默认值）
+DBUtil.configure(
+    uri=app.config.get('MONGO_URI'),
+    max_pool_size=app.config.get('MONGO_MAX_POOL_SIZE'),
+)
+atexit.register(DBUtil.close)
+atexit.register(jobs.shutdown)
+atexit.register(hash_pool.shutdown)
+atexit.register(import_hash_pool.shutdown)
+atexit.register(save_post_index)
+atexit.register(watcher.stop)
+atexit.register(stats.reconciler.stop)
+
+# 完成启动初始化的进程号，fork 出的每个工作进程各自执行一次
+_initialized_pid = None
+_init_lock = threading.Lock()
+
+def init_process():
+    """创建索引并在后台建立帖子全文检索索引，每个进程只执行一次
+
+    flask run、gunicorn 等 WSGI 服务器都不会执行 __main__，由第一个请求触发；
+    数据库不可用时记录日志，下一个请求重试。
+    """
+    global _initialized_pid
+    if _initialized_pid == os.getpid():
+        return
+    with _init_lock:
+        if _initialized_pid == os.getpid():
+            return
+        try:
+            ensure_indexes()
+        except PyMongoError as e:
+            app.logger.warning("Failed to create indexes, will retry: %r", e)
+            return
+        start_search_index_build()
+        _initialized_pid = os.getpid()
+
+@app.before_request
+def start_background_threads():
+    # 每个工作进程在收到第一个请求时完成初始化，并启动自己的变更监听和统计对账线程(已启动时立即返回)
+    init_process()
+    watcher.start()
+    stats.reconciler.start()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """创建所有集合的索引: flask --app app init-db"""
+    for collection, names in ensure_indexes().items():
+        print(f"{collection}: {', '.join(names)}")
+
+@app.cli.command('backfill-search')
+def backfill_search_command():
+    """为旧数据补全搜索字段: flask --app app backfill-search"""
+    for collection, count in backfill_search_fields().items():
+        print(f"{collection}: {count}")
+
+@app.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    """用聚合重新计算物化统计: flask --app app reconcile-stats"""
+    for key, value in stats.reconcile().items():
+        print(f"{key}: {value}")
+
 # 注册API路由
 api.add_resource(AdminView, '/admin', endpoint='adminview')
 api.add_resource(AdminView, '/adminview', endpoint='admin')  # For backward compatibility
 api.add_resource(UserView, "/user")
 api.add_resource(PostView, "/post")
+api.add_resource(UserBatchView, "/user/batch")
+api.add_resource(PostBatchView, "/post/batch")
 api.add_resource(UserSearchView, "/user_search")
 api.add_resource(AdminLoginView, "/api/admin_login")
 api.add_resource(UserImportExportView, "/user_import_export")
+api.add_resource(PostImportExportView, "/post_import_export")
+api.add_resource(JobListView, "/jobs")
+api.add_resource(JobView, "/jobs/<string:job_id>")
+api.add_resource(JobResultView, "/jobs/<string:job_id>/result")
+api.add_resource(StatsView, "/stats")
 
 # 添加模板路由
 @app.route('/')
@@ -64,6 +157,12 @@ def register():
             'message': '注册成功',
             'data': None
         }), 200
+    except HashPoolBusy:
+        return jsonify({
+            'code': 429,
+            'message': '注册请求过多，请稍后再试',
+            'data': None
+        }), 429
     except Exception as e:
         return jsonify({
             'code': 500,
@@ -71,35 +170,146 @@ def register():
             'data': None
         }), 500
 
+@app.route('/api/pool_stats', methods=['GET'])
+def pool_stats():
+    """MongoDB 连接池统计，仅限已登录的管理员"""
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return jsonify({
+            'code': 401,
+            'message': '请先登录',
+            'data': None
+        }), 401
+    return jsonify({
+        'code': 200,
+        'message': 'ok',
+        'data': DBUtil.pool_stats()
+    }), 200
+
+@app.route('/api/cache_stats', methods=['GET'])
+def cache_stats():
+    """用户/管理员缓存和条件请求的统计，仅限已登录的管理员"""
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return jsonify({
+            'code': 401,
+            'message': '请先登录',
+            'data': None
+        }), 401
+    return jsonify({
+        'code': 200,
+        'message': 'ok',
+        'data': {
+            'users': user_cache.stats(),
+            'admins': admin_cache.stats(),
+            'conditional': validators.stats()
+        }
+    }), 200
+
+@app.route('/api/query_stats', methods=['GET'])
+def query_stats():
+    """各DAO方法的数据库命令统计和慢查询，仅限已登录的管理员"""
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return jsonify({
+            'code': 401,
+            'message': '请先登录',
+            'data': None
+        }), 401
+    return jsonify({
+        'code': 200,
+        'message': 'ok',
+        'data': DBUtil.query_stats(reset=request.args.get('reset') == 'true')
+    }), 200
+
+@app.route('/api/changes/stream', methods=['GET'])
+def change_stream():
+    """以 Server-Sent Events 推送 users/posts/admins 的变更，仅限已登录的管理员
+
+    浏览器断线重连时带上 Last-Event-ID，从该事件之后补发；首次连接可用 last_event_id
+    参数传入页面渲染时的事件ID。
+    """
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return jsonify({
+            'code': 401,
+            'message': '请先登录',
+            'data': None
+        }), 401
+    if hub.subscriber_count >= SSE_MAX_CLIENTS:
+        return jsonify({
+            'code': 503,
+            'message': '实时连接数已满，请改用轮询',
+            'data': None
+        }), 503
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    return Response(sse_stream(hub.subscribe(), last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/changes', methods=['GET'])
+def change_poll():
+    """不支持 SSE 时的轮询接口：返回 after 之后的变更，reset 为 true 时应重新加载数据"""
+    if verify_token(request.cookies.get(SESSION_COOKIE)) is None:
+        return jsonify({
+            'code': 401,
+            'message': '请先登录',
+            'data': None
+        }), 401
+    events, complete = hub.since(request.args.get('after'))
+    return jsonify({
+        'code': 200,
+        'message': 'ok',
+        'data': events,
+        'last': hub.last_id,
+        'reset': not complete
+    }), 200
+
+@app.route('/logout')
+def logout():
+    response = redirect('/login')
+    response.delete_cookie(SESSION_COOKIE)
+    return response
+
+# 管理后台首屏每个列表渲染的行数，其余通过分页接口按需加载
+DASHBOARD_PAGE_SIZE = 20
+# 管理后台统计面板显示的天数和发帖最多的用户数
+DASHBOARD_STATS_DAYS = 14
+DASHBOARD_TOP_USERS = 5
+
 @app.route('/admin_dashboard')
 def admin_dashboard():
-    # 获取管理员信息
-    from dao.impl.adminDaoImpl import AdminDaoImpl
-    admin_account = request.cookies.get('adminAccount')
-    if not admin_account:
+    # 本地校验会话令牌，管理员信息来自缓存
+    session = verify_token(request.cookies.get(SESSION_COOKIE))
+    if session is None:
         return redirect('/login')
     
     try:
-        admin = AdminDaoImpl().find_admin_by_account(admin_account)
+        admin = AdminDaoImpl().find_admin_by_account(session['account'])
     except ValueError:
         return redirect('/login')
     
-    # 获取帖子信息
-    from dao.impl.postDaoImpl import PostDaoImpl
-    posts = PostDaoImpl().find_all_posts()
+    # 在读取数据之前记下事件位置，页面从这里开始接收增量变更
+    change_id = hub.last_id
+    # 只获取第一页帖子(带作者)，后续页由前端通过 /post?expand=author&after= 加载
+    posts, posts_next = PostDaoImpl().find_posts_page(DASHBOARD_PAGE_SIZE, expand_author=True)
     
-    # 获取用户信息
-    from dao.impl.userDaoImpl import UserDaoImpl
-    users = UserDaoImpl().find_all_user()
-    print(f"DEBUG: Found {len(users)} users")  # Debug output
-    for i, user in enumerate(users):
-        print(f"User {i}: {user}")
+    # 只获取第一页用户，后续页由前端通过 /user?all=true&after= 加载
+    users, users_next = UserDaoImpl().find_users_page(DASHBOARD_PAGE_SIZE)
+
+    # 统计面板读取物化计数，不随数据量增长
+    summary = stats.read_stats(DASHBOARD_STATS_DAYS, DASHBOARD_TOP_USERS)
+    with_nicknames(summary, UserDaoImpl().find_users_by_ids([row["user_id"] for row in summary["top_users"]]))
     
     return render_template('admin.html',
         admin=admin,
         posts=posts,
-        users=users
+        posts_next=posts_next,
+        users=users,
+        users_next=users_next,
+        page_size=DASHBOARD_PAGE_SIZE,
+        change_id=change_id,
+        summary=summary,
+        stats_days=DASHBOARD_STATS_DAYS,
+        top_users=DASHBOARD_TOP_USERS
     )
 
 if __name__ == '__main__':
+    # 直接运行时在接受请求之前完成初始化
+    init_process()
     app.run(debug=True)
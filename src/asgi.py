@@ -0,0 +1,66 @@
+"""异步(ASGI)入口，与 app.py 并列的可选部署方式
+
+    cd src && uvicorn asgi:app --workers 4
+
+提供与同步应用相同的 /user、/post、/admin、/user_search、/api/admin_login、/stats 接口
+(以及 /metrics)，处理函数为协程，数据库访问使用 pymongo 的 AsyncMongoClient，
+一个工作进程即可同时处理大量等待数据库的请求。页面、导入导出和后台任务仍由 app.py 提供。
+需要安装任意 ASGI 服务器(如 uvicorn)，应用本身不依赖 ASGI 框架。
+"""
+import asyncio
+import logging
+import os
+
+from api.asyncViews import (AsyncUserView, AsyncUserSearchView, AsyncPostView, AsyncAdminView,
+                            AsyncAdminLoginView, AsyncStatsView)
+from dao.impl.postDaoImpl import save_post_index, start_search_index_build
+from util.asgi import ASGIApp, Response
+from util.asyncdb import AsyncDBUtil
+from util.changes import watcher
+from util.stats import reconciler
+from util.metrics import PROMETHEUS_CONTENT_TYPE, request_metrics
+from util.passwords import hash_pool
+from util.schema import ensure_indexes
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("asgi")
+
+# 与 app.py 使用同一个签名密钥，两种入口签发的会话 Cookie 可以互相识别
+AsyncAdminLoginView.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+
+
+class MetricsView:
+    async def get(self, request):
+        return Response(request_metrics.render().encode(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+async def startup():
+    # 与 app.py 的 init_process 相同：创建索引，在后台加载帖子全文检索索引
+    try:
+        await asyncio.to_thread(ensure_indexes)
+    except PyMongoError as e:
+        logger.warning("Failed to create indexes: %r", e)
+    start_search_index_build()
+    # 变更监听线程：其他进程的写操作同步到本进程的缓存和倒排索引
+    watcher.start()
+    reconciler.start()
+
+
+async def shutdown():
+    await asyncio.to_thread(watcher.stop)
+    await asyncio.to_thread(reconciler.stop)
+    await AsyncDBUtil.close()
+    hash_pool.shutdown()
+    save_post_index()
+
+
+app = ASGIApp()
+app.add_resource(AsyncAdminView, '/admin', '/adminview')
+app.add_resource(AsyncUserView, '/user')
+app.add_resource(AsyncPostView, '/post')
+app.add_resource(AsyncUserSearchView, '/user_search')
+app.add_resource(AsyncAdminLoginView, '/api/admin_login')
+app.add_resource(AsyncStatsView, '/stats')
+app.add_resource(MetricsView, '/metrics')
+app.on_startup.append(startup)
+app.on_shutdown.append(shutdown)
@@ -17,11 +17,16 @@ class AdminDao(ABC):
     def delete_admin_by_name(self,name:str) -> None:
         pass
 
-    #通过名字找到Admin
+    #通过名字前缀/子串搜索Admin，最多返回limit条
     @abstractmethod
-    def find_admin_by_name(self,name:str) -> list:
+    def find_admin_by_name(self,name:str,limit:int=20) -> list:
         pass
 
     @abstractmethod
     def find_admin_by_account(self,account:str) -> Admin:
         pass
+
+    #更新Admin的密码哈希(登录时按新的工作因子重新哈希)
+    @abstractmethod
+    def update_admin_password(self,account:str,password_hash:str,salt:str) -> None:
+        pass
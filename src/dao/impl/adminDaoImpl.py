@@ -1,31 +1,43 @@
 from dao.adminDao import AdminDao
 from po.admin import Admin
 from util.dbutil import DBUtil
-import bcrypt
+from util.querystats import track_dao
+from util.cache import TTLCache
+from util import search, changes
+from util.passwords import HashPoolBusy, hash_pool
+from pymongo import ReturnDocument
 
+# 按账号缓存管理员信息，管理员被更新或删除时失效
+admin_cache = TTLCache(maxsize=1024, ttl=60)
+# 其他进程修改了管理员时清空本进程的缓存(管理员数量少，不必按账号删除)
+changes.hub.add_listener("admins", lambda event: admin_cache.clear())
+changes.hub.add_reset_listener(admin_cache.clear)
+
+@track_dao
 class AdminDaoImpl(AdminDao):
     def __init__(self):
         """Initialize the AdminDaoImpl with a MongoDB connection"""
         self.db = DBUtil.connect()
-        # Create or connect to the "admins" collection
-        self.collection = self.db["admins"]
-        # Create a unique index on the adminAccount field
-        self.collection.create_index("adminAccount", unique=True)
+        # Reuse the shared "admins" collection handle (indexes are created by util.schema)
+        self.collection = DBUtil.collection("admins")
 
     def insert_admin(self, admin: Admin) -> None:
         """Insert admin using PyMongo"""
         try:
-            # Configure bcrypt for password hashing
-            salt = bcrypt.gensalt()
-            hashed = bcrypt.hashpw(admin.adminPassword.encode(), salt)
+            # Hash on the shared bcrypt pool instead of the request thread
+            hashed, salt = hash_pool.hash(admin.adminPassword)
             admin_data = {
                 "adminAccount": admin.adminAccount,
                 "adminName": admin.adminName,
-                "adminPassword": hashed.decode(),
-                "salt": salt.decode()
+                "adminPassword": hashed,
+                "salt": salt,
+                **search.search_fields("adminName", admin.adminName)
             }
             
             self.collection.insert_one(admin_data)
+            changes.record("admins", "insert", admin_data["_id"], admin_data)
+        except HashPoolBusy:
+            raise
         except Exception as e:
             raise ValueError(f"Failed to insert admin: {str(e)}")
 
@@ -37,46 +49,70 @@ class AdminDaoImpl(AdminDao):
                     "adminAccount": admin.adminAccount,
                     "adminName": admin.adminName,
                     "adminPassword": admin.adminPassword,
-                    "salt": admin.salt
+                    "salt": admin.salt,
+                    **search.search_fields("adminName", admin.adminName)
                 }
             }
-            result = self.collection.update_one(
+            previous = self.collection.find_one_and_update(
                 {"adminName": name},
-                update_data
+                update_data,
+                projection={"adminAccount": 1},
+                return_document=ReturnDocument.BEFORE
             )
-            if result.matched_count == 0:
+            if previous is None:
                 raise ValueError(f"No admin found with name: {name}")
+            admin_cache.delete(previous["adminAccount"])
+            admin_cache.delete(admin.adminAccount)
+            changes.record("admins", "update", previous["_id"], update_data["$set"])
         except Exception as e:
             raise ValueError(f"Failed to update admin: {str(e)}")
 
     def delete_admin_by_name(self, name: str) -> None:
         """Delete admin by name using PyMongo"""
         try:
-            result = self.collection.delete_one({"adminName": name})
-            if result.deleted_count == 0:
+            deleted = self.collection.find_one_and_delete(
+                {"adminName": name},
+                projection={"adminAccount": 1}
+            )
+            if deleted is None:
                 raise ValueError(f"No admin found with name: {name}")
+            admin_cache.delete(deleted["adminAccount"])
+            changes.record("admins", "delete", deleted["_id"])
         except Exception as e:
             raise ValueError(f"Failed to delete admin: {str(e)}")
 
-    def find_admin_by_name(self, name: str) -> list:
-        """Find admin by name using PyMongo"""
+    def find_admin_by_name(self, name: str, limit: int = search.DEFAULT_LIMIT) -> list:
+        """Search admins by name prefix/substring using the indexed search fields"""
         try:
-            admins = list(
-                self.collection.find({"adminName": {"$regex": name, "$options": "i"}})
-            )
-            return admins
+            return search.search(self.collection, "adminName", name, limit)
         except Exception as e:
             raise ValueError(f"Failed to find admin by name: {str(e)}")
 
     def find_admin_by_account(self, account: str) -> Admin:
-        """Find admin by account using PyMongo"""
+        """Find admin by account, served from the TTL cache when possible"""
+        admin = admin_cache.get(account)
+        if admin is not None:
+            return admin
+
         admin_data = self.collection.find_one({"adminAccount": account})
         if admin_data is None:
             raise ValueError(f"No admin found with account: {account}")
                 
-        return Admin(
-                adminAccount=admin_data["adminAccount"],
-                adminName=admin_data["adminName"],
-                adminPassword=admin_data["adminPassword"],
-                salt=admin_data["salt"]
+        admin = Admin.from_doc(admin_data)
+        admin_cache.set(account, admin)
+        return admin
+
+    def update_admin_password(self, account: str, password_hash: str, salt: str) -> None:
+        """Replace the stored password hash for an account"""
+        try:
+            previous = self.collection.find_one_and_update(
+                {"adminAccount": account},
+                {"$set": {"adminPassword": password_hash, "salt": salt}},
+                projection={"adminAccount": 1, "adminName": 1}
             )
+            if previous is None:
+                raise ValueError(f"No admin found with account: {account}")
+            admin_cache.delete(account)
+            changes.record("admins", "update", previous["_id"], previous)
+        except Exception as e:
+            raise ValueError(f"Failed to update admin password: {str(e)}")
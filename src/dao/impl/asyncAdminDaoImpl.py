@@ -0,0 +1,103 @@
+from po.admin import Admin
+from util.asyncdb import AsyncDBUtil
+from util.querystats import track_dao
+from util import search, changes
+from util.passwords import HashPoolBusy, hash_pool
+from dao.impl.adminDaoImpl import admin_cache
+from pymongo import ReturnDocument
+
+
+@track_dao
+class AsyncAdminDaoImpl:
+    """AdminDaoImpl 的异步版本，供 ASGI 入口使用，与同步版本共用管理员缓存"""
+
+    def __init__(self):
+        self.collection = AsyncDBUtil.collection("admins")
+
+    async def insert_admin(self, admin: Admin) -> None:
+        try:
+            hashed, salt = await hash_pool.hash_async(admin.adminPassword)
+            admin_data = {
+                "adminAccount": admin.adminAccount,
+                "adminName": admin.adminName,
+                "adminPassword": hashed,
+                "salt": salt,
+                **search.search_fields("adminName", admin.adminName)
+            }
+            await self.collection.insert_one(admin_data)
+            changes.record("admins", "insert", admin_data["_id"], admin_data)
+        except HashPoolBusy:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to insert admin: {str(e)}")
+
+    async def update_admin_by_name(self, name: str, admin: Admin) -> None:
+        try:
+            update_data = {
+                "$set": {
+                    "adminAccount": admin.adminAccount,
+                    "adminName": admin.adminName,
+                    "adminPassword": admin.adminPassword,
+                    "salt": admin.salt,
+                    **search.search_fields("adminName", admin.adminName)
+                }
+            }
+            previous = await self.collection.find_one_and_update(
+                {"adminName": name},
+                update_data,
+                projection={"adminAccount": 1},
+                return_document=ReturnDocument.BEFORE
+            )
+            if previous is None:
+                raise ValueError(f"No admin found with name: {name}")
+            admin_cache.delete(previous["adminAccount"])
+            admin_cache.delete(admin.adminAccount)
+            changes.record("admins", "update", previous["_id"], update_data["$set"])
+        except Exception as e:
+            raise ValueError(f"Failed to update admin: {str(e)}")
+
+    async def delete_admin_by_name(self, name: str) -> None:
+        try:
+            deleted = await self.collection.find_one_and_delete(
+                {"adminName": name},
+                projection={"adminAccount": 1}
+            )
+            if deleted is None:
+                raise ValueError(f"No admin found with name: {name}")
+            admin_cache.delete(deleted["adminAccount"])
+            changes.record("admins", "delete", deleted["_id"])
+        except Exception as e:
+            raise ValueError(f"Failed to delete admin: {str(e)}")
+
+    async def find_admin_by_name(self, name: str, limit: int = search.DEFAULT_LIMIT) -> list:
+        try:
+            return await search.search_async(self.collection, "adminName", name, limit)
+        except Exception as e:
+            raise ValueError(f"Failed to find admin by name: {str(e)}")
+
+    async def find_admin_by_account(self, account: str) -> Admin:
+        admin = admin_cache.get(account)
+        if admin is not None:
+            return admin
+
+        admin_data = await self.collection.find_one({"adminAccount": account})
+        if admin_data is None:
+            raise ValueError(f"No admin found with account: {account}")
+
+        admin = Admin.from_doc(admin_data)
+        admin_cache.set(account, admin)
+        return admin
+
+    async def update_admin_password(self, account: str, password_hash: str, salt: str) -> None:
+        try:
+            previous = await self.collection.find_one_and_update(
+                {"adminAccount": account},
+                {"$set": {"adminPassword": password_hash, "salt": salt}},
+                projection={"adminAccount": 1, "adminName": 1}
+            )
+            if previous is None:
+                raise ValueError(f"No admin found with account: {account}")
+            admin_cache.delete(account)
+            changes.record("admins", "update", previous["_id"], previous)
+        except Exception as e:
+            raise ValueError(f"Failed to update admin password: {str(e)}")
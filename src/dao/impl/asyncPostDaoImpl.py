@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime
+from po.post import Post
+from util.asyncdb import AsyncDBUtil
+from util.querystats import track_dao
+from util import search, changes, stats
+from dao.impl.postDaoImpl import (POST_PROJECTION, CHANGE_PROJECTION, ID_PROJECTION, TIMELINE_SORT, PostDaoImpl,
+                                  post_index, post_index_enabled, post_index_ready, SearchIndexWarming,
+                                  start_search_index_build, _index_add, _index_remove, _index_text, _page_query,
+                                  _split_page, _shape, _touched)
+
+
+def _update_index(added: list = (), removed: list = ()):
+    for post_data in added:
+        _index_add(post_data["_id"], _index_text(post_data))
+    for post_id in removed:
+        _index_remove(post_id)
+
+
+async def _update_index_async(added: list = (), removed: list = ()):
+    """在线程池中更新倒排索引：切词和等待索引的锁都不占用事件循环"""
+    if post_index_enabled.is_set() and (added or removed):
+        await asyncio.to_thread(_update_index, added, removed)
+
+
+@track_dao
+class AsyncPostDaoImpl:
+    """PostDaoImpl 的异步版本，供 ASGI 入口使用
+
+    只实现异步接口需要的方法。倒排索引与同步版本是同一个进程内对象，
+    写操作同样增量更新索引。
+    """
+
+    def __init__(self):
+        self.collection = AsyncDBUtil.collection("posts")
+
+    async def insert_post(self, post: Post):
+        try:
+            post_data = {
+                "user_id": post.user_id,
+                "title": post.title,
+                "content": post.content,
+                "date": post.date,
+                **search.search_fields("title", post.title),
+                **_touched()
+            }
+            result = await self.collection.insert_one(post_data)
+            await _update_index_async(added=[post_data])
+            changes.record("posts", "insert", result.inserted_id, post_data)
+            await stats.apply_ops_async(stats.post_ops(added=[post_data]))
+        except Exception as e:
+            raise Exception(f"Failed to insert post: {str(e)}")
+
+    async def find_post_by_userId(self, user_id: str) -> Post:
+        try:
+            post_data = await self.collection.find_one({"user_id": user_id})
+            if not post_data:
+                raise ValueError(f"No post found for user_id: {user_id}")
+            return Post.from_doc(post_data)
+        except Exception as e:
+            raise Exception(f"Failed to find post by user_id: {str(e)}")
+
+    async def find_post_by_title(self, title: str, limit: int = search.DEFAULT_LIMIT, shape: str = "object") -> list:
+        try:
+            return _shape(await search.search_async(self.collection, "title", title, limit, POST_PROJECTION), shape)
+        except Exception as e:
+            raise Exception(f"Failed to find posts by title: {str(e)}")
+
+    async def update_post_by_userId(self, user_id: str, **kwargs):
+        try:
+            valid_fields = ['title', 'content', 'date']
+            update_data = {k: v for k, v in kwargs.items() if k in valid_fields}
+
+            if not update_data:
+                raise ValueError("No valid fields provided for update")
+            if "title" in update_data:
+                update_data.update(search.search_fields("title", update_data["title"]))
+            update_data.update(_touched())
+            previous = []
+            if "date" in update_data:
+                previous = await self.collection.find({"user_id": user_id}, {"user_id": 1, "date": 1}).to_list()
+
+            result = await self.collection.update_many({"user_id": user_id}, {"$set": update_data})
+            if result.matched_count == 0:
+                raise ValueError(f"No post found for user_id: {user_id}")
+            indexing = post_index_enabled.is_set() and ("title" in update_data or "content" in update_data)
+            if indexing or changes.recording():
+                updated = await self.collection.find({"user_id": user_id}, CHANGE_PROJECTION).to_list()
+                if indexing:
+                    await _update_index_async(added=updated)
+                for post_data in updated:
+                    changes.record("posts", "update", post_data["_id"], post_data)
+            if previous:
+                await stats.apply_ops_async(stats.post_ops(
+                    added=[{**post, "date": update_data["date"]} for post in previous], removed=previous))
+        except Exception as e:
+            raise Exception(f"Failed to update post by user_id: {str(e)}")
+
+    async def delete_post_by_userId(self, user_id: str):
+        try:
+            deleted = await self.collection.find({"user_id": user_id}, {"user_id": 1, "date": 1}).to_list()
+            result = await self.collection.delete_many({"user_id": user_id})
+            if result.deleted_count == 0:
+                raise ValueError(f"No post found for user_id: {user_id}")
+            await _update_index_async(removed=[post_data["_id"] for post_data in deleted])
+            for post_data in deleted:
+                changes.record("posts", "delete", post_data["_id"])
+            await stats.apply_ops_async(stats.post_ops(removed=deleted))
+        except Exception as e:
+            raise Exception(f"Failed to delete post by user_id: {str(e)}")
+
+    async def find_posts_page(self, limit: int = 50, after: str = None, expand_author: bool = False,
+                              since: datetime = None, until: datetime = None, ids_only: bool = False) -> tuple:
+        """与 PostDaoImpl.find_posts_page 相同的游标分页和作者关联"""
+        try:
+            query = _page_query(after, since, until)
+            if expand_author and not ids_only:
+                cursor = await self.collection.aggregate(PostDaoImpl._author_pipeline(query, limit + 1))
+            else:
+                projection = ID_PROJECTION if ids_only else POST_PROJECTION
+                cursor = self.collection.find(query, projection).sort(TIMELINE_SORT).limit(limit + 1)
+            return _split_page(await cursor.to_list(), limit)
+        except Exception as e:
+            raise Exception(f"Failed to find posts page: {str(e)}")
+
+    async def find_posts_by_user(self, user_id: str, limit: int = 50, before: str = None, since: datetime = None,
+                                 until: datetime = None, ids_only: bool = False) -> tuple:
+        """与 PostDaoImpl.find_posts_by_user 相同，使用 (user_id, date, _id) 复合索引"""
+        try:
+            query = {"user_id": user_id, **_page_query(before, since, until)}
+            projection = ID_PROJECTION if ids_only else POST_PROJECTION
+            posts = await self.collection.find(query, projection).sort(TIMELINE_SORT).limit(limit + 1).to_list()
+            return _split_page(posts, limit)
+        except Exception as e:
+            raise Exception(f"Failed to find posts by user: {str(e)}")
+
+    async def count_posts(self, estimated: bool = True) -> int:
+        try:
+            if estimated:
+                return await self.collection.estimated_document_count()
+            return await self.collection.count_documents({})
+        except Exception as e:
+            raise Exception(f"Failed to count posts: {str(e)}")
+
+    async def search_posts(self, query: str, limit: int = 20, offset: int = 0) -> tuple:
+        """全文检索标题和内容，按 BM25 得分排序；索引尚未建立完成时抛出 SearchIndexWarming"""
+        try:
+            if not post_index_ready.is_set():
+                start_search_index_build()
+                raise SearchIndexWarming("全文检索索引正在建立，请稍后再试")
+            ranked, total = post_index.search(query, limit, offset)
+            if not ranked:
+                return [], total
+            docs = {doc["_id"]: doc async for doc in self.collection.find(
+                {"_id": {"$in": [post_id for post_id, _ in ranked]}}, POST_PROJECTION)}
+            posts = []
+            for post_id, score in ranked:
+                doc = docs.get(post_id)
+                if doc is not None:
+                    doc["score"] = round(score, 4)
+                    posts.append(doc)
+            return posts, total
+        except SearchIndexWarming:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to search posts: {str(e)}")
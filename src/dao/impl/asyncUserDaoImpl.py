@@ -0,0 +1,144 @@
+from po.user import User
+from util.asyncdb import AsyncDBUtil
+from util.querystats import track_dao
+from util.pagination import encode_cursor, decode_cursor
+from util.passwords import HashPoolBusy, hash_pool
+from util.cache import MISSING
+from util import search, changes, stats
+from dao.impl.userDaoImpl import (LIST_PROJECTION, CACHE_PROJECTION, CACHE_KEYS, USER_CACHE_NEGATIVE_TTL,
+                                  UserDaoImpl, user_cache, _invalidate)
+from pymongo import ReturnDocument
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+@track_dao
+class AsyncUserDaoImpl:
+    """UserDaoImpl 的异步版本，供 ASGI 入口使用
+
+    只实现异步接口需要的方法；投影、搜索字段和缓存(包括失效)与同步版本共用，
+    两种入口写入的数据和缓存键完全一致。
+    """
+
+    def __init__(self):
+        self.collection = AsyncDBUtil.collection("users")
+
+    async def find_users_page(self, limit: int = 50, after: str = None) -> tuple:
+        try:
+            query = {}
+            if after:
+                query["_id"] = {"$gt": decode_cursor(after)["id"]}
+            users = await self.collection.find(query, LIST_PROJECTION).sort("_id", 1).limit(limit + 1).to_list()
+            next_cursor = None
+            if len(users) > limit:
+                users = users[:limit]
+                next_cursor = encode_cursor(users[-1]["_id"])
+            return users, next_cursor
+        except Exception as e:
+            raise ValueError(f"Failed to find users page: {str(e)}")
+
+    async def find_users_by_ids(self, ids: list) -> dict:
+        try:
+            object_ids = []
+            for user_id in ids:
+                try:
+                    object_ids.append(ObjectId(user_id))
+                except (InvalidId, TypeError):
+                    continue
+            if not object_ids:
+                return {}
+            users = self.collection.find({"_id": {"$in": object_ids}}, LIST_PROJECTION)
+            return {str(user["_id"]): user async for user in users}
+        except Exception as e:
+            raise ValueError(f"Failed to find users by ids: {str(e)}")
+
+    async def count_users(self, estimated: bool = True) -> int:
+        try:
+            if estimated:
+                return await self.collection.estimated_document_count()
+            return await self.collection.count_documents({})
+        except Exception as e:
+            raise ValueError(f"Failed to count users: {str(e)}")
+
+    async def find_user_by_name(self, name: str, limit: int = search.DEFAULT_LIMIT) -> list:
+        try:
+            return await search.search_async(self.collection, "nickname", name, limit, LIST_PROJECTION)
+        except Exception as e:
+            raise ValueError(f"Failed to find user by name: {str(e)}")
+
+    async def insert_user(self, user: User):
+        try:
+            hashed_password, salt = await hash_pool.hash_async(user.password)
+
+            user_data = {
+                "nickname": user.nickname,
+                "phone_number": user.phone_number,
+                "email": user.email,
+                "password": hashed_password,
+                "salt": salt,
+                **search.search_fields("nickname", user.nickname)
+            }
+            await self.collection.insert_one(user_data)
+            _invalidate(user_data)
+            changes.record("users", "insert", user_data["_id"], user_data)
+            await stats.apply_ops_async(stats.user_ops(1))
+        except HashPoolBusy:
+            raise
+        except Exception as e:
+            raise ValueError(f"Failed to insert user: {str(e)}")
+
+    async def update_user_by_nickname(self, nickname: str, **kwargs):
+        try:
+            previous = await self.collection.find_one_and_update(
+                {"nickname": nickname}, UserDaoImpl._update_doc(kwargs),
+                projection=CACHE_PROJECTION, return_document=ReturnDocument.BEFORE)
+            if previous is None:
+                raise ValueError(f"No user found with nickname: {nickname}")
+            _invalidate(previous, kwargs)
+            changes.record("users", "update", previous["_id"], {**previous, **kwargs})
+        except Exception as e:
+            raise ValueError(f"Failed to update user by nickname: {str(e)}")
+
+    async def delete_user_by_number(self, number: int):
+        try:
+            deleted = await self.collection.find_one_and_delete({"phone_number": number},
+                                                                projection=CACHE_PROJECTION)
+            if deleted is None:
+                raise ValueError(f"No user found with phone number: {number}")
+            _invalidate(deleted)
+            changes.record("users", "delete", deleted["_id"])
+            await stats.apply_ops_async(stats.user_ops(-1))
+        except Exception as e:
+            raise ValueError(f"Failed to delete user: {str(e)}")
+
+    async def _find_cached(self, field: str, value) -> dict:
+        """与 UserDaoImpl._find_cached 相同，未命中时异步查询"""
+        user_data = user_cache.get((field, value), MISSING)
+        if user_data is not MISSING:
+            return user_data
+        user_data = await self.collection.find_one({field: value}, CACHE_PROJECTION)
+        if user_data is None:
+            user_cache.set((field, value), None, ttl=USER_CACHE_NEGATIVE_TTL)
+        else:
+            for key in CACHE_KEYS:
+                user_cache.set((key, user_data[key]), user_data)
+            user_cache.set(("_id", str(user_data["_id"])), [(key, user_data[key]) for key in CACHE_KEYS])
+        return user_data
+
+    async def find_user_by_number(self, number: int) -> User:
+        try:
+            user_data = await self._find_cached("phone_number", number)
+            if not user_data:
+                raise ValueError(f"No user found with phone number: {number}")
+            return User.from_doc(user_data)
+        except Exception as e:
+            raise ValueError(f"Failed to find user by phone number: {str(e)}")
+
+    async def find_user_by_email(self, email: str) -> User:
+        try:
+            user_data = await self._find_cached("email", email)
+            if not user_data:
+                raise ValueError(f"No user found with email: {email}")
+            return User.from_doc(user_data)
+        except Exception as e:
+            raise ValueError(f"Failed to find user by email: {str(e)}")
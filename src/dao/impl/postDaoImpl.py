@@ -1,16 +1,203 @@
 from dao.postDao import PostDao
-from po.post import Post
+from po.post import Post, PostRow
 from util.dbutil import DBUtil
-from datetime import datetime
+from util.querystats import track_dao
+from util.pagination import encode_cursor, decode_cursor, parse_date, DEFAULT_PER_USER
+from util.export import write_export
+from util import search, changes, stats
+from util.jsonstream import iter_json_array
+from util.invertedindex import InvertedIndex
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta, timezone
+from bson.errors import InvalidId
 import csv
-import json
+import logging
+import os
+import threading
+import time
 from bson import ObjectId
 
+logger = logging.getLogger("post_index")
+
+# 导出的字段
+EXPORT_FIELDS = ['_id', 'user_id', 'title', 'content', 'date']
+# 查询结果中不返回派生的搜索字段和修改时间
+POST_PROJECTION = {**search.search_projection("title"), "updated_at": 0}
+# 列表查询的返回形式：object 为 Post，row 为只读的 PostRow，dict 为原始文档(最省开销)
+POST_SHAPES = {"object": Post.from_doc, "row": PostRow.from_doc, "dict": None}
+# expand=author 时附带的作者字段
+AUTHOR_PROJECTION = {"nickname": 1, "phone_number": 1, "email": 1}
+
+# 批量导入参数
+IMPORT_BATCH_SIZE = 1000
+# 汇总中最多保留的逐行错误数
+MAX_REPORTED_ERRORS = 100
+
+# 标题和内容的进程内倒排索引，首次全文检索时建立，此后随写操作增量更新
+post_index = InvertedIndex()
+# 置位后写操作才同步更新倒排索引
+post_index_enabled = threading.Event()
+# 索引建立完成、可以检索后置位
+post_index_ready = threading.Event()
+_build_lock = threading.Lock()
+_build_thread = None
+# 同一时间只进行一次建立；建立期间的写操作记在 _pending_writes 中，建立完成后重放到新索引
+_rebuild_lock = threading.Lock()
+_index_writes_lock = threading.Lock()
+_pending_writes = None
+# 倒排索引快照(JSON)路径，重启时从快照恢复而不是全量重建；应放在只有本应用可写的目录，
+# 未设置时不保存快照，每次启动全量建立索引
+POST_INDEX_PATH = os.environ.get("POST_INDEX_PATH") or None
+# 快照记录的同步时间往前留出的余量(秒)，覆盖其他进程的变更送达本进程的延迟和主机间的时钟偏差
+POST_INDEX_SYNC_MARGIN = 60
+# 检索时只需要的字段
+INDEX_PROJECTION = {"title": 1, "content": 1}
+# ids_only 时只取索引中的字段，(user_id, date, _id) 和 (date, _id) 索引都能覆盖，不读取文档
+ID_PROJECTION = {"_id": 1, "date": 1}
+# 时间线的排序，与两个索引的顺序一致
+TIMELINE_SORT = [("date", -1), ("_id", -1)]
+# 更新后重新读取、写入变更事件的字段
+CHANGE_PROJECTION = {"user_id": 1, "title": 1, "content": 1, "date": 1}
+
+
+def _shape(docs, shape: str) -> list:
+    if shape not in POST_SHAPES:
+        raise ValueError(f"Unsupported shape: {shape}")
+    factory = POST_SHAPES[shape]
+    return list(docs) if factory is None else list(map(factory, docs))
+
+
+def _index_text(post_data: dict) -> str:
+    return f"{post_data.get('title', '')} {post_data.get('content', '')}"
+
+
+def _touched() -> dict:
+    """写入帖子时记录的修改时间，从快照恢复倒排索引时据此找出快照之后修改过的帖子"""
+    return {"updated_at": datetime.now(timezone.utc)}
+
+
+def _index_add(post_id, text: str):
+    """写操作同步到倒排索引；正在建立索引时同时记下，建立完成后重放到新索引上"""
+    if not post_index_enabled.is_set():
+        return
+    with _index_writes_lock:
+        post_index.add(post_id, text)
+        if _pending_writes is not None:
+            _pending_writes.append((post_id, text))
+
+
+def _index_remove(post_id):
+    if not post_index_enabled.is_set():
+        return
+    with _index_writes_lock:
+        post_index.remove(post_id)
+        if _pending_writes is not None:
+            _pending_writes.append((post_id, None))
+
+
+def _on_change(event):
+    """其他进程的写操作同步到本进程的倒排索引(本进程的写操作已经更新过，重复更新结果相同)"""
+    if not post_index_enabled.is_set():
+        return
+    post_id = ObjectId(event["id"])
+    if event["op"] == "delete":
+        _index_remove(post_id)
+    elif event["doc"] is not None:
+        _index_add(post_id, _index_text(event["doc"]))
+
+
+def _on_reset():
+    """监听中断后可能漏掉了其他进程的写操作，已建立的索引从数据库全量重建(期间全文检索返回503)"""
+    if post_index_ready.is_set():
+        post_index_ready.clear()
+        start_search_index_build(use_snapshot=False)
+
+
+changes.hub.add_listener("posts", _on_change)
+changes.hub.add_reset_listener(_on_reset)
+
+
+def _page_query(after: str = None, since: datetime = None, until: datetime = None) -> dict:
+    """游标之后的帖子：(date, _id) 都小于游标的记录，可限定发布时间在 [since, until) 内
+
+    游标的日期同时作为 date 的上界，使索引扫描范围从游标处开始。
+    """
+    query = {}
+    date_range = {}
+    if since is not None:
+        date_range["$gte"] = since
+    if until is not None:
+        date_range["$lt"] = until
+    if after:
+        cursor = decode_cursor(after)
+        if cursor["date"] is None:
+            raise ValueError(f"Invalid cursor: {after}")
+        date_range["$lte"] = cursor["date"]
+        query["$or"] = [
+            {"date": {"$lt": cursor["date"]}},
+            {"date": cursor["date"], "_id": {"$lt": cursor["id"]}},
+        ]
+    if date_range:
+        query["date"] = date_range
+    return query
+
+
+def _split_page(posts: list, limit: int) -> tuple:
+    """多取的一条用于判断是否还有下一页，返回 (本页, 下一页游标)"""
+    if len(posts) <= limit:
+        return posts, None
+    posts = posts[:limit]
+    return posts, encode_cursor(posts[-1]["_id"], posts[-1]["date"])
+
+
+class SearchIndexWarming(Exception):
+    """倒排索引正在后台建立，暂时不能全文检索"""
+
+
+def start_search_index_build(use_snapshot: bool = True) -> bool:
+    """在后台线程中建立倒排索引；已经建立或正在建立时返回 False"""
+    global _build_thread
+    with _build_lock:
+        if post_index_ready.is_set() or (_build_thread is not None and _build_thread.is_alive()):
+            return False
+        _build_thread = threading.Thread(target=_build_search_index, args=(use_snapshot,), name="post-index-build",
+                                         daemon=True)
+        _build_thread.start()
+        return True
+
+
+def _build_search_index(use_snapshot: bool):
+    try:
+        count = PostDaoImpl().build_search_index(use_snapshot)
+        logger.info("Post search index ready: %d posts", count)
+    except Exception as e:
+        # 下一次全文检索会重新启动建立
+        logger.warning("Failed to build post search index: %r", e)
+
+
+def _decode_post_id(value: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise ValueError(f"Invalid post id: {value!r}")
+
+
+def save_post_index(path: str = POST_INDEX_PATH) -> bool:
+    """保存倒排索引快照；未配置路径或索引尚未建立完成时不保存"""
+    if not path or not post_index_ready.is_set():
+        return False
+    with post_index.lock:
+        ids = post_index.doc_ids()
+        synced_at = datetime.now(timezone.utc) - timedelta(seconds=POST_INDEX_SYNC_MARGIN)
+        post_index.save(path, {"synced_at": synced_at.isoformat(), "count": len(ids)})
+    return True
+
+@track_dao
 class PostDaoImpl(PostDao):
     def __init__(self):
         """Initialize the PostDaoImpl with a MongoDB connection"""
         self.db = DBUtil.connect()
-        self.collection = self.db["posts"]
+        self.collection = DBUtil.collection("posts")
 
     def insert_post(self, post: Post):
         try:
@@ -18,9 +205,14 @@ class PostDaoImpl(PostDao):
                 "user_id": post.user_id,
                 "title": post.title,
                 "content": post.content,
-                "date": post.date
+                "date": post.date,
+                **search.search_fields("title", post.title),
+                **_touched()
             }
-            self.collection.insert_one(post_data)
+            result = self.collection.insert_one(post_data)
+            _index_add(result.inserted_id, _index_text(post_data))
+            changes.record("posts", "insert", result.inserted_id, post_data)
+            stats.apply_ops(stats.post_ops(added=[post_data]))
         except Exception as e:
             raise Exception(f"Failed to insert post: {str(e)}")
     
@@ -30,29 +222,13 @@ class PostDaoImpl(PostDao):
             if not post_data:
                 raise ValueError(f"No post found for user_id: {user_id}")
             
-            return Post(
-                user_id=post_data["user_id"],
-                title=post_data["title"],
-                content=post_data["content"],
-                date=post_data["date"]
-            )
+            return Post.from_doc(post_data)
         except Exception as e:
             raise Exception(f"Failed to find post by user_id: {str(e)}")
     
-    def find_post_by_title(self, title: str) -> list:
+    def find_post_by_title(self, title: str, limit: int = search.DEFAULT_LIMIT, shape: str = "object") -> list:
         try:
-            posts_data = list(self.collection.find(
-                {"title": {"$regex": title, "$options": "i"}}
-            ))
-            posts = []
-            for post_data in posts_data:
-                posts.append(Post(
-                    user_id=post_data["user_id"],
-                    title=post_data["title"],
-                    content=post_data["content"],
-                    date=post_data["date"]
-                ))
-            return posts
+            return _shape(search.search(self.collection, "title", title, limit, POST_PROJECTION), shape)
         except Exception as e:
             raise Exception(f"Failed to find posts by title: {str(e)}")
     
@@ -63,6 +239,13 @@ class PostDaoImpl(PostDao):
             
             if not update_data:
                 raise ValueError("No valid fields provided for update")
+            if "title" in update_data:
+                update_data.update(search.search_fields("title", update_data["title"]))
+            update_data.update(_touched())
+            # 修改日期时先取出旧日期，把这些帖子从原来那天的计数移到新的日期
+            previous = []
+            if "date" in update_data:
+                previous = list(self.collection.find({"user_id": user_id}, {"user_id": 1, "date": 1}))
             
             result = self.collection.update_many(
                 {"user_id": user_id},
@@ -70,37 +253,42 @@ class PostDaoImpl(PostDao):
             )
             if result.matched_count == 0:
                 raise ValueError(f"No post found for user_id: {user_id}")
+            indexing = post_index_enabled.is_set() and ("title" in update_data or "content" in update_data)
+            if indexing or changes.recording():
+                for post_data in self.collection.find({"user_id": user_id}, CHANGE_PROJECTION):
+                    if indexing:
+                        _index_add(post_data["_id"], _index_text(post_data))
+                    changes.record("posts", "update", post_data["_id"], post_data)
+            if previous:
+                stats.apply_ops(stats.post_ops(added=[{**post, "date": update_data["date"]} for post in previous],
+                                               removed=previous))
         except Exception as e:
             raise Exception(f"Failed to update post by user_id: {str(e)}")
     
     def delete_post_by_userId(self, user_id: str):
         try:
+            # 先取出要删除的帖子，用于更新倒排索引、变更日志和按日期的计数
+            deleted = list(self.collection.find({"user_id": user_id}, {"user_id": 1, "date": 1}))
             result = self.collection.delete_many({"user_id": user_id})
             if result.deleted_count == 0:
                 raise ValueError(f"No post found for user_id: {user_id}")
+            for post_data in deleted:
+                _index_remove(post_data["_id"])
+                changes.record("posts", "delete", post_data["_id"])
+            stats.apply_ops(stats.post_ops(removed=deleted))
         except Exception as e:
             raise Exception(f"Failed to delete post by user_id: {str(e)}")
 
+    def export_cursor(self, batch_size: int = 1000):
+        projection = {field: 1 for field in EXPORT_FIELDS}
+        return self.collection.find({}, projection).sort("_id", 1).batch_size(batch_size)
+
     def export_to_csv(self, file_path: str) -> bool:
         """导出帖子数据到CSV文件"""
         try:
-            posts = list(self.collection.find())
-            if not posts:
+            if self.collection.find_one({}, {"_id": 1}) is None:
                 return False
-                
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['_id', 'user_id', 'title', 'content', 'date']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for post in posts:
-                    writer.writerow({
-                        '_id': str(post['_id']),
-                        'user_id': post['user_id'],
-                        'title': post['title'],
-                        'content': post['content'],
-                        'date': post['date'].isoformat() if post['date'] else ''
-                    })
+            write_export(file_path, self.export_cursor(), "csv", EXPORT_FIELDS)
             return True
         except Exception as e:
             raise Exception(f"Failed to export to CSV: {str(e)}")
@@ -109,15 +297,7 @@ class PostDaoImpl(PostDao):
         """从CSV文件导入帖子数据"""
         try:
             with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    post = Post(
-                        user_id=row['user_id'],
-                        title=row['title'],
-                        content=row['content'],
-                        date=datetime.fromisoformat(row['date']) if row['date'] else datetime.now()
-                    )
-                    self.insert_post(post)
+                self.import_posts(csv.DictReader(csvfile))
             return True
         except Exception as e:
             raise Exception(f"Failed to import from CSV: {str(e)}")
@@ -125,18 +305,9 @@ class PostDaoImpl(PostDao):
     def export_to_json(self, file_path: str) -> bool:
         """导出帖子数据到JSON文件"""
         try:
-            posts = list(self.collection.find())
-            if not posts:
+            if self.collection.find_one({}, {"_id": 1}) is None:
                 return False
-                
-            # 转换ObjectId为字符串并处理日期
-            for post in posts:
-                post['_id'] = str(post['_id'])
-                if 'date' in post and post['date']:
-                    post['date'] = post['date'].isoformat()
-                
-            with open(file_path, 'w', encoding='utf-8') as jsonfile:
-                json.dump(posts, jsonfile, indent=4, ensure_ascii=False)
+            write_export(file_path, self.export_cursor(), "json", EXPORT_FIELDS)
             return True
         except Exception as e:
             raise Exception(f"Failed to export to JSON: {str(e)}")
@@ -144,36 +315,284 @@ class PostDaoImpl(PostDao):
     def import_from_json(self, file_path: str) -> bool:
         """从JSON文件导入帖子数据"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as jsonfile:
-                posts = json.load(jsonfile)
-                for post_data in posts:
-                    post = Post(
-                        user_id=post_data['user_id'],
-                        title=post_data['title'],
-                        content=post_data['content'],
-                        date=datetime.fromisoformat(post_data['date']) if post_data.get('date') else datetime.now()
-                    )
-                    self.insert_post(post)
+            with open(file_path, 'rb') as jsonfile:
+                self.import_posts(iter_json_array(jsonfile))
             return True
         except Exception as e:
             raise Exception(f"Failed to import from JSON: {str(e)}")
 
-    def find_all_posts(self) -> list:
+    def import_posts(self, records, batch_size: int = IMPORT_BATCH_SIZE, validate_users: bool = False,
+                     progress=None) -> dict:
+        """按批读取、转换并用 insert_many 写入帖子"""
+        summary = {"rows": 0, "inserted": 0, "failed": 0, "errors": []}
+        started = time.perf_counter()
+        batch = []
+        for row, record in enumerate(records):
+            summary["rows"] += 1
+            batch.append((row, record))
+            if len(batch) >= batch_size:
+                self._import_post_batch(batch, validate_users, summary)
+                batch = []
+                if progress is not None:
+                    progress(summary["rows"], summary["failed"])
+        if batch:
+            self._import_post_batch(batch, validate_users, summary)
+        if progress is not None:
+            progress(summary["rows"], summary["failed"])
+
+        elapsed = time.perf_counter() - started
+        summary["seconds"] = round(elapsed, 3)
+        summary["rows_per_second"] = round(summary["rows"] / elapsed, 1) if elapsed > 0 else 0.0
+        return summary
+
+    def _import_post_batch(self, batch: list, validate_users: bool, summary: dict):
+        # 同一批内相同的日期字符串只解析一次，缺省日期统一取本批的当前时间
+        now = datetime.now()
+        touched = _touched()
+        parsed_dates = {}
+        rows, docs = [], []
+        for row, record in batch:
+            try:
+                raw_date = record.get('date')
+                if not raw_date:
+                    date = now
+                else:
+                    # 与接口参数相同：带时区的日期转换为本地时间，和接口创建的帖子一致
+                    date = parsed_dates.get(raw_date)
+                    if date is None:
+                        date = parsed_dates[raw_date] = parse_date(raw_date)
+                docs.append({
+                    "user_id": str(record['user_id']),
+                    "title": record['title'],
+                    "content": record.get('content') or "",
+                    "date": date,
+                    **search.search_fields("title", record['title']),
+                    **touched
+                })
+                rows.append(row)
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                self._report_import_error(summary, row, f"Invalid record: {e!r}")
+
+        if validate_users and docs:
+            known = self._existing_user_ids({doc["user_id"] for doc in docs})
+            kept_rows, kept_docs = [], []
+            for row, doc in zip(rows, docs):
+                if doc["user_id"] in known:
+                    kept_rows.append(row)
+                    kept_docs.append(doc)
+                else:
+                    self._report_import_error(summary, row, f"Unknown user_id: {doc['user_id']}")
+            rows, docs = kept_rows, kept_docs
+
+        if not docs:
+            return
+        failed = set()
+        try:
+            result = self.collection.insert_many(docs, ordered=False)
+            summary["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            summary["inserted"] += e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                self._report_import_error(summary, rows[error["index"]], error.get("errmsg", "write error"))
+        inserted = [doc for i, doc in enumerate(docs) if i not in failed]
+        for doc in inserted:
+            _index_add(doc["_id"], _index_text(doc))
+            changes.record("posts", "insert", doc["_id"], doc)
+        stats.apply_ops(stats.post_ops(added=inserted))
+
+    def _existing_user_ids(self, user_ids: set) -> set:
+        """一次查询返回在 users 集合中存在的 user_id"""
+        object_ids = []
+        for user_id in user_ids:
+            try:
+                object_ids.append(ObjectId(user_id))
+            except (InvalidId, TypeError):
+                continue
+        if not object_ids:
+            return set()
+        found = DBUtil.collection("users").find({"_id": {"$in": object_ids}}, {"_id": 1})
+        return {str(doc["_id"]) for doc in found}
+
+    @staticmethod
+    def _report_import_error(summary: dict, row: int, message: str):
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"row": row, "error": message})
+
+    def find_all_posts(self, shape: str = "object") -> list:
         """获取所有帖子
         
         Returns:
-            list: 包含所有Post对象的列表
+            list: 按 shape 返回 Post 对象、PostRow 行或原始文档的列表
         """
         try:
-            posts_data = list(self.collection.find())
-            posts = []
-            for post_data in posts_data:
-                posts.append(Post(
-                    user_id=post_data["user_id"],
-                    title=post_data["title"],
-                    content=post_data["content"],
-                    date=post_data["date"]
-                ))
-            return posts
+            return _shape(self.collection.find({}, POST_PROJECTION), shape)
         except Exception as e:
             raise Exception(f"Failed to find all posts: {str(e)}")
+
+    @staticmethod
+    def _author_pipeline(query: dict, limit: int) -> list:
+        """分页后再用 $lookup 按 users._id 关联作者，只对本页的帖子做关联
+
+        user_id 保存的是用户 _id 的字符串形式，先转换为 ObjectId（格式不正确时为 null）
+        以便使用 users 的 _id 索引。
+        """
+        return [
+            {"$match": query},
+            {"$sort": {"date": -1, "_id": -1}},
+            {"$limit": limit},
+            {"$project": POST_PROJECTION},
+            {"$addFields": {"author_id": {"$convert": {
+                "input": "$user_id", "to": "objectId", "onError": None, "onNull": None}}}},
+            {"$lookup": {
+                "from": "users",
+                "localField": "author_id",
+                "foreignField": "_id",
+                "pipeline": [{"$project": AUTHOR_PROJECTION}],
+                "as": "author",
+            }},
+            {"$set": {"author": {"$first": "$author"}}},
+            {"$unset": "author_id"},
+        ]
+
+    def find_posts_page(self, limit: int = 50, after: str = None, expand_author: bool = False,
+                        since: datetime = None, until: datetime = None, ids_only: bool = False) -> tuple:
+        """按 (date, _id) 倒序的游标分页，使用 posts 上的 (date, _id) 复合索引"""
+        try:
+            query = _page_query(after, since, until)
+            if expand_author and not ids_only:
+                posts = list(self.collection.aggregate(self._author_pipeline(query, limit + 1)))
+            else:
+                projection = ID_PROJECTION if ids_only else POST_PROJECTION
+                posts = list(self.collection.find(query, projection).sort(TIMELINE_SORT).limit(limit + 1))
+            return _split_page(posts, limit)
+        except Exception as e:
+            raise Exception(f"Failed to find posts page: {str(e)}")
+
+    def find_posts_by_user(self, user_id: str, limit: int = 50, before: str = None, since: datetime = None,
+                           until: datetime = None, ids_only: bool = False) -> tuple:
+        """用户的帖子按 (date, _id) 倒序游标分页，使用 (user_id, date, _id) 复合索引，
+        每页的开销与帖子总数无关；ids_only 时为覆盖查询"""
+        try:
+            query = {"user_id": user_id, **_page_query(before, since, until)}
+            projection = ID_PROJECTION if ids_only else POST_PROJECTION
+            posts = list(self.collection.find(query, projection).sort(TIMELINE_SORT).limit(limit + 1))
+            return _split_page(posts, limit)
+        except Exception as e:
+            raise Exception(f"Failed to find posts by user: {str(e)}")
+
+    @staticmethod
+    def _user_ids_pipeline(user_ids: list, per_user: int) -> list:
+        """一次聚合取多个用户各自最新的 per_user 条帖子
+
+        $sort 与 (user_id, date, _id) 复合索引的顺序一致，由索引提供排序；
+        $group 按该顺序 $push，再用 $slice 截取每个用户的前 per_user 条。
+        """
+        return [
+            {"$match": {"user_id": {"$in": user_ids}}},
+            {"$sort": {"user_id": 1, "date": -1, "_id": -1}},
+            {"$project": POST_PROJECTION},
+            {"$group": {"_id": "$user_id", "posts": {"$push": "$$ROOT"}}},
+            {"$project": {"posts": {"$slice": ["$posts", per_user]}}},
+        ]
+
+    def find_posts_by_user_ids(self, user_ids: list, per_user: int = DEFAULT_PER_USER) -> dict:
+        try:
+            result = {user_id: [] for user_id in user_ids}
+            if not result:
+                return result
+            rows = self.collection.aggregate(self._user_ids_pipeline(list(result), per_user), allowDiskUse=True)
+            for row in rows:
+                result[row["_id"]] = row["posts"]
+            return result
+        except Exception as e:
+            raise Exception(f"Failed to find posts by user ids: {str(e)}")
+
+    def count_posts(self, estimated: bool = True) -> int:
+        try:
+            if estimated:
+                return self.collection.estimated_document_count()
+            return self.collection.count_documents({})
+        except Exception as e:
+            raise Exception(f"Failed to count posts: {str(e)}")
+
+    def build_search_index(self, use_snapshot: bool = True) -> int:
+        """建立倒排索引：优先从快照恢复并重新索引快照之后新增或修改(updated_at)的帖子，
+        快照缺失、无效或帖子数对不上(停机期间有删除)时全量重建
+
+        在新的索引上建立，不持有当前索引的锁，写操作不会等待；期间的写操作被记下，
+        建立完成后重放到新索引上，再短暂加锁替换当前索引。
+
+        Returns:
+            int: 索引中的帖子数
+        """
+        global _pending_writes
+        with _rebuild_lock:
+            # 先开始记录写操作再读取数据库，读取之后的写操作都会被重放
+            with _index_writes_lock:
+                post_index_enabled.set()
+                _pending_writes = []
+            try:
+                index = InvertedIndex(post_index.k1, post_index.b)
+                self._fill_search_index(index, use_snapshot)
+                with _index_writes_lock:
+                    for post_id, text in _pending_writes:
+                        if text is None:
+                            index.remove(post_id)
+                        else:
+                            index.add(post_id, text)
+                    post_index.replace(index)
+            finally:
+                with _index_writes_lock:
+                    _pending_writes = None
+            post_index_ready.set()
+            return len(post_index)
+
+    def _fill_search_index(self, index: InvertedIndex, use_snapshot: bool):
+        meta = None
+        if use_snapshot and POST_INDEX_PATH:
+            try:
+                meta = index.load(POST_INDEX_PATH, decode_id=_decode_post_id)
+                synced_at = datetime.fromisoformat(meta["synced_at"])
+            except (ValueError, KeyError, TypeError):
+                meta = None
+        if meta:
+            # 没有 updated_at 的帖子(直接写入数据库)按 _id 中的创建时间判断
+            query = {"$or": [{"updated_at": {"$gte": synced_at}},
+                             {"_id": {"$gte": ObjectId.from_datetime(synced_at)}}]}
+            for post_data in self.collection.find(query, INDEX_PROJECTION):
+                index.add(post_data["_id"], _index_text(post_data))
+            if len(index) != self.collection.count_documents({}):
+                meta = None
+        if not meta:
+            index.clear()
+            for post_data in self.collection.find({}, INDEX_PROJECTION).batch_size(1000):
+                index.add(post_data["_id"], _index_text(post_data))
+
+    def search_posts(self, query: str, limit: int = 20, offset: int = 0) -> tuple:
+        """全文检索标题和内容，按 BM25 得分排序
+
+        Raises:
+            SearchIndexWarming: 索引尚未建立完成(同时在后台开始建立)，不在请求中扫描全部帖子
+        """
+        try:
+            if not post_index_ready.is_set():
+                start_search_index_build()
+                raise SearchIndexWarming("全文检索索引正在建立，请稍后再试")
+            ranked, total = post_index.search(query, limit, offset)
+            if not ranked:
+                return [], total
+            docs = {doc["_id"]: doc for doc in self.collection.find(
+                {"_id": {"$in": [post_id for post_id, _ in ranked]}}, POST_PROJECTION)}
+            posts = []
+            for post_id, score in ranked:
+                doc = docs.get(post_id)
+                if doc is not None:
+                    doc["score"] = round(score, 4)
+                    posts.append(doc)
+            return posts, total
+        except SearchIndexWarming:
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to search posts: {str(e)}")
@@ -1,104 +1,226 @@
 from dao.userDao import UserDao
-from po.user import User
+from po.user import User, UserRow
 from util.dbutil import DBUtil
-import bcrypt
+from util.querystats import track_dao
+from util.pagination import encode_cursor, decode_cursor
+from util.passwords import HashPoolBusy, hash_pool, hash_passwords, import_hash_pool
+from util.jsonstream import iter_json_array
+from util.export import write_export
+from util.cache import MISSING, make_cache
+from util import search, changes, stats
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
 import csv
-import json
+import os
 from bson import ObjectId
+from bson.errors import InvalidId
 
+# 列表查询不取出密码和盐值
+LIST_PROJECTION = {"password": 0, "salt": 0, **search.search_projection("nickname")}
+# 导出的字段
+EXPORT_FIELDS = ['_id', 'nickname', 'phone_number', 'email']
+
+# 批量导入参数
+IMPORT_BATCH_SIZE = 1000
+# 批次小于该值时直接在当前进程哈希，避免启动进程池的开销
+PARALLEL_HASH_MIN = 8
+# 汇总中最多保留的逐行错误数
+MAX_REPORTED_ERRORS = 100
+DUPLICATE_KEY_ERROR = 11000
+# 导入的用户使用默认密码，需要用户后续修改
+DEFAULT_IMPORT_PASSWORD = "default_password"
+
+# 按手机号/邮箱缓存单个用户，USER_CACHE_BACKEND=local(进程内LRU) 或 shared(共享缓存替身)
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", 60))
+# 不存在的手机号/邮箱也缓存，但时间更短
+USER_CACHE_NEGATIVE_TTL = float(os.environ.get("USER_CACHE_NEGATIVE_TTL", 5))
+user_cache = make_cache(
+    os.environ.get("USER_CACHE_BACKEND", "local"),
+    namespace="users",
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", 10000)),
+    ttl=USER_CACHE_TTL,
+)
+# 缓存的字段，同时用于更新/删除时取出旧的缓存键
+CACHE_PROJECTION = {"nickname": 1, "phone_number": 1, "email": 1, "password": 1, "salt": 1}
+# 作为缓存键的字段
+CACHE_KEYS = ("phone_number", "email")
+
+
+def _invalidate(*docs):
+    """删除文档旧值和新值对应的缓存键（包括负缓存）"""
+    keys = [(field, doc[field]) for doc in docs if doc for field in CACHE_KEYS if field in doc]
+    if keys:
+        user_cache.delete(*keys)
+
+
+def _on_change(event):
+    """其他进程(或直接对数据库)的写操作：删除该用户在本进程缓存中的旧键和新键"""
+    old_keys = user_cache.pop(("_id", event["id"])) or []
+    user_cache.delete(*old_keys)
+    _invalidate(event["doc"])
+
+
+changes.hub.add_listener("users", _on_change)
+# 监听中断后可能漏掉了其他进程的修改，清空整个缓存
+changes.hub.add_reset_listener(user_cache.clear)
+
+
+@track_dao
 class UserDaoImpl(UserDao):
     def __init__(self):
         self.db = DBUtil.connect()
-        self.collection = self.db["users"]
-        self.collection.create_index("phone_number", unique=True)
-        self.collection.create_index("email", unique=True)
-        self.collection.create_index("nickname", unique=True)
+        self.collection = DBUtil.collection("users")
 
-    def find_all_user(self) -> list:
+    def find_all_user(self, shape: str = "dict") -> list:
         try:
-            return list(self.collection.find())
+            users = self.collection.find({}, LIST_PROJECTION)
+            if shape == "row":
+                return list(map(UserRow.from_doc, users))
+            if shape != "dict":
+                raise ValueError(f"Unsupported shape: {shape}")
+            return list(users)
         except Exception as e:
             raise ValueError(f"Failed to find all users: {str(e)}")
-    
-    def find_user_by_name(self, name: str) -> list:
+
+    def find_users_page(self, limit: int = 50, after: str = None) -> tuple:
         try:
-            return list(
-                self.collection.find({"nickname":  {"$regex": name, "$options": "i"}})
+            query = {}
+            if after:
+                query["_id"] = {"$gt": decode_cursor(after)["id"]}
+            users = list(
+                self.collection.find(query, LIST_PROJECTION).sort("_id", 1).limit(limit + 1)
             )
+            next_cursor = None
+            if len(users) > limit:
+                users = users[:limit]
+                next_cursor = encode_cursor(users[-1]["_id"])
+            return users, next_cursor
+        except Exception as e:
+            raise ValueError(f"Failed to find users page: {str(e)}")
+
+    def find_users_by_ids(self, ids: list) -> dict:
+        try:
+            object_ids = []
+            for user_id in ids:
+                try:
+                    object_ids.append(ObjectId(user_id))
+                except (InvalidId, TypeError):
+                    continue
+            if not object_ids:
+                return {}
+            users = self.collection.find({"_id": {"$in": object_ids}}, LIST_PROJECTION)
+            return {str(user["_id"]): user for user in users}
+        except Exception as e:
+            raise ValueError(f"Failed to find users by ids: {str(e)}")
+
+    def count_users(self, estimated: bool = True) -> int:
+        try:
+            if estimated:
+                return self.collection.estimated_document_count()
+            return self.collection.count_documents({})
+        except Exception as e:
+            raise ValueError(f"Failed to count users: {str(e)}")
+    
+    def find_user_by_name(self, name: str, limit: int = search.DEFAULT_LIMIT) -> list:
+        try:
+            return search.search(self.collection, "nickname", name, limit, LIST_PROJECTION)
         except Exception as e:
             raise ValueError(f"Failed to find user by name: {str(e)}")
     
     def insert_user(self, user: User):
         try:
-            salt = bcrypt.gensalt()
-            hashed_password = bcrypt.hashpw(user.password.encode(), salt)
+            hashed_password, salt = hash_pool.hash(user.password)
             
             user_data = {
                 "nickname": user.nickname,
                 "phone_number": user.phone_number,
                 "email": user.email,
-                "password": hashed_password.decode(),
-                "salt": salt.decode()
+                "password": hashed_password,
+                "salt": salt,
+                **search.search_fields("nickname", user.nickname)
             }
             self.collection.insert_one(user_data)
+            _invalidate(user_data)
+            changes.record("users", "insert", user_data["_id"], user_data)
+            stats.apply_ops(stats.user_ops(1))
+        except HashPoolBusy:
+            raise
         except Exception as e:
             raise ValueError(f"Failed to insert user: {str(e)}")
     
+    @staticmethod
+    def _update_doc(kwargs: dict) -> dict:
+        """构造 $set 更新，修改昵称时同步更新搜索字段"""
+        fields = dict(kwargs)
+        if "nickname" in fields:
+            fields.update(search.search_fields("nickname", fields["nickname"]))
+        return {"$set": fields}
+
     def update_user_by_number(self, number: int, **kwargs):
         try:
-            update_data = {"$set": kwargs}
-            result = self.collection.update_one(
+            update_data = self._update_doc(kwargs)
+            previous = self.collection.find_one_and_update(
                 {"phone_number": number},
-                update_data
+                update_data,
+                projection=CACHE_PROJECTION,
+                return_document=ReturnDocument.BEFORE
             )
-            if result.matched_count == 0:
+            if previous is None:
                 raise ValueError(f"No user found with phone number: {number}")
+            _invalidate(previous, kwargs)
+            changes.record("users", "update", previous["_id"], {**previous, **kwargs})
         except Exception as e:
             raise ValueError(f"Failed to update user: {str(e)}")
     
     def delete_user_by_number(self, number: int):
         try:
-            result = self.collection.delete_one({"phone_number": number})
-            if result.deleted_count == 0:
+            deleted = self.collection.find_one_and_delete({"phone_number": number}, projection=CACHE_PROJECTION)
+            if deleted is None:
                 raise ValueError(f"No user found with phone number: {number}")
+            _invalidate(deleted)
+            changes.record("users", "delete", deleted["_id"])
+            stats.apply_ops(stats.user_ops(-1))
         except Exception as e:
             raise ValueError(f"Failed to delete user: {str(e)}")
     
+    def _find_cached(self, field: str, value) -> dict:
+        """按唯一字段读取用户，先查缓存；查到的文档同时按手机号和邮箱缓存，
+        并按 _id 记下这两个键，收到其他进程的变更事件时据此删除"""
+        user_data = user_cache.get((field, value), MISSING)
+        if user_data is not MISSING:
+            return user_data
+        user_data = self.collection.find_one({field: value}, CACHE_PROJECTION)
+        if user_data is None:
+            user_cache.set((field, value), None, ttl=USER_CACHE_NEGATIVE_TTL)
+        else:
+            for key in CACHE_KEYS:
+                user_cache.set((key, user_data[key]), user_data)
+            user_cache.set(("_id", str(user_data["_id"])), [(key, user_data[key]) for key in CACHE_KEYS])
+        return user_data
+
     def find_user_by_number(self, number: int) -> User:
         try:
-            user_data = self.collection.find_one({"phone_number": number})
+            user_data = self._find_cached("phone_number", number)
             if not user_data:
                 raise ValueError(f"No user found with phone number: {number}")
                 
-            return User(
-                nickname=user_data["nickname"],
-                phone_number=user_data["phone_number"],
-                email=user_data["email"],
-                password=user_data["password"],
-                salt=user_data["salt"]
-            )
+            return User.from_doc(user_data)
         except Exception as e:
             raise ValueError(f"Failed to find user by phone number: {str(e)}")
     
     def find_user_by_email(self, email: str) -> User:
         try:
-            user_data = self.collection.find_one({"email": email})
+            user_data = self._find_cached("email", email)
             if not user_data:
                 raise ValueError(f"No user found with email: {email}")
                 
-            return User(
-                nickname=user_data["nickname"],
-                phone_number=user_data["phone_number"],
-                email=user_data["email"],
-                password=user_data["password"],
-                salt=user_data["salt"]
-            )
+            return User.from_doc(user_data)
         except Exception as e:
             raise ValueError(f"Failed to find user by email: {str(e)}")
         
     def find_id_by_number(self, number: int) -> int:
         try:
-            user_data = self.collection.find_one({"phone_number": number})
+            user_data = self._find_cached("phone_number", number)
             if not user_data:
                 raise ValueError(f"No user found with phone number: {number}")
             return user_data["_id"]
@@ -107,33 +229,27 @@ class UserDaoImpl(UserDao):
         
     def update_user_by_nickname(self, nickname: str, **kwargs):
         try:
-            update_data = {"$set": kwargs}
-            result = self.collection.update_one(
-                {"nickname": nickname},update_data)
-            if result.matched_count == 0:
+            update_data = self._update_doc(kwargs)
+            previous = self.collection.find_one_and_update(
+                {"nickname": nickname}, update_data,
+                projection=CACHE_PROJECTION, return_document=ReturnDocument.BEFORE)
+            if previous is None:
                 raise ValueError(f"No user found with nickname: {nickname}")
+            _invalidate(previous, kwargs)
+            changes.record("users", "update", previous["_id"], {**previous, **kwargs})
         except Exception as e:
             raise ValueError(f"Failed to update user by nickname: {str(e)}")
 
+    def export_cursor(self, batch_size: int = 1000):
+        projection = {field: 1 for field in EXPORT_FIELDS}
+        return self.collection.find({}, projection).sort("_id", 1).batch_size(batch_size)
+
     def export_to_csv(self, file_path: str) -> bool:
         """导出用户数据到CSV文件"""
         try:
-            users = self.find_all_user()
-            if not users:
+            if self.collection.find_one({}, {"_id": 1}) is None:
                 return False
-                
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['_id', 'nickname', 'phone_number', 'email']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for user in users:
-                    writer.writerow({
-                        '_id': str(user['_id']),
-                        'nickname': user['nickname'],
-                        'phone_number': user['phone_number'],
-                        'email': user['email']
-                    })
+            write_export(file_path, self.export_cursor(), "csv", EXPORT_FIELDS)
             return True
         except Exception as e:
             raise ValueError(f"Failed to export to CSV: {str(e)}")
@@ -142,15 +258,7 @@ class UserDaoImpl(UserDao):
         """从CSV文件导入用户数据"""
         try:
             with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    user = User(
-                        nickname=row['nickname'],
-                        phone_number=int(row['phone_number']),
-                        email=row['email'],
-                        password="default_password"  # 需要用户后续修改
-                    )
-                    self.insert_user(user)
+                self.import_users(csv.DictReader(csvfile))
             return True
         except Exception as e:
             raise ValueError(f"Failed to import from CSV: {str(e)}")
@@ -158,16 +266,9 @@ class UserDaoImpl(UserDao):
     def export_to_json(self, file_path: str) -> bool:
         """导出用户数据到JSON文件"""
         try:
-            users = self.find_all_user()
-            if not users:
+            if self.collection.find_one({}, {"_id": 1}) is None:
                 return False
-                
-            # 转换ObjectId为字符串
-            for user in users:
-                user['_id'] = str(user['_id'])
-                
-            with open(file_path, 'w', encoding='utf-8') as jsonfile:
-                json.dump(users, jsonfile, indent=4, ensure_ascii=False)
+            write_export(file_path, self.export_cursor(), "json", EXPORT_FIELDS)
             return True
         except Exception as e:
             raise ValueError(f"Failed to export to JSON: {str(e)}")
@@ -175,16 +276,73 @@ class UserDaoImpl(UserDao):
     def import_from_json(self, file_path: str) -> bool:
         """从JSON文件导入用户数据"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as jsonfile:
-                users = json.load(jsonfile)
-                for user_data in users:
-                    user = User(
-                        nickname=user_data['nickname'],
-                        phone_number=int(user_data['phone_number']),
-                        email=user_data['email'],
-                        password="default_password"  # 需要用户后续修改
-                    )
-                    self.insert_user(user)
+            with open(file_path, 'rb') as jsonfile:
+                self.import_users(iter_json_array(jsonfile))
             return True
         except Exception as e:
             raise ValueError(f"Failed to import from JSON: {str(e)}")
+
+    def import_users(self, records, batch_size: int = IMPORT_BATCH_SIZE, progress=None) -> dict:
+        """流式批量导入：逐条校验，按批在共享的导入进程池中并行哈希密码并用 insert_many(ordered=False) 写入"""
+        summary = {"inserted": 0, "skipped": 0, "failed": 0, "errors": []}
+        batch = []
+        for row, record in enumerate(records):
+            try:
+                batch.append((row, {
+                    "nickname": record['nickname'],
+                    "phone_number": int(record['phone_number']),
+                    "email": record['email'],
+                    **search.search_fields("nickname", record['nickname']),
+                }))
+            except (KeyError, TypeError, ValueError) as e:
+                self._report_import_error(summary, row, "failed", f"Invalid record: {e!r}")
+                continue
+
+            if len(batch) >= batch_size:
+                self._write_import_batch(batch, import_hash_pool.executor(), summary)
+                batch = []
+                if progress is not None:
+                    progress(row + 1, summary["failed"])
+
+        if batch:
+            executor = import_hash_pool.executor() if len(batch) >= PARALLEL_HASH_MIN else None
+            self._write_import_batch(batch, executor, summary)
+        if progress is not None:
+            progress(summary["inserted"] + summary["skipped"] + summary["failed"], summary["failed"])
+        return summary
+
+    def _write_import_batch(self, batch: list, executor, summary: dict):
+        hashes = hash_passwords([DEFAULT_IMPORT_PASSWORD] * len(batch), executor)
+        docs = []
+        for (_, doc), (hashed_password, salt) in zip(batch, hashes):
+            doc["password"] = hashed_password
+            doc["salt"] = salt
+            docs.append(doc)
+        # 清掉这些手机号/邮箱可能存在的负缓存
+        _invalidate(*docs)
+
+        failed = set()
+        try:
+            result = self.collection.insert_many(docs, ordered=False)
+            summary["inserted"] += len(result.inserted_ids)
+            stats.apply_ops(stats.user_ops(len(result.inserted_ids)))
+        except BulkWriteError as e:
+            summary["inserted"] += e.details.get("nInserted", 0)
+            stats.apply_ops(stats.user_ops(e.details.get("nInserted", 0)))
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                row = batch[error["index"]][0]
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    self._report_import_error(summary, row, "skipped", error.get("errmsg", "duplicate key"))
+                else:
+                    self._report_import_error(summary, row, "failed", error.get("errmsg", "write error"))
+        if changes.recording():
+            for i, doc in enumerate(docs):
+                if i not in failed:
+                    changes.record("users", "insert", doc["_id"], doc)
+
+    @staticmethod
+    def _report_import_error(summary: dict, row: int, status: str, message: str):
+        summary[status] += 1
+        if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+            summary["errors"].append({"row": row, "status": status, "error": message})
@@ -1,5 +1,6 @@
 from po.post import Post
 from abc import (ABC,abstractmethod)
+from datetime import datetime
 
 class PostDao(ABC):
     @abstractmethod
@@ -12,7 +13,11 @@ class PostDao(ABC):
         pass
 
     @abstractmethod
-    def find_post_by_title(self,title:str)->list:
+    def find_post_by_title(self,title:str,limit:int=20,shape:str="object")->list:
+        """按标题前缀/子串搜索帖子，结果按匹配程度排序，最多 limit 条
+
+        shape 为 object 时返回 Post，row 时返回只读的 PostRow，dict 时返回原始文档
+        """
         pass
 
     @abstractmethod
@@ -23,6 +28,15 @@ class PostDao(ABC):
     def delete_post_by_userId(self,user_id:str):
         pass
 
+    @abstractmethod
+    def export_cursor(self, batch_size: int = 1000):
+        """返回用于流式导出的游标，按批从数据库读取
+
+        Args:
+            batch_size: 每次从服务器获取的文档数
+        """
+        pass
+
     @abstractmethod
     def export_to_csv(self, file_path: str) -> bool:
         """导出帖子数据到CSV文件
@@ -72,10 +86,99 @@ class PostDao(ABC):
         pass
 
     @abstractmethod
-    def find_all_posts(self) -> list:
+    def find_all_posts(self, shape: str = "object") -> list:
         """获取所有帖子
+
+        Args:
+            shape: object 返回 Post，row 返回只读的 PostRow，dict 返回原始文档
         
         Returns:
             list: 包含所有帖子的列表
         """
         pass
+
+    @abstractmethod
+    def find_posts_page(self, limit: int = 50, after: str = None, expand_author: bool = False,
+                        since: datetime = None, until: datetime = None, ids_only: bool = False) -> tuple:
+        """按发布时间倒序游标分页获取帖子
+
+        Args:
+            limit: 每页数量
+            after: 上一页返回的游标，为空时从最新的帖子开始
+            expand_author: 为 True 时在同一次查询中附带作者信息(author 字段，不含密码和盐值；
+                作者不存在时为 None)
+            since, until: 只返回发布时间在 [since, until) 内的帖子
+            ids_only: 为 True 时只返回 _id 和 date(由索引覆盖，不读取文档)，忽略 expand_author
+
+        Returns:
+            tuple: (帖子字典列表, 下一页游标；没有更多数据时为 None)
+        """
+        pass
+
+    @abstractmethod
+    def find_posts_by_user(self, user_id: str, limit: int = 50, before: str = None, since: datetime = None,
+                           until: datetime = None, ids_only: bool = False) -> tuple:
+        """按发布时间倒序游标分页获取一个用户的帖子
+
+        Args:
+            user_id: 用户ID
+            limit: 每页数量
+            before: 上一页返回的游标，为空时从该用户最新的帖子开始
+            since, until: 只返回发布时间在 [since, until) 内的帖子
+            ids_only: 为 True 时只返回 _id 和 date(由索引覆盖，不读取文档)
+
+        Returns:
+            tuple: (帖子字典列表, 下一页游标；没有更多数据时为 None)
+        """
+        pass
+
+    @abstractmethod
+    def count_posts(self, estimated: bool = True) -> int:
+        """统计帖子数量
+
+        Args:
+            estimated: 为 True 时使用集合元数据估算，不扫描文档
+        """
+        pass
+
+    @abstractmethod
+    def import_posts(self, records, batch_size: int = 1000, validate_users: bool = False, progress=None) -> dict:
+        """批量导入帖子记录
+
+        Args:
+            records: 可迭代的帖子字典（CSV行或流式解析的JSON元素），逐条读取
+            batch_size: 每批 insert_many 的文档数
+            validate_users: 为 True 时丢弃 user_id 不存在于 users 集合的记录
+            progress: 每写完一批后调用 progress(已处理行数, 失败数)，可抛出异常中止导入
+
+        Returns:
+            dict: 导入汇总 {"rows", "inserted", "failed", "errors", "seconds", "rows_per_second"}
+        """
+        pass
+
+    @abstractmethod
+    def search_posts(self, query: str, limit: int = 20, offset: int = 0) -> tuple:
+        """全文检索帖子标题和内容（中英文），按相关度排序
+
+        Args:
+            query: 检索词
+            limit: 每页数量
+            offset: 跳过的结果数
+
+        Returns:
+            tuple: (帖子字典列表，每项带 score, 匹配的帖子总数)
+        """
+        pass
+
+    @abstractmethod
+    def find_posts_by_user_ids(self, user_ids: list, per_user: int = 10) -> dict:
+        """用一次聚合获取多个用户最新的帖子，每个用户的帖子按发布时间倒序
+
+        Args:
+            user_ids: 用户ID列表
+            per_user: 每个用户最多返回的帖子数
+
+        Returns:
+            dict: {用户ID: 帖子字典列表}，每个请求的用户ID都有一项（可能为空列表）
+        """
+        pass
@@ -3,11 +3,35 @@ from po.user import User
 class UserDao(ABC):
 
     @abstractmethod
-    def find_user_by_name(self,name:str)->list:
+    def find_user_by_name(self,name:str,limit:int=20)->list:
+        """按昵称前缀/子串搜索用户，结果按匹配程度排序，最多 limit 条"""
         pass
 
     @abstractmethod
-    def find_all_user(self)->list:
+    def find_all_user(self, shape: str = "dict")->list:
+        """获取所有用户，不返回密码和盐值；shape 为 dict 时返回原始文档，row 时返回只读的 UserRow"""
+        pass
+
+    @abstractmethod
+    def find_users_page(self, limit: int = 50, after: str = None) -> tuple:
+        """按 _id 游标分页获取用户，不返回密码和盐值
+
+        Args:
+            limit: 每页数量
+            after: 上一页返回的游标，为空时从第一页开始
+
+        Returns:
+            tuple: (用户字典列表, 下一页游标；没有更多数据时为 None)
+        """
+        pass
+
+    @abstractmethod
+    def count_users(self, estimated: bool = True) -> int:
+        """统计用户数量
+
+        Args:
+            estimated: 为 True 时使用集合元数据估算，不扫描文档
+        """
         pass
 
     @abstractmethod
@@ -39,6 +63,15 @@ class UserDao(ABC):
     def update_user_by_nickname(self,nickname:str,**kwargs):
         pass
 
+    @abstractmethod
+    def export_cursor(self, batch_size: int = 1000):
+        """返回用于流式导出的游标，按批从数据库读取，不包含密码和盐值
+
+        Args:
+            batch_size: 每次从服务器获取的文档数
+        """
+        pass
+
     @abstractmethod
     def export_to_csv(self, file_path: str) -> bool:
         """导出用户数据到CSV文件
@@ -86,3 +119,31 @@ class UserDao(ABC):
             bool: 导入是否成功
         """
         pass
+
+    @abstractmethod
+    def import_users(self, records, batch_size: int = 1000, workers: int = None, progress=None) -> dict:
+        """批量导入用户记录
+
+        Args:
+            records: 可迭代的用户字典（可以是流式解析器），逐条读取
+            batch_size: 每批 insert_many 的文档数
+            workers: 哈希密码的进程数，默认为CPU核数
+            progress: 每写完一批后调用 progress(已处理行数, 失败数)，可抛出异常中止导入
+
+        Returns:
+            dict: 导入汇总 {"inserted", "skipped", "failed", "errors"}，
+                  errors 中每项为 {"row", "status", "error"}
+        """
+        pass
+
+    @abstractmethod
+    def find_users_by_ids(self, ids: list) -> dict:
+        """用一次 $in 查询按 _id 批量获取用户，不返回密码和盐值
+
+        Args:
+            ids: 用户ID字符串列表，格式不正确的ID被忽略
+
+        Returns:
+            dict: {用户ID字符串: 用户字典}，不存在的ID不出现在结果中
+        """
+        pass
@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class Admin:
     #管理员账号
     adminAccount:str
@@ -10,3 +10,12 @@ class Admin:
     adminPassword:str
     #管理员盐值
     salt:str = "123456"
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Admin":
+        """从Mongo文档构造"""
+        return cls(doc["adminAccount"], doc["adminName"], doc["adminPassword"], doc["salt"])
+
+    def to_doc(self) -> dict:
+        return {"adminAccount": self.adminAccount, "adminName": self.adminName,
+                "adminPassword": self.adminPassword, "salt": self.salt}
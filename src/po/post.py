@@ -1,11 +1,35 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple
 
-@dataclass
+@dataclass(slots=True)
 class Post:
     user_id : str
     date : datetime
     title : str
     content : str = ""
 
-    
\ No newline at end of file
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Post":
+        """从Mongo文档构造，缺少 content 时为空字符串"""
+        return cls(doc["user_id"], doc["date"], doc["title"], doc.get("content", ""))
+
+    def to_doc(self) -> dict:
+        return {"user_id": self.user_id, "date": self.date, "title": self.title, "content": self.content}
+
+
+class PostRow(NamedTuple):
+    """列表查询用的只读行，比 Post 更省内存；id 为帖子的 _id"""
+    id : object
+    user_id : str
+    date : datetime
+    title : str
+    content : str = ""
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "PostRow":
+        return cls(doc.get("_id"), doc["user_id"], doc["date"], doc["title"], doc.get("content", ""))
+
+    def to_doc(self) -> dict:
+        return {"_id": self.id, "user_id": self.user_id, "date": self.date,
+                "title": self.title, "content": self.content}
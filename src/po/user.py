@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-@dataclass
+from typing import NamedTuple
+
+@dataclass(slots=True)
 class User:
     #用户昵称
     nickname:str
@@ -10,4 +12,29 @@ class User:
     #用户密码
     password:str
     #盐值(密码加密)
-    salt:str = "123456"
\ No newline at end of file
+    salt:str = "123456"
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "User":
+        """从Mongo文档构造"""
+        return cls(doc["nickname"], doc["phone_number"], doc["email"], doc["password"], doc["salt"])
+
+    def to_doc(self) -> dict:
+        return {"nickname": self.nickname, "phone_number": self.phone_number, "email": self.email,
+                "password": self.password, "salt": self.salt}
+
+
+class UserRow(NamedTuple):
+    """列表查询用的只读行，不包含密码和盐值；id 为用户的 _id"""
+    id:object
+    nickname:str
+    phone_number:int
+    email:str
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "UserRow":
+        return cls(doc.get("_id"), doc["nickname"], doc["phone_number"], doc["email"])
+
+    def to_doc(self) -> dict:
+        return {"_id": self.id, "nickname": self.nickname, "phone_number": self.phone_number,
+                "email": self.email}
@@ -0,0 +1,191 @@
+import json
+import logging
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from util.dbutil import start_db_tracking, stop_db_tracking
+from util.metrics import request_metrics
+from util.serialize import dumps
+
+logger = logging.getLogger("asgi")
+
+# 请求体上限(字节)，超过时返回 413
+MAX_BODY_SIZE = 16 * 1024 * 1024
+# 会修改数据的方法，带请求体时必须是 JSON
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class HTTPError(Exception):
+    """在处理函数中抛出，直接返回 {"code": status, "message": message}"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """一次 HTTP 请求，接口与视图中用到的 flask.request 部分保持一致"""
+
+    def __init__(self, scope: dict, body: bytes):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        # 与 request.args.get 相同，同名参数取第一个
+        self.args = {key: values[0] for key, values in query.items()}
+        self.headers = {key.decode("latin-1").lower(): value.decode("latin-1")
+                        for key, value in scope.get("headers", [])}
+        cookie = SimpleCookie()
+        cookie.load(self.headers.get("cookie", ""))
+        self.cookies = {key: morsel.value for key, morsel in cookie.items()}
+        self.body = body
+
+    @property
+    def is_json(self) -> bool:
+        content_type = self.headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type == "application/json" or content_type.endswith("+json")
+
+    def get_json(self):
+        """解析 JSON 请求体，请求体为空时返回 None"""
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "请求体不是合法的JSON")
+
+
+class Response:
+    def __init__(self, body: bytes = b"", status: int = 200, content_type: str = "application/json",
+                 headers: list = None):
+        self.body = body
+        self.status = status
+        self.headers = [("content-type", content_type)] if content_type else []
+        self.headers += list(headers or [])
+
+    def set_cookie(self, key: str, value: str, max_age: int = None, httponly: bool = False,
+                   samesite: str = None, path: str = "/"):
+        cookie = SimpleCookie()
+        cookie[key] = value
+        cookie[key]["path"] = path
+        if max_age is not None:
+            cookie[key]["max-age"] = max_age
+        if httponly:
+            cookie[key]["httponly"] = True
+        if samesite:
+            cookie[key]["samesite"] = samesite
+        self.headers.append(("set-cookie", cookie[key].OutputString()))
+
+    async def send(self, send):
+        headers = [(key.encode("latin-1"), value.encode("latin-1")) for key, value in self.headers]
+        # 304 没有响应体，不发送 content-length
+        if self.status != 304:
+            headers.append((b"content-length", str(len(self.body)).encode()))
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def json_response(data, status: int = 200) -> Response:
+    return Response(dumps(data), status)
+
+
+class ASGIApp:
+    """最小的 ASGI 应用，按 Flask-RESTful 的方式把路径映射到视图类
+
+    每个请求创建一个视图实例并调用与 HTTP 方法同名的协程(get/post/put/delete)，
+    返回值可以是 dict、(dict, 状态码) 或 Response。请求耗时和数据库往返
+    计入 util.metrics 中与同步应用相同的指标。
+
+    不做 CSRF 令牌校验：修改数据的请求体必须是 application/json，跨站表单无法
+    构造这种请求，跨站脚本发送时会先触发 CORS 预检，而本应用不响应预检。
+    """
+
+    def __init__(self, max_body_size: int = MAX_BODY_SIZE):
+        self.max_body_size = max_body_size
+        self.routes = {}
+        self.on_startup = []
+        self.on_shutdown = []
+
+    def add_resource(self, view_cls, *paths):
+        for path in paths:
+            self.routes[path] = view_cls
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            response = await self._handle(scope, receive)
+            await response.send(send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for fn in self.on_startup:
+                        await fn()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for fn in self.on_shutdown:
+                    await fn()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive) -> bytes:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                raise HTTPError(413, "请求体过大")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _handle(self, scope, receive) -> Response:
+        view_cls = self.routes.get(scope["path"])
+        endpoint = scope["path"] if view_cls is not None else "unmatched"
+        method = scope["method"]
+        started = time.perf_counter()
+        db_stats = start_db_tracking()
+        request_metrics.started(endpoint)
+        try:
+            response = await self._dispatch(view_cls, scope, receive)
+        except HTTPError as e:
+            response = json_response({"code": e.status, "message": e.message}, e.status)
+        except Exception:
+            logger.exception("Unhandled error in %s %s", method, scope["path"])
+            response = json_response({"code": 500, "message": "服务器内部错误"}, 500)
+        finally:
+            request_metrics.finished(endpoint)
+            stop_db_tracking()
+        request_metrics.observe(endpoint, method, response.status, time.perf_counter() - started,
+                                db_stats[0], db_stats[1])
+        return response
+
+    async def _dispatch(self, view_cls, scope, receive) -> Response:
+        if view_cls is None:
+            raise HTTPError(404, "Not Found")
+        handler = getattr(view_cls(), scope["method"].lower(), None)
+        if handler is None:
+            raise HTTPError(405, "Method Not Allowed")
+        request = Request(scope, await self._read_body(receive))
+        if request.method in UNSAFE_METHODS and request.body and not request.is_json:
+            raise HTTPError(415, "请求必须是JSON格式")
+
+        result = await handler(request)
+        if isinstance(result, Response):
+            return result
+        if isinstance(result, tuple):
+            data, status = result
+            return json_response(data, status)
+        return json_response(result)
@@ -0,0 +1,42 @@
+import asyncio
+from pymongo import AsyncMongoClient
+from util.dbutil import DBUtil
+
+
+class AsyncDBUtil:
+    """异步接口共享的 AsyncMongoClient
+
+    连接配置、连接池统计和命令监听器与 DBUtil 相同。AsyncMongoClient 只能在
+    创建它的事件循环中使用，因此客户端在第一次使用时按当前事件循环创建，
+    事件循环变化(如测试中多次 asyncio.run)时重新创建。
+    """
+
+    _client = None
+    _loop = None
+    _collections = {}
+
+    @classmethod
+    def get_client(cls) -> AsyncMongoClient:
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._loop is not loop:
+            uri, options = DBUtil.client_options()
+            cls._client = AsyncMongoClient(uri, **options)
+            cls._loop = loop
+            cls._collections = {}
+        return cls._client
+
+    @classmethod
+    def collection(cls, name: str):
+        """返回预先绑定的集合句柄，同一客户端下重复调用返回同一对象"""
+        client = cls.get_client()
+        coll = cls._collections.get(name)
+        if coll is None:
+            coll = client[DBUtil.settings()["db_name"]][name]
+            cls._collections[name] = coll
+        return coll
+
+    @classmethod
+    async def close(cls):
+        client, cls._client, cls._loop, cls._collections = cls._client, None, None, {}
+        if client is not None:
+            await client.close()
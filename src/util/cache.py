@@ -0,0 +1,133 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+# 调用方区分"未缓存"和"缓存了不存在(None)"时作为 get 的默认值
+MISSING = _MISSING
+
+
+class TTLCache:
+    """线程安全的内存缓存，条目在 ttl 秒后过期，超过 maxsize 时淘汰最久未使用的条目
+
+    值为 None 的条目表示"查询过但不存在"（负缓存），通常用更短的 ttl 写入。
+
+    Args:
+        maxsize: 最多保存的条目数
+        ttl: 条目存活秒数
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _encode(self, value):
+        return value
+
+    def _decode(self, value):
+        return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if value is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+        return self._decode(value) if value is not None else None
+
+    def set(self, key, value, ttl: float = None):
+        value = self._encode(value) if value is not None else None
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def pop(self, key, default=None):
+        """取出并删除条目，不计入命中统计（用于失效时读取关联的键）"""
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        if item is _MISSING or item[1] < time.monotonic():
+            return default
+        return self._decode(item[0]) if item[0] is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedCache(TTLCache):
+    """共享缓存（如 Redis）的本地替身
+
+    同一 namespace 的实例共用一份存储，值以 pickle 字节保存，每次 get 得到新的副本，
+    行为与经网络序列化的共享缓存一致，便于在没有外部缓存服务时开发和测试。
+    命中统计按实例计算。
+    """
+
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, namespace: str, maxsize: int = 1024, ttl: float = 60):
+        super().__init__(maxsize, ttl)
+        self.namespace = namespace
+        with SharedCache._stores_lock:
+            self._data, self._lock = SharedCache._stores.setdefault(
+                namespace, (OrderedDict(), threading.Lock()))
+
+    def _encode(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, value):
+        return pickle.loads(value)
+
+
+# 可选的缓存后端
+CACHE_BACKENDS = ("local", "shared")
+
+
+def make_cache(backend: str = "local", namespace: str = "default", maxsize: int = 1024, ttl: float = 60) -> TTLCache:
+    """按名称创建缓存后端：local 为进程内 LRU，shared 为共享缓存的本地替身"""
+    if backend == "local":
+        return TTLCache(maxsize=maxsize, ttl=ttl)
+    if backend == "shared":
+        return SharedCache(namespace, maxsize=maxsize, ttl=ttl)
+    raise ValueError(f"Unsupported cache backend: {backend}")
@@ -0,0 +1,499 @@
+import logging
+import os
+import queue
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, CollectionInvalid, OperationFailure
+
+from util.dbutil import DBUtil
+from util.serialize import dumps
+
+logger = logging.getLogger("changes")
+
+# auto: 优先使用 change stream，不可用(单机 mongod)时改为轮询变更日志；stream / poll 固定方式；off 不监听
+CHANGE_WATCH = os.environ.get("CHANGE_WATCH", "auto").lower()
+# 轮询变更日志的间隔(秒)
+CHANGE_POLL_INTERVAL = float(os.environ.get("CHANGE_POLL_INTERVAL", 1.0))
+# 进程内保留的最近事件数，SSE 断线重连和轮询接口从这里补发
+CHANGE_HISTORY = int(os.environ.get("CHANGE_HISTORY", 1000))
+# 监听的集合
+WATCHED_COLLECTIONS = ("users", "posts", "admins")
+# 轮询模式下各进程写入的变更日志(固定大小集合)
+CHANGE_LOG = "changes"
+CHANGE_LOG_SIZE = 16 * 1024 * 1024
+# 事件中携带的字段，不包含密码、盐值和派生的搜索字段
+EVENT_FIELDS = {
+    "users": ("nickname", "phone_number", "email"),
+    "posts": ("user_id", "title", "content", "date"),
+    "admins": ("adminAccount", "adminName"),
+}
+# change stream 的操作类型 -> 事件类型
+_OPERATIONS = {"insert": "insert", "update": "update", "replace": "update", "delete": "delete"}
+# 不是副本集时 $changeStream 返回的错误码
+_STREAM_UNSUPPORTED = {40573, 40324}
+# 无法从 resume token 继续的错误码(InvalidResumeToken、ChangeStreamFatalError、ChangeStreamHistoryLost)，
+# 只能丢弃 resume token 重新开始监听
+_STREAM_NOT_RESUMABLE = {260, 280, 286}
+
+# SSE 心跳间隔(秒)和浏览器断线重连等待(毫秒)
+SSE_HEARTBEAT = 15
+SSE_RETRY_MS = 3000
+# 同时连接的 SSE 客户端上限，每个连接占用一个工作线程
+SSE_MAX_CLIENTS = int(os.environ.get("SSE_MAX_CLIENTS", 50))
+
+
+def make_event(collection: str, op: str, doc_id, doc: dict = None) -> dict:
+    """构造变更事件，doc 只保留 EVENT_FIELDS 中的字段"""
+    fields = EVENT_FIELDS.get(collection, ())
+    return {
+        "collection": collection,
+        "op": op,
+        "id": str(doc_id),
+        "doc": {field: doc[field] for field in fields if field in doc} if doc is not None else None,
+    }
+
+
+class Subscription:
+    """一个订阅者的事件队列，队列满时置 overflowed，订阅方应重新加载数据"""
+
+    def __init__(self, hub, maxsize: int):
+        self.hub = hub
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event: dict):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout: float = None):
+        """等待下一个事件，超时返回 None"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def reset(self):
+        """要求订阅方重新加载数据，并唤醒正在等待的订阅方"""
+        self.overflowed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_POSITION_RE = re.compile(r"^[0-9a-f]{24}$")
+
+
+def stream_event_id(change: dict) -> str:
+    """change stream 事件的ID：前8字节为 clusterTime(秒, 序号)，各工作进程收到的同一事件ID相同"""
+    cluster_time = change["clusterTime"]
+    token = dumps(change["_id"])
+    return struct.pack(">III", cluster_time.time, cluster_time.inc, zlib.crc32(token)).hex()
+
+
+class ChangeHub:
+    """进程内的变更事件分发
+
+    事件ID是与时间同序的 24 位十六进制串，来自共享的事件源(轮询模式下为变更日志的 _id，
+    change stream 为 clusterTime)，各工作进程收到的同一事件ID相同。客户端带着另一个
+    工作进程发出的ID来时，本进程收到过该事件就从它之后补发，否则只要该位置在本进程
+    开始完整接收变更(start)之后，就按ID的顺序补发；早于 start(重启、中断后无法补发或
+    落后太多)时客户端需要重新加载。本进程内按发布顺序编号(seq)，SSE 用它去重。
+
+    监听函数在发布线程中同步调用，用于删除缓存等快速操作；订阅(Subscription)用于 SSE
+    等需要排队的消费方。
+    """
+
+    def __init__(self, history: int = CHANGE_HISTORY):
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._listeners = {}
+        self._reset_listeners = []
+        self.mark_start()
+
+    @property
+    def last_id(self) -> str:
+        with self._lock:
+            return self._history[-1]["event_id"] if self._history else self._start
+
+    def mark_start(self):
+        """从现在起本进程会收到所有变更；此前的位置不能再衔接"""
+        with self._lock:
+            self._start = str(ObjectId())
+            self._start_seq = self._seq
+
+    def add_listener(self, collection: str, fn):
+        """注册 fn(event)，collection 的每个事件都会调用"""
+        self._listeners.setdefault(collection, []).append(fn)
+
+    def add_reset_listener(self, fn):
+        """注册 fn()，可能漏掉了变更时调用，用于清空缓存等"""
+        self._reset_listeners.append(fn)
+
+    def subscribe(self, maxsize: int = 1000) -> Subscription:
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict, event_id: str = None) -> dict:
+        """发布事件；event_id 为事件源中的位置，未提供时按当前时间生成"""
+        with self._lock:
+            self._seq += 1
+            event = {**event, "seq": self._seq, "event_id": event_id or str(ObjectId())}
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for fn in self._listeners.get(event["collection"], ()):
+            try:
+                fn(event)
+            except Exception:
+                logger.exception("Change listener failed for %s", event["collection"])
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def reset(self):
+        """监听中断期间可能漏掉了变更：调用重置监听函数，并让所有订阅方重新加载
+
+        同时清空保留的事件并重新开始计算 start，之前的事件ID都不能再衔接。
+        """
+        with self._lock:
+            self._history.clear()
+            subscribers = list(self._subscribers)
+        self.mark_start()
+        for fn in self._reset_listeners:
+            try:
+                fn()
+            except Exception:
+                logger.exception("Change reset listener failed")
+        for subscription in subscribers:
+            subscription.reset()
+
+    def since(self, event_id: str) -> tuple:
+        """返回 event_id 之后的事件
+
+        Returns:
+            tuple: (事件列表, 是否完整)；ID 格式错误或早于本进程能补发的范围时为 ([], False)
+        """
+        if not _POSITION_RE.match(event_id or ""):
+            return [], False
+        with self._lock:
+            events = list(self._history)
+            start, start_seq, seq = self._start, self._start_seq, self._seq
+            full = len(events) == self._history.maxlen
+        for i, event in enumerate(events):
+            if event["event_id"] == event_id:
+                return events[i + 1:], True
+        if event_id == start:
+            events = [event for event in events if event["seq"] > start_seq]
+            return events, seq == start_seq or bool(events and events[0]["seq"] == start_seq + 1)
+        # 其他工作进程发出的ID：本进程还没收到或已不在保留范围内，按位置比较
+        if full and events:
+            start = max(start, events[0]["event_id"])
+        if event_id < start:
+            return [], False
+        return [event for event in events if event["event_id"] > event_id], True
+
+
+# 进程内共享的事件分发
+hub = ChangeHub()
+
+
+class ChangeWatcher:
+    """后台线程：监听集合变更并发布到 hub
+
+    副本集上使用 change stream(更新时取回完整文档)；单机 mongod 不支持 change stream，
+    改为轮询固定大小的变更日志集合，此时各进程的 DAO 写操作通过 record() 追加日志，
+    由本线程批量写入。每个工作进程各自运行一个监听线程，fork 后在子进程中重新启动。
+    """
+
+    def __init__(self, hub: ChangeHub, mode: str = CHANGE_WATCH, poll_interval: float = CHANGE_POLL_INTERVAL,
+                 collections: tuple = WATCHED_COLLECTIONS):
+        self.hub = hub
+        self.configured_mode = mode
+        self.poll_interval = poll_interval
+        self.collections = collections
+        # 实际使用的方式: "stream" / "poll"，尚未连接时为 None
+        self.mode = None
+        # 最近一次开始接收变更的时间，此后的变更都会发布到 hub
+        self.watching_since = None
+        self._pending = deque()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._resume_token = None
+        # 轮询模式下已处理到的时间和窗口内已处理的日志ID，出错重试时从这里继续
+        self._poll_since = None
+        self._poll_seen = OrderedDict()
+        # 监听出过错，恢复时需要判断中断期间的变更是否会补发
+        self._interrupted = False
+
+    def start(self):
+        """启动监听线程(已在本进程中运行时不做任何事)"""
+        if self.configured_mode == "off" or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="change-watcher", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    @property
+    def watching(self) -> bool:
+        """本进程是否正在接收所有进程的变更"""
+        return (self.watching_since is not None and self._pid == os.getpid()
+                and self._thread is not None and self._thread.is_alive())
+
+    def record(self, collection: str, op: str, doc_id, doc: dict = None):
+        """记录本进程的写操作；只在轮询模式下需要(change stream 会直接收到)"""
+        if recording():
+            # 在写操作时生成日志 _id，事件按写入时间而不是批量写入日志的时间排序
+            self._pending.append({"_id": ObjectId(), **make_event(collection, op, doc_id, doc)})
+
+    def _run(self):
+        delay = self.poll_interval
+        while not self._stop.is_set():
+            try:
+                if self.configured_mode in ("auto", "stream") and self.mode != "poll":
+                    try:
+                        self._watch_stream()
+                    except OperationFailure as e:
+                        if self.configured_mode == "stream" or e.code not in _STREAM_UNSUPPORTED:
+                            raise
+                        logger.info("Change streams unavailable (%s), polling %s instead", e, CHANGE_LOG)
+                        self.mode = "poll"
+                else:
+                    self._poll_log()
+                delay = self.poll_interval
+            except Exception as e:
+                # 监听线程不能退出，否则本进程不再收到变更；数据库不可用时退避重试。
+                # 中断期间不能确认收到了所有变更，依赖 watching 的缓存(如条件请求)暂停使用
+                self.watching_since = None
+                self._interrupted = True
+                if isinstance(e, OperationFailure) and e.code in _STREAM_NOT_RESUMABLE:
+                    logger.warning("Change stream cannot resume (%s), restarting without resume token", e)
+                    self._resume_token = None
+                logger.warning("Change watcher error, retrying in %.1fs: %r", delay, e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30)
+
+    def _watch_stream(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": list(self.collections)},
+            "operationType": {"$in": list(_OPERATIONS)},
+        }}]
+        with DBUtil.connect().watch(pipeline, full_document="updateLookup", resume_after=self._resume_token,
+                                    max_await_time_ms=1000) as stream:
+            self.mode = "stream"
+            # 带 resume token 恢复时中断期间的变更会补发
+            self._begin_watching(complete=self._resume_token is not None)
+            while not self._stop.is_set() and stream.alive:
+                change = stream.try_next()
+                self._resume_token = stream.resume_token
+                if change is None:
+                    continue
+                self.hub.publish(make_event(change["ns"]["coll"], _OPERATIONS[change["operationType"]],
+                                            change["documentKey"]["_id"], change.get("fullDocument")),
+                                 stream_event_id(change))
+
+    def _begin_watching(self, complete: bool):
+        """开始(或恢复)接收变更；出错后恢复且中断期间的变更不会补发时重置 hub"""
+        if self._interrupted and not complete:
+            logger.info("Change watcher restarted, resetting caches")
+            self.hub.reset()
+        elif not complete:
+            self.hub.mark_start()
+        self._interrupted = False
+        self.watching_since = datetime.now(timezone.utc)
+
+    def _ensure_log(self):
+        db = DBUtil.connect()
+        if CHANGE_LOG not in db.list_collection_names(filter={"name": CHANGE_LOG}):
+            try:
+                db.create_collection(CHANGE_LOG, capped=True, size=CHANGE_LOG_SIZE)
+            except CollectionInvalid:
+                pass
+        return db[CHANGE_LOG]
+
+    def _poll_log(self):
+        """按 _id 的时间部分往前多看一个窗口并按 _id 去重，不会漏掉其他进程时钟略慢时写入的日志
+
+        首次轮询从当前时间开始；出错重试时从上次处理到的位置继续，中断期间的日志照常补发，
+        只有日志已经写满、之前的条目可能被覆盖时才重置 hub。
+        """
+        self.mode = "poll"
+        log = self._ensure_log()
+        window = timedelta(seconds=max(5.0, self.poll_interval * 5))
+        if self._poll_since is None:
+            self._poll_since = datetime.now(timezone.utc)
+            self._begin_watching(complete=False)
+        else:
+            self._begin_watching(complete=self._log_covers(log, self._poll_since - window))
+        seen = self._poll_seen
+        while not self._stop.is_set():
+            self._flush(log)
+            floor = ObjectId.from_datetime(self._poll_since - window)
+            for entry in log.find({"_id": {"$gte": floor}}).sort("_id", 1):
+                if entry["_id"] in seen:
+                    continue
+                seen[entry["_id"]] = True
+                if entry["_id"].generation_time > self._poll_since:
+                    self._poll_since = entry["_id"].generation_time
+                event = {key: entry[key] for key in ("collection", "op", "id", "doc")}
+                self.hub.publish(event, str(entry["_id"]))
+            # 只保留窗口内的已处理ID
+            while seen and next(iter(seen)).generation_time < self._poll_since - window:
+                seen.popitem(last=False)
+            self._stop.wait(self.poll_interval)
+        self._flush(log)
+
+    @staticmethod
+    def _log_covers(log, since: datetime) -> bool:
+        """变更日志是否还保留着 since 之后的所有条目
+
+        最早的条目不晚于 since，或日志还没有写满(固定大小集合写满后才覆盖最早的条目)。
+        """
+        oldest = log.find_one({}, {"_id": 1}, sort=[("_id", 1)])
+        if oldest is None or oldest["_id"] <= ObjectId.from_datetime(since):
+            return True
+        try:
+            stats = next(log.aggregate([{"$collStats": {"storageStats": {}}}]))
+            return stats["storageStats"]["size"] < CHANGE_LOG_SIZE * 0.9
+        except Exception as e:
+            logger.warning("Cannot check change log size: %r", e)
+            return False
+
+    def _flush(self, log):
+        entries = []
+        while self._pending:
+            entries.append(self._pending.popleft())
+        if entries:
+            try:
+                log.insert_many(entries, ordered=False)
+            except BulkWriteError as e:
+                # 已经写入的条目(重试时 _id 重复)不再放回
+                failed = [entries[error["index"]] for error in e.details.get("writeErrors", [])
+                          if error.get("code") != 11000]
+                if failed:
+                    self._pending.extendleft(reversed(failed))
+                    raise
+            except Exception:
+                # 写入失败的日志放回队列，恢复后重试，其他进程不会漏掉本进程的写操作
+                self._pending.extendleft(reversed(entries))
+                raise
+
+
+# 进程内共享的监听线程
+watcher = ChangeWatcher(hub)
+
+
+class CollectionVersions:
+    """各集合在本进程中的版本号和最后变更时间
+
+    hub 收到变更事件(包括其他进程的写操作)时递增；本进程的写操作在 record() 时
+    立即递增，不必等监听线程送回事件。版本号只在进程内有意义，用于判断之前
+    算出的结果是否仍然有效。
+    """
+
+    def __init__(self, hub: ChangeHub, collections: tuple = WATCHED_COLLECTIONS):
+        self._lock = threading.Lock()
+        started = datetime.now(timezone.utc)
+        self._versions = {collection: 0 for collection in collections}
+        self._changed = {collection: started for collection in collections}
+        for collection in collections:
+            hub.add_listener(collection, lambda event: self.bump(event["collection"]))
+        hub.add_reset_listener(self.bump_all)
+
+    def bump(self, collection: str):
+        with self._lock:
+            self._versions[collection] += 1
+            self._changed[collection] = datetime.now(timezone.utc)
+
+    def bump_all(self):
+        for collection in list(self._versions):
+            self.bump(collection)
+
+    def snapshot(self, collections: tuple) -> tuple:
+        """Returns: (各集合的版本号, 其中最晚的变更时间)"""
+        with self._lock:
+            return (tuple(self._versions[collection] for collection in collections),
+                    max(self._changed[collection] for collection in collections))
+
+
+# 进程内共享的集合版本号
+versions = CollectionVersions(hub)
+
+
+def recording() -> bool:
+    """本进程的写操作是否需要写入变更日志(轮询模式)，DAO 据此决定是否多查一次受影响的文档"""
+    return watcher.mode == "poll" and watcher._pid == os.getpid()
+
+
+def record(collection: str, op: str, doc_id, doc: dict = None):
+    versions.bump(collection)
+    watcher.record(collection, op, doc_id, doc)
+
+
+def format_sse(event: dict) -> str:
+    return f"id: {event['event_id']}\nevent: change\ndata: {dumps(event).decode()}\n\n"
+
+
+def sse_stream(subscription: Subscription, last_event_id: str = None, heartbeat: float = SSE_HEARTBEAT):
+    """SSE 响应体：先补发 last_event_id 之后的事件，再持续推送新事件
+
+    补发不完整(客户端来自其他进程或落后太多)或订阅队列溢出时发送 reset 事件，
+    客户端应重新加载页面数据。定期发送注释行作为心跳，以便及时发现断开的连接。
+    """
+    with subscription:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        last_seq = 0
+        if last_event_id:
+            backlog, complete = subscription.hub.since(last_event_id)
+            if not complete:
+                yield f"id: {subscription.hub.last_id}\nevent: reset\ndata: {{}}\n\n"
+            for event in backlog:
+                last_seq = event["seq"]
+                yield format_sse(event)
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            if subscription.overflowed:
+                yield f"id: {subscription.hub.last_id}\nevent: reset\ndata: {{}}\n\n"
+                return
+            if event is None:
+                yield ": ping\n\n"
+            elif event["seq"] > last_seq:
+                yield format_sse(event)
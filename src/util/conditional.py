@@ -0,0 +1,205 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+from flask import make_response, request
+
+from util.asgi import Response
+from util.cache import TTLCache
+from util.changes import versions, watcher
+from util.serialize import dumps
+
+# 每个 (路径, 查询参数) 保存一份最近返回的 ETag/Last-Modified 和当时的集合版本号
+VALIDATOR_CACHE_SIZE = 4096
+VALIDATOR_CACHE_TTL = 300
+# 带验证器的响应允许浏览器缓存，但每次使用前都要向服务器确认
+CACHE_CONTROL = "no-cache"
+
+
+def make_etag(body: bytes) -> str:
+    """强 ETag：响应体的哈希，内容相同的响应在任何进程中得到同一个值"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def newest_date(data) -> datetime:
+    """列表数据中最新的 date 字段(帖子的发布时间，按本地时间保存)，没有时返回 None"""
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return None
+    dates = [item["date"] for item in data if isinstance(item, dict) and isinstance(item.get("date"), datetime)]
+    if not dates:
+        return None
+    return max(date.astimezone(timezone.utc) for date in dates)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 使用弱比较：忽略 W/ 前缀"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def not_modified(headers, etag: str, last_modified: datetime) -> bool:
+    """请求头中的条件是否表明客户端缓存的内容仍然有效
+
+    同时带 If-None-Match 时忽略 If-Modified-Since；HTTP 日期只精确到秒。
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+class ConditionalCache:
+    """GET 接口的条件请求
+
+    响应体编码一次后计算 ETag，请求头的条件满足时返回 304 而不发送响应体。
+    Last-Modified 取数据中最新的发布时间和所依赖集合的最后变更时间中较晚的一个。
+
+    本进程正在接收所有进程的变更(watching_since 不为 None)时，还会按 (路径, 查询参数) 记下
+    返回过的验证器和当时的集合版本号：版本号未变且条件满足时直接返回 304，
+    不查询数据库也不编码响应体。变更由监听线程送达前(轮询模式下最多约一个轮询
+    间隔)可能返回旧的验证器，与用户缓存的一致性相同。
+    """
+
+    def __init__(self, maxsize: int = VALIDATOR_CACHE_SIZE, ttl: float = VALIDATOR_CACHE_TTL,
+                 versions=versions, watching_since=lambda: watcher.watching_since if watcher.watching else None):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions = versions
+        self.watching_since = watching_since
+        self.not_modified_cached = 0
+        self.not_modified_computed = 0
+
+    def _state(self, collections: tuple):
+        """当前的 (版本号, 最后变更时间)；不能确认看到了所有变更时为 None"""
+        since = self.watching_since()
+        if since is None:
+            return None
+        current, changed = self.versions.snapshot(collections)
+        return current, max(changed, since)
+
+    def check(self, key, collections: tuple, headers) -> tuple:
+        """处理请求前调用，必须在读取数据之前取版本号
+
+        Returns:
+            tuple: (state, validator)；validator 不为 None 时直接返回 304
+        """
+        state = self._state(collections)
+        if state is not None:
+            cached = self._cache.get(key)
+            if cached is not None and cached[2] == state[0] and not_modified(headers, cached[0], cached[1]):
+                self.not_modified_cached += 1
+                return state, cached[:2]
+        return state, None
+
+    def complete(self, key, state, body: bytes, data, headers) -> tuple:
+        """为编码好的响应体计算验证器
+
+        Returns:
+            tuple: ((etag, last_modified), 是否返回 304)
+        """
+        etag = make_etag(body)
+        now = datetime.now(timezone.utc)
+        last_modified = state[1] if state is not None else now
+        newest = newest_date(data)
+        if newest is not None and newest > last_modified:
+            last_modified = newest
+        last_modified = min(last_modified, now)
+        if state is not None:
+            self._cache.set(key, (etag, last_modified, state[0]))
+            unchanged = not_modified(headers, etag, last_modified)
+        else:
+            # 不能确认看到了所有变更时 Last-Modified 只是当前时间，只按 ETag 判断
+            unchanged = not_modified(headers, etag, None)
+        if unchanged:
+            self.not_modified_computed += 1
+        return (etag, last_modified), unchanged
+
+    def stats(self) -> dict:
+        return {"not_modified_cached": self.not_modified_cached,
+                "not_modified_computed": self.not_modified_computed,
+                "validators": self._cache.stats()}
+
+
+# 进程内共享的验证器缓存
+validators = ConditionalCache()
+
+
+def _validator_headers(validator: tuple) -> list:
+    etag, last_modified = validator
+    return [("ETag", etag), ("Last-Modified", http_date(last_modified)), ("Cache-Control", CACHE_CONTROL)]
+
+
+def _asgi_headers(validator: tuple) -> list:
+    return [(key.lower(), value) for key, value in _validator_headers(validator)]
+
+
+def _request_key(path: str, args) -> tuple:
+    return path, tuple(sorted(args.items()))
+
+
+def conditional(*collections, cache: ConditionalCache = None):
+    """Flask-RESTful 视图 get 方法的装饰器，结果依赖 collections 中的集合
+
+    只处理 code 为 200 的 dict 结果：在这里编码响应体并设置 ETag/Last-Modified，
+    其余结果原样返回。
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            conditional_cache = cache or validators
+            key = _request_key(request.path, request.args)
+            state, validator = conditional_cache.check(key, collections, request.headers)
+            if validator is not None:
+                return make_response(b"", 304, _validator_headers(validator))
+
+            result = fn(*args, **kwargs)
+            if not isinstance(result, dict) or result.get("code") != 200:
+                return result
+            body = dumps(result)
+            validator, unchanged = conditional_cache.complete(key, state, body, result.get("data"), request.headers)
+            if unchanged:
+                return make_response(b"", 304, _validator_headers(validator))
+            response = make_response(body, 200, _validator_headers(validator))
+            response.headers["Content-Type"] = "application/json"
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_async(*collections, cache: ConditionalCache = None):
+    """异步视图(util.asgi)的 conditional"""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(self, request):
+            conditional_cache = cache or validators
+            key = _request_key(request.path, request.args)
+            state, validator = conditional_cache.check(key, collections, request.headers)
+            if validator is not None:
+                return Response(status=304, content_type=None, headers=_asgi_headers(validator))
+
+            result = await fn(self, request)
+            if not isinstance(result, dict) or result.get("code") != 200:
+                return result
+            body = dumps(result)
+            validator, unchanged = conditional_cache.complete(key, state, body, result.get("data"), request.headers)
+            if unchanged:
+                return Response(status=304, content_type=None, headers=_asgi_headers(validator))
+            return Response(body, headers=_asgi_headers(validator))
+        return wrapper
+    return decorator
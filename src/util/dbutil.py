@@ -1,13 +1,265 @@
+import contextvars
+import os
+import threading
 from pymongo import MongoClient
+from pymongo import monitoring
+from util.querystats import QueryStatsListener
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """统计连接池事件，用于评估连接池大小"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.pools_created = 0
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checked_out = 0
+            self.checked_in = 0
+            self.checkout_failed = 0
+            self.in_use = 0
+            self.max_in_use = 0
+
+    def pool_created(self, event):
+        with self._lock:
+            self.pools_created += 1
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failed += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_in += 1
+            self.in_use -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pools_created": self.pools_created,
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "connections_open": self.connections_created - self.connections_closed,
+                "checked_out": self.checked_out,
+                "checked_in": self.checked_in,
+                "checkout_failed": self.checkout_failed,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+            }
+
+
+# 当前请求累计的 [数据库命令数, 耗时秒数]，由请求中间件开启，未开启时为 None
+_request_db = contextvars.ContextVar("request_db", default=None)
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """把每条数据库命令的耗时计入当前请求"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.duration_micros)
+
+    def failed(self, event):
+        self._record(event.duration_micros)
+
+    @staticmethod
+    def _record(duration_micros: int):
+        stats = _request_db.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += duration_micros / 1e6
+
+
+def start_db_tracking() -> list:
+    """开始统计当前上下文中的数据库往返，返回会被累加的 [命令数, 秒数]"""
+    stats = [0, 0.0]
+    _request_db.set(stats)
+    return stats
+
+
+def stop_db_tracking():
+    _request_db.set(None)
+
 
 class DBUtil:
+    """进程内共享的MongoClient
+
+    客户端在第一次使用时创建，同一进程内的所有DAO共用一个连接池。
+    fork之后子进程会丢弃继承来的客户端并重新创建。
+    """
+
+    # 默认配置，可通过环境变量或 configure() 覆盖
+    DEFAULTS = {
+        "uri": ("MONGO_URI", "mongodb://localhost:27017", str),
+        "db_name": ("MONGO_DB", "ManageDb", str),
+        "max_pool_size": ("MONGO_MAX_POOL_SIZE", 100, int),
+        "min_pool_size": ("MONGO_MIN_POOL_SIZE", 0, int),
+        "max_idle_time_ms": ("MONGO_MAX_IDLE_TIME_MS", None, int),
+        "connect_timeout_ms": ("MONGO_CONNECT_TIMEOUT_MS", 5000, int),
+        "server_selection_timeout_ms": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000, int),
+        "socket_timeout_ms": ("MONGO_SOCKET_TIMEOUT_MS", None, int),
+        "wait_queue_timeout_ms": ("MONGO_WAIT_QUEUE_TIMEOUT_MS", None, int),
+    }
+
+    _client = None
+    _pid = None
+    _collections = {}
+    _overrides = {}
+    _lock = threading.Lock()
+    _pool_listener = PoolStatsListener()
+    _command_listener = CommandStatsListener()
+    _query_listener = QueryStatsListener()
+
+    @classmethod
+    def configure(cls, **options):
+        """覆盖连接配置（如 uri、max_pool_size），须在第一次连接前调用
+
+        已经创建的客户端会被关闭，下次使用时按新配置重建。
+        """
+        unknown = set(options) - set(cls.DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown DB options: {', '.join(sorted(unknown))}")
+        with cls._lock:
+            cls._overrides.update({k: v for k, v in options.items() if v is not None})
+            cls._close_locked()
+
+    @classmethod
+    def settings(cls) -> dict:
+        """返回当前生效的配置：configure() > 环境变量 > 默认值"""
+        result = {}
+        for key, (env, default, cast) in cls.DEFAULTS.items():
+            if key in cls._overrides:
+                result[key] = cls._overrides[key]
+            elif os.environ.get(env):
+                result[key] = cast(os.environ[env])
+            else:
+                result[key] = default
+        return result
+
+    @classmethod
+    def get_client(cls) -> MongoClient:
+        """获取当前进程的共享客户端，必要时创建"""
+        client = cls._client
+        if client is not None and cls._pid == os.getpid():
+            return client
+        with cls._lock:
+            if cls._client is None or cls._pid != os.getpid():
+                # fork后继承的客户端不可安全使用，直接丢弃而不是关闭
+                cls._client = cls._create_client()
+                cls._pid = os.getpid()
+                cls._collections = {}
+            return cls._client
+
+    @classmethod
+    def client_options(cls) -> tuple:
+        """按当前配置返回 (uri, 客户端参数)，异步客户端使用同样的配置和监听器"""
+        conf = cls.settings()
+        options = {
+            "maxPoolSize": conf["max_pool_size"],
+            "minPoolSize": conf["min_pool_size"],
+            "maxIdleTimeMS": conf["max_idle_time_ms"],
+            "connectTimeoutMS": conf["connect_timeout_ms"],
+            "serverSelectionTimeoutMS": conf["server_selection_timeout_ms"],
+            "socketTimeoutMS": conf["socket_timeout_ms"],
+            "waitQueueTimeoutMS": conf["wait_queue_timeout_ms"],
+        }
+        options = {k: v for k, v in options.items() if v is not None}
+        options["event_listeners"] = [cls._pool_listener, cls._command_listener, cls._query_listener]
+        return conf["uri"], options
+
+    @classmethod
+    def _create_client(cls) -> MongoClient:
+        uri, options = cls.client_options()
+        cls._pool_listener.reset()
+        return MongoClient(uri, **options)
 
     @classmethod
     def connect(cls):
-        cls._client = MongoClient("mongodb://localhost:27017")
-        db = cls._client["ManageDb"]
-        return db
-    
+        return cls.get_client()[cls.settings()["db_name"]]
+
+    @classmethod
+    def collection(cls, name: str):
+        """返回预先绑定的集合句柄，同一客户端下重复调用返回同一对象"""
+        client = cls.get_client()
+        coll = cls._collections.get(name)
+        if coll is None or coll.database.client is not client:
+            coll = client[cls.settings()["db_name"]][name]
+            cls._collections[name] = coll
+        return coll
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """连接池统计信息"""
+        conf = cls.settings()
+        stats = cls._pool_listener.snapshot()
+        stats["connected"] = cls._client is not None and cls._pid == os.getpid()
+        stats["max_pool_size"] = conf["max_pool_size"]
+        stats["min_pool_size"] = conf["min_pool_size"]
+        return stats
+
+    @classmethod
+    def query_stats(cls, reset: bool = False) -> dict:
+        """按DAO方法汇总的命令耗时和最近的慢查询"""
+        stats = cls._query_listener.snapshot()
+        if reset:
+            cls._query_listener.reset()
+        return stats
+
     @classmethod
     def close(cls):
-        cls._client.close()
\ No newline at end of file
+        with cls._lock:
+            cls._close_locked()
+
+    @classmethod
+    def _close_locked(cls):
+        if cls._client is not None and cls._pid == os.getpid():
+            cls._client.close()
+        cls._client = None
+        cls._pid = None
+        cls._collections = {}
+
+    @classmethod
+    def _after_fork(cls):
+        cls._client = None
+        cls._pid = None
+        cls._collections = {}
+        cls._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=DBUtil._after_fork)
@@ -0,0 +1,134 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from bson import ObjectId
+from flask import Response, stream_with_context
+from util.serialize import default as _default, dumps
+
+# 支持的导出格式及对应的 Content-Type
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "json": "application/json; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+# 每积累这么多行输出一次，减少小块写入
+ROWS_PER_CHUNK = 200
+
+
+def _dumps(doc) -> str:
+    return dumps(doc).decode()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (ObjectId, datetime)):
+        return _default(value)
+    return value
+
+
+def stream_csv(docs, fieldnames: list):
+    """把文档迭代器编码为CSV文本块"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    rows = 0
+    for doc in docs:
+        writer.writerow([_csv_value(doc.get(field)) for field in fieldnames])
+        rows += 1
+        if rows % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_json(docs):
+    """把文档迭代器编码为JSON数组文本块"""
+    parts = ["["]
+    first = True
+    for doc in docs:
+        parts.append(("\n" if first else ",\n") + _dumps(doc))
+        first = False
+        if len(parts) >= ROWS_PER_CHUNK:
+            yield "".join(parts)
+            parts = []
+    parts.append("\n]\n" if not first else "]\n")
+    yield "".join(parts)
+
+
+def stream_ndjson(docs):
+    """把文档迭代器编码为每行一个JSON对象的文本块"""
+    parts = []
+    for doc in docs:
+        parts.append(_dumps(doc) + "\n")
+        if len(parts) >= ROWS_PER_CHUNK:
+            yield "".join(parts)
+            parts = []
+    if parts:
+        yield "".join(parts)
+
+
+def stream_export(docs, fmt: str, fieldnames: list):
+    """按格式返回文本块生成器
+
+    Args:
+        docs: 文档迭代器（通常是Mongo游标）
+        fmt: csv / json / ndjson
+        fieldnames: CSV 列名，同时决定 JSON 输出的字段
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "csv":
+        return stream_csv(docs, fieldnames)
+    selected = ({field: doc[field] for field in fieldnames if field in doc} for doc in docs)
+    if fmt == "json":
+        return stream_json(selected)
+    return stream_ndjson(selected)
+
+
+def _counted(docs, progress, every: int):
+    count = 0
+    for doc in docs:
+        yield doc
+        count += 1
+        if count % every == 0:
+            progress(count)
+    progress(count)
+
+
+def write_export(file_path: str, docs, fmt: str, fieldnames: list, progress=None):
+    """把导出内容逐块写入本地文件
+
+    Args:
+        progress: 每导出 ROWS_PER_CHUNK 行调用一次 progress(已导出行数)，可抛出异常中止导出
+    """
+    if progress is not None:
+        docs = _counted(docs, progress, ROWS_PER_CHUNK)
+    newline = "" if fmt == "csv" else None
+    with open(file_path, "w", newline=newline, encoding="utf-8") as f:
+        for chunk in stream_export(docs, fmt, fieldnames):
+            f.write(chunk)
+
+
+def export_response(docs, fmt: str, fieldnames: list, filename: str) -> Response:
+    """构造分块传输的下载响应，数据边读边发，不落盘"""
+    return Response(
+        stream_with_context(stream_export(docs, fmt, fieldnames)),
+        content_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def run_export_job(job, docs, fmt: str, fieldnames: list, filename: str) -> dict:
+    """后台导出任务：写入临时文件并登记到任务，完成后可通过 /jobs/<id>/result 下载"""
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    job.files.append(path)
+    write_export(path, docs, fmt, fieldnames, progress=job.progress)
+    return {"filename": f"{filename}.{fmt}", "rows": job.processed}
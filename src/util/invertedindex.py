@@ -0,0 +1,196 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from util.search import normalize
+from util.serialize import dumps, loads
+
+# 英文/数字按单词切分，中日韩文字按相邻两字切分
+_WORD_RE = re.compile(r"[0-9a-z]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+SNAPSHOT_VERSION = 2
+
+
+def tokenize(text) -> list:
+    """把文本切分为检索词，英文按单词，中文按两字组合（单个汉字保留为一个词）"""
+    result = []
+    for run in _WORD_RE.findall(normalize(text or "")):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                result.append(run)
+            else:
+                result.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            result.append(run)
+    return result
+
+
+class InvertedIndex:
+    """进程内倒排索引，使用 BM25 打分
+
+    文档ID可以是任意可哈希的值（帖子使用 ObjectId）。所有方法线程安全。
+
+    Args:
+        k1: BM25 词频饱和参数
+        b: BM25 文档长度归一化参数
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._doc_len = {}
+            self._total_len = 0
+
+    def replace(self, other: "InvertedIndex"):
+        """用另一个索引的内容替换本索引(不复制，other 此后不应再修改)
+
+        在单独的索引上建立好后调用，只在交换内容时短暂持有锁。
+        """
+        with other._lock, self._lock:
+            self._postings = other._postings
+            self._doc_terms = other._doc_terms
+            self._doc_len = other._doc_len
+            self._total_len = other._total_len
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_len
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def doc_ids(self) -> list:
+        with self._lock:
+            return list(self._doc_len)
+
+    def add(self, doc_id, text: str):
+        """加入或替换一篇文档"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc_id] = tf
+            self._doc_terms[doc_id] = tuple(terms)
+            length = sum(terms.values())
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> tuple:
+        """按 BM25 得分返回匹配的文档
+
+        Returns:
+            tuple: ([(doc_id, score), ...], 匹配的文档总数)
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return [], 0
+        with self._lock:
+            n = len(self._doc_len)
+            if n == 0:
+                return [], 0
+            avg_len = self._total_len / n
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[offset:offset + limit], len(ranked)
+
+    def save(self, path: str, meta: dict = None, encode_id=str):
+        """把索引写入 JSON 快照文件（先写临时文件再替换，避免写到一半的快照）
+
+        只保存倒排表和文档长度，文档的词表在加载时由倒排表还原。
+
+        Args:
+            meta: 随快照保存的附加信息，必须能编码为 JSON
+            encode_id: 把文档ID转换为 JSON 字符串的函数
+        """
+        with self._lock:
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "meta": meta or {},
+                "postings": {term: [[encode_id(doc_id), tf] for doc_id, tf in postings.items()]
+                             for term, postings in self._postings.items()},
+                "doc_len": [[encode_id(doc_id), length] for doc_id, length in self._doc_len.items()],
+            }
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(dumps(state))
+        os.replace(tmp_path, path)
+
+    def load(self, path: str, decode_id=str) -> dict:
+        """从 JSON 快照恢复索引；快照只包含数据，不会执行任何代码
+
+        Args:
+            decode_id: 把快照中的字符串还原为文档ID的函数，格式不对时应抛出 ValueError/TypeError
+
+        Returns:
+            dict: 保存快照时传入的 meta
+
+        Raises:
+            ValueError: 快照不存在、格式错误或版本不兼容
+        """
+        try:
+            with open(path, "rb") as f:
+                state = loads(f.read())
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot load index snapshot {path}: {e}")
+        if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+            version = state.get("version") if isinstance(state, dict) else None
+            raise ValueError(f"Unsupported index snapshot version: {version}")
+        try:
+            doc_len = {decode_id(doc_id): int(length) for doc_id, length in state["doc_len"]}
+            postings, doc_terms = {}, {}
+            for term, entries in state["postings"].items():
+                term_postings = postings[str(term)] = {}
+                for doc_id, tf in entries:
+                    doc_id = decode_id(doc_id)
+                    if doc_id not in doc_len:
+                        raise ValueError(f"unknown document {doc_id}")
+                    term_postings[doc_id] = int(tf)
+                    doc_terms.setdefault(doc_id, []).append(str(term))
+            meta = state.get("meta") or {}
+            if not isinstance(meta, dict):
+                raise ValueError("meta is not an object")
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise ValueError(f"Invalid index snapshot {path}: {e}")
+        with self._lock:
+            self._postings = postings
+            self._doc_terms = {doc_id: tuple(doc_terms.get(doc_id, ())) for doc_id in doc_len}
+            self._doc_len = doc_len
+            self._total_len = sum(doc_len.values())
+        return meta
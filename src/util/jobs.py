@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """任务被取消时由 Job.progress 抛出，中断正在执行的导入/导出"""
+
+
+def remove_file(path: str):
+    """删除任务用到的本地文件，文件已不存在时忽略"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@dataclass
+class Job:
+    kind: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    processed: int = 0
+    failed: int = 0
+    result: object = None
+    error: str = None
+    # 任务产生的本地文件（如导出结果），任务记录被丢弃或进程退出时删除
+    files: list = field(default_factory=list)
+    # 任务结束(包括开始前被取消)时调用一次，用于删除上传的临时文件等
+    cleanup: object = field(default=None, repr=False)
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def progress(self, processed: int, failed: int = 0):
+        """由任务函数定期调用以上报进度；任务已被取消时抛出 JobCancelled"""
+        self.processed = processed
+        self.failed = failed
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} cancelled")
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def to_dict(self) -> dict:
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "processed": self.processed,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+            "rows_per_second": round(self.processed / elapsed, 1) if elapsed else 0.0,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """在后台线程池中执行长时间任务，任务状态保存在进程内
+
+    Args:
+        max_workers: 同时执行的任务数
+        max_jobs: 保留的任务记录数，超过后丢弃最早完成的任务
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn, *args, files: list = None, cleanup=None, **kwargs) -> Job:
+        """提交任务，fn(job, *args, **kwargs) 的返回值作为任务结果
+
+        cleanup() 在任务结束后调用；任务没有机会执行(开始前被取消、进程退出)时在
+        丢弃任务记录或 shutdown 时调用。
+        """
+        job = Job(kind=kind, files=list(files or []), cleanup=cleanup)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune_locked()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn, args, kwargs):
+        try:
+            if job.cancel_requested:
+                job.status = CANCELLED
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.result = fn(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._cleanup(job)
+
+    @staticmethod
+    def _cleanup(job: Job, remove_files: bool = False):
+        """调用任务的 cleanup(只调用一次)；remove_files 时同时删除任务产生的文件"""
+        cleanup, job.cleanup = job.cleanup, None
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception:
+                pass
+        if remove_files:
+            for path in job.files:
+                remove_file(path)
+
+    def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(f"No job found with id: {job_id}")
+        return job
+
+    def list(self) -> list:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Job:
+        """请求取消任务；正在运行的任务在下一次上报进度时停止"""
+        job = self.get(job_id)
+        if job.status not in FINISHED:
+            job._cancel.set()
+        return job
+
+    def _prune_locked(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        finished = sorted((j for j in self._jobs.values() if j.status in FINISHED),
+                          key=lambda j: j.finished_at)
+        for job in finished[:len(self._jobs) - self.max_jobs]:
+            del self._jobs[job.id]
+            self._cleanup(job, remove_files=True)
+
+    def shutdown(self):
+        """取消所有任务并删除它们的临时文件和结果文件，不等待正在执行的任务"""
+        job_list = self.list()
+        for job in job_list:
+            job._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for job in job_list:
+            self._cleanup(job, remove_files=True)
+
+
+# 进程内共享的任务管理器
+jobs = JobManager()
@@ -0,0 +1,100 @@
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Reader:
+    """按块读取文件，二进制流按 UTF-8 增量解码"""
+
+    def __init__(self, fp, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.eof = False
+
+    def read(self) -> str:
+        if self.eof:
+            return ""
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return self.decoder.decode(b"", final=True)
+        if isinstance(chunk, str):
+            return chunk
+        return self.decoder.decode(chunk)
+
+
+def iter_json_array(fp, chunk_size: int = CHUNK_SIZE):
+    """逐个产出顶层JSON数组中的元素，不把整个文件读入内存
+
+    Args:
+        fp: 以文本或二进制模式打开的文件对象（也可以是上传文件的流）
+        chunk_size: 每次读取的字节/字符数
+
+    Yields:
+        数组中的每个元素
+
+    Raises:
+        ValueError: 内容不是合法的JSON数组
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(fp, chunk_size)
+    buf = ""
+    pos = 0
+
+    def skip_ws():
+        nonlocal buf, pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or reader.eof:
+                return
+            buf, pos = reader.read(), 0
+
+    skip_ws()
+    if pos < len(buf) and buf[pos] == "\ufeff":
+        pos += 1
+        skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("JSON content must be an array")
+    pos += 1
+
+    expect_value = True
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of JSON array")
+        ch = buf[pos]
+        if ch == "]" and (first or not expect_value):
+            return
+        if not expect_value:
+            if ch != ",":
+                raise ValueError(f"Expected ',' or ']' at offset {pos}")
+            pos += 1
+            expect_value = True
+            continue
+
+        # 解码一个元素；数据不完整时继续读取下一块再重试
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # 数字等标量可能被块边界截断，确认其后还有内容
+                if end < len(buf) or reader.eof:
+                    break
+            except json.JSONDecodeError as e:
+                if reader.eof:
+                    raise ValueError(f"Invalid JSON: {e}")
+            more = reader.read()
+            buf = buf[pos:] + more
+            pos = 0
+        pos = end
+        first = False
+        expect_value = False
+        yield value
+
+        # 丢弃已解析的前缀，保持缓冲区较小
+        if pos > chunk_size:
+            buf = buf[pos:]
+            pos = 0
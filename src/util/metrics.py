@@ -0,0 +1,174 @@
+import os
+import threading
+import time
+from flask import Response, g, request
+
+from util.dbutil import DBUtil, start_db_tracking, stop_db_tracking
+
+# 请求耗时直方图的桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 每个请求的数据库命令数直方图的桶
+DB_COMMAND_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# 为 true 时在响应中加上 Server-Timing 头，浏览器开发者工具可直接看到应用和数据库耗时
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "false").lower() == "true"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """固定桶的累积直方图，格式与 Prometheus histogram 一致"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class RequestMetrics:
+    """按路由和方法统计请求耗时、状态码、并发数以及每个请求的数据库往返"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency = {}
+            self.db_commands = {}
+            self.db_latency = {}
+            self.statuses = {}
+            self.in_flight = {}
+
+    def started(self, endpoint: str):
+        with self._lock:
+            self.in_flight[endpoint] = self.in_flight.get(endpoint, 0) + 1
+
+    def finished(self, endpoint: str):
+        with self._lock:
+            self.in_flight[endpoint] -= 1
+
+    def observe(self, endpoint: str, method: str, status: int, seconds: float,
+                db_commands: int, db_seconds: float):
+        key = (endpoint, method)
+        with self._lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.db_commands[key] = Histogram(DB_COMMAND_BUCKETS)
+                self.db_latency[key] = Histogram(LATENCY_BUCKETS)
+            self.latency[key].observe(seconds)
+            self.db_commands[key].observe(db_commands)
+            self.db_latency[key].observe(db_seconds)
+            status_key = (endpoint, method, status)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, "http_request_duration_seconds",
+                                    "Request latency by route", self.latency)
+            self._render_histograms(lines, "http_request_db_commands",
+                                    "Database round-trips per request", self.db_commands)
+            self._render_histograms(lines, "http_request_db_duration_seconds",
+                                    "Database time per request", self.db_latency)
+            lines.append("# HELP http_requests_total Requests by route and status")
+            lines.append("# TYPE http_requests_total counter")
+            for (endpoint, method, status), count in sorted(self.statuses.items()):
+                lines.append(f"http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+            lines.append("# HELP http_requests_in_flight Requests currently being served")
+            lines.append("# TYPE http_requests_in_flight gauge")
+            for endpoint, count in sorted(self.in_flight.items()):
+                lines.append(f"http_requests_in_flight{_labels(endpoint=endpoint)} {count}")
+
+        pool = DBUtil.pool_stats()
+        lines.append("# HELP mongo_pool_connections Connections in the MongoDB pool")
+        lines.append("# TYPE mongo_pool_connections gauge")
+        lines.append(f'mongo_pool_connections{{state="open"}} {pool["connections_open"]}')
+        lines.append(f'mongo_pool_connections{{state="in_use"}} {pool["in_use"]}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histograms(lines: list, name: str, help_text: str, histograms: dict):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (endpoint, method), hist in sorted(histograms.items()):
+            for bound, count in zip(hist.buckets, hist.counts):
+                lines.append(f"{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {count}")
+            lines.append(f"{name}_bucket{_labels(endpoint=endpoint, method=method, le='+Inf')} {hist.count}")
+            lines.append(f"{name}_sum{_labels(endpoint=endpoint, method=method)} {hist.sum:.6f}")
+            lines.append(f"{name}_count{_labels(endpoint=endpoint, method=method)} {hist.count}")
+
+
+# 进程内共享的请求指标
+request_metrics = RequestMetrics()
+
+
+def _endpoint() -> str:
+    # 用路由模板而不是实际路径作为标签，避免 /jobs/<id> 之类的路径产生无限多的序列
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_endpoint = _endpoint()
+    g.metrics_db = start_db_tracking()
+    g.metrics_recorded = False
+    request_metrics.started(g.metrics_endpoint)
+
+
+def _record(status: int):
+    elapsed = time.perf_counter() - g.metrics_start
+    commands, db_seconds = g.metrics_db
+    request_metrics.observe(g.metrics_endpoint, request.method, status, elapsed, commands, db_seconds)
+    g.metrics_recorded = True
+    return elapsed, commands, db_seconds
+
+
+def _after_request(response):
+    if "metrics_start" not in g:
+        return response
+    elapsed, commands, db_seconds = _record(response.status_code)
+    if SERVER_TIMING:
+        response.headers.add(
+            "Server-Timing",
+            f'app;dur={elapsed * 1000:.1f}, db;dur={db_seconds * 1000:.1f};desc="{commands} commands"'
+        )
+    return response
+
+
+def _teardown_request(exc):
+    if "metrics_start" not in g:
+        return
+    if not g.metrics_recorded:
+        # 未处理的异常不会经过 after_request
+        _record(500)
+    request_metrics.finished(g.metrics_endpoint)
+    stop_db_tracking()
+
+
+def metrics_view():
+    return Response(request_metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_app(app, url: str = "/metrics"):
+    """注册请求计时钩子和 Prometheus 抓取地址"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule(url, "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,122 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# 批量查询一次最多接受的ID数
+MAX_BATCH_IDS = 500
+# 批量查询时每个ID最多返回的记录数
+DEFAULT_PER_USER = 10
+MAX_PER_USER = 100
+
+
+def parse_limit(value, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """解析分页大小参数，限制在 1..maximum 之间"""
+    if value is None or value == "":
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid limit: {value}")
+    return max(1, min(limit, maximum))
+
+
+def parse_batch_ids(data, field: str, maximum: int = MAX_BATCH_IDS) -> list:
+    """从请求体中取出ID列表，去重并保持顺序
+
+    Raises:
+        ValueError: 字段缺失、不是字符串列表或超过 maximum 个
+    """
+    ids = (data or {}).get(field)
+    if not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+        raise ValueError(f"{field} must be a list of strings")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > maximum:
+        raise ValueError(f"Too many ids: {len(ids)} > {maximum}")
+    return ids
+
+
+def encode_cursor(_id: ObjectId, date: datetime = None) -> str:
+    """把最后一条记录的排序键编码为不透明的游标字符串"""
+    payload = {"id": str(_id)}
+    if date is not None:
+        payload["date"] = date.isoformat()
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """解析 encode_cursor 生成的游标
+
+    Returns:
+        dict: {"id": ObjectId, "date": datetime 或 None}
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date = payload.get("date")
+        return {
+            "id": ObjectId(payload["id"]),
+            "date": datetime.fromisoformat(date) if date else None,
+        }
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def parse_page_args(args) -> tuple:
+    """从请求参数中读取 limit 和 after，游标格式错误时抛出 ValueError
+
+    Returns:
+        tuple: (limit, after)
+    """
+    limit = parse_limit(args.get("limit"))
+    after = args.get("after") or None
+    if after:
+        decode_cursor(after)
+    return limit, after
+
+
+def parse_date(value) -> datetime:
+    """解析 ISO 8601 日期或时间(也接受 datetime)，带时区时转换为本地时间(发布时间按本地时间保存)"""
+    if isinstance(value, datetime):
+        date = value
+    else:
+        try:
+            date = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date: {value}")
+    if date.tzinfo is not None:
+        date = date.astimezone().replace(tzinfo=None)
+    return date
+
+
+def parse_timeline_args(args) -> tuple:
+    """读取帖子时间线参数：limit、before 游标(兼容 after)和发布时间范围 [since, until)
+
+    Returns:
+        tuple: (limit, before, since, until)，未提供的为 None
+    """
+    limit = parse_limit(args.get("limit"))
+    before = args.get("before") or args.get("after") or None
+    if before and decode_cursor(before)["date"] is None:
+        raise ValueError(f"Invalid cursor: {before}")
+    since = parse_date(args["since"]) if args.get("since") else None
+    until = parse_date(args["until"]) if args.get("until") else None
+    return limit, before, since, until
+
+
+def parse_count_mode(args):
+    """读取 count 参数: true/estimated 使用估算总数, exact 精确计数, 其余不计数
+
+    Returns:
+        bool | None: 是否估算；None 表示不需要总数
+    """
+    mode = (args.get("count") or "").lower()
+    if mode in ("true", "estimated"):
+        return True
+    if mode == "exact":
+        return False
+    return None
@@ -0,0 +1,146 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import bcrypt
+
+# bcrypt 工作因子，可通过环境变量 BCRYPT_ROUNDS 调整
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# 哈希线程数和排队上限，超过上限的请求直接拒绝
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", os.cpu_count() or 2))
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", 64))
+# 批量导入时并行哈希的进程数，默认留出一个核心处理请求，且不超过哈希线程数
+IMPORT_HASH_WORKERS = int(os.environ.get("IMPORT_HASH_WORKERS",
+                                         max(1, min(HASH_WORKERS, (os.cpu_count() or 2) - 1))))
+
+
+class HashPoolBusy(Exception):
+    """哈希线程池已满，调用方应返回 429 让客户端稍后重试"""
+
+
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> tuple:
+    """生成盐值并哈希密码
+
+    Returns:
+        tuple: (哈希后的密码, 盐值)，均为字符串
+    """
+    salt = bcrypt.gensalt(rounds)
+    hashed = bcrypt.hashpw(password.encode(), salt)
+    return hashed.decode(), salt.decode()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+def hash_rounds(hashed: str) -> int:
+    """从 $2b$12$... 格式的哈希中读取工作因子"""
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    """存储的哈希工作因子与当前配置不同时需要重新哈希"""
+    return hash_rounds(hashed) != rounds
+
+
+def hash_passwords(passwords: list, executor: ProcessPoolExecutor = None,
+                   rounds: int = BCRYPT_ROUNDS) -> list:
+    """批量哈希密码，分发到进程池并行计算，结果顺序与输入一致
+
+    Args:
+        passwords: 明文密码列表
+        executor: 进程池；为空时在当前进程串行计算
+        rounds: bcrypt 工作因子
+    """
+    if executor is None or len(passwords) < 2:
+        return [hash_password(p, rounds) for p in passwords]
+    return list(executor.map(hash_password, passwords, [rounds] * len(passwords),
+                             chunksize=max(1, len(passwords) // 32)))
+
+
+class HashPool:
+    """执行 bcrypt 计算的有界线程池
+
+    bcrypt 计算时释放GIL，放到独立线程池中可避免占满Web工作线程。
+    正在执行和排队的任务总数超过 max_workers + max_pending 时
+    submit 抛出 HashPoolBusy。
+    """
+
+    def __init__(self, max_workers: int = HASH_WORKERS, max_pending: int = HASH_QUEUE_LIMIT):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashPoolBusy("Password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """提交并等待结果"""
+        return self.submit(fn, *args).result()
+
+    def hash(self, password: str) -> tuple:
+        return self.run(hash_password, password)
+
+    def check(self, password: str, hashed: str) -> bool:
+        return self.run(check_password, password, hashed)
+
+    async def run_async(self, fn, *args):
+        """提交并在事件循环中等待结果，不阻塞其他协程"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def hash_async(self, password: str) -> tuple:
+        return await self.run_async(hash_password, password)
+
+    async def check_async(self, password: str, hashed: str) -> bool:
+        return await self.run_async(check_password, password, hashed)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+# 进程内共享的哈希线程池
+hash_pool = HashPool()
+
+
+class ImportHashPool:
+    """批量导入共用的哈希进程池，首次使用时创建，进程数固定
+
+    子进程用 forkserver(不支持时用 spawn)启动而不是 fork：Web 进程中已经运行着数据库连接、
+    哈希线程池和监听线程，fork 会复制其他线程持有的锁，子进程可能死锁。
+    """
+
+    def __init__(self, max_workers: int = IMPORT_HASH_WORKERS):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# 进程内共享的导入哈希进程池
+import_hash_pool = ImportHashPool()
@@ -0,0 +1,222 @@
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import monitoring
+
+logger = logging.getLogger("dao.slow_query")
+
+# 超过该耗时(毫秒)的命令记入慢查询日志
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 100))
+# 为 true 时对慢查询在后台执行一次 explain，标记全集合扫描
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+# 保留的最近慢查询条数
+SLOW_QUERY_HISTORY = 100
+
+# 命令中携带查询条件的位置
+_FILTER_KEYS = {"find": "filter", "count": "query", "distinct": "query", "findAndModify": "query"}
+# 可以 explain 的命令
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# 不参与 explain 的命令字段(会话、集群时间等由驱动附加)
+_SESSION_KEYS = {"lsid", "txnNumber", "$clusterTime", "$db", "$readPreference", "autocommit", "startTransaction"}
+
+# 当前正在执行的 DAO 方法
+_current_method = contextvars.ContextVar("dao_method", default=None)
+# 后台 explain 发出的命令不计入统计
+_explaining = contextvars.ContextVar("explaining", default=False)
+
+
+def track_dao(cls):
+    """类装饰器：把公开方法中发出的数据库命令归到 "类名.方法名" 下"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attr):
+            continue
+        setattr(cls, name, _traced(attr, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _traced(fn, label: str):
+    if inspect.iscoroutinefunction(fn):
+        # 协程方法在 await 时才执行，需要在协程内部设置当前方法
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            token = _current_method.set(label)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                _current_method.reset(token)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current_method.set(label)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current_method.reset(token)
+    return wrapper
+
+
+def filter_shape(value):
+    """把查询条件中的具体值替换为 "?"，只保留字段名和操作符，便于合并同类查询"""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [filter_shape(item) for item in value]
+        return ["?"] if value else []
+    return "?"
+
+
+def command_filter(name: str, command: dict):
+    """取出命令中的查询条件"""
+    if name in _FILTER_KEYS:
+        return command.get(_FILTER_KEYS[name]) or {}
+    if name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        return pipeline[0].get("$match", {}) if pipeline else {}
+    if name in ("update", "delete"):
+        statements = command.get("updates" if name == "update" else "deletes") or []
+        return statements[0].get("q", {}) if statements else {}
+    return {}
+
+
+def _has_collscan(plan) -> bool:
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(item) for item in plan)
+    return False
+
+
+class QueryStatsListener(monitoring.CommandListener):
+    """记录每条命令的耗时并归到发出它的 DAO 方法，超过阈值的命令写入慢查询日志"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._pending = {}
+        # 游标ID -> 打开游标的方法，用于归属之后的 getMore
+        self._cursors = OrderedDict()
+        self._explained = set()
+        self._explainer = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+            self.slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)
+
+    def started(self, event):
+        if _explaining.get():
+            return
+        method = _current_method.get()
+        if method is None and event.command_name == "getMore":
+            method = self._cursors.get(event.command.get("getMore"))
+        self._pending[(event.connection_id, event.request_id)] = (method or "unattributed", event.command)
+
+    def succeeded(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        cursor = event.reply.get("cursor") if isinstance(event.reply, dict) else None
+        if cursor and cursor.get("id"):
+            with self._lock:
+                self._cursors[cursor["id"]] = pending[0]
+                while len(self._cursors) > 1000:
+                    self._cursors.popitem(last=False)
+        self._record(event, pending, failed=False)
+
+    def failed(self, event):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is not None:
+            self._record(event, pending, failed=True)
+
+    def _record(self, event, pending: tuple, failed: bool):
+        method, command = pending
+        name = event.command_name
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            stats = self.methods.get(method)
+            if stats is None:
+                stats = self.methods[method] = {
+                    "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "slow": 0, "collscans": 0, "commands": {},
+                }
+            stats["calls"] += 1
+            stats["errors"] += failed
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["commands"][name] = stats["commands"].get(name, 0) + 1
+            if duration_ms < self.slow_ms:
+                return
+            stats["slow"] += 1
+            collection = command.get(name) if isinstance(command.get(name), str) else None
+            shape = filter_shape(command_filter(name, command))
+            entry = {
+                "time": time.time(), "method": method, "command": name, "collection": collection,
+                "filter": shape, "duration_ms": round(duration_ms, 3),
+            }
+            self.slow_queries.append(entry)
+        logger.warning("Slow query %.1fms in %s: %s %s filter=%s",
+                       duration_ms, method, name, collection, shape)
+        if self.explain and name in _EXPLAINABLE:
+            self._schedule_explain(event.database_name, command, method, entry)
+
+    def _schedule_explain(self, database: str, command: dict, method: str, entry: dict):
+        key = (method, entry["command"], entry["collection"], repr(entry["filter"]))
+        with self._lock:
+            if key in self._explained:
+                return
+            self._explained.add(key)
+            if self._explainer is None:
+                self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        explain_command = {k: v for k, v in command.items() if k not in _SESSION_KEYS}
+        self._explainer.submit(self._explain, database, explain_command, method, entry)
+
+    def _explain(self, database: str, command: dict, method: str, entry: dict):
+        from util.dbutil import DBUtil
+
+        _explaining.set(True)
+        try:
+            plan = DBUtil.get_client()[database].command(
+                {"explain": command, "verbosity": "queryPlanner"})
+        except Exception as e:
+            logger.info("explain failed for %s: %s", method, e)
+            return
+        if _has_collscan(plan.get("queryPlanner", plan)):
+            with self._lock:
+                if method in self.methods:
+                    self.methods[method]["collscans"] += 1
+                entry["collscan"] = True
+            logger.warning("Collection scan in %s: %s %s filter=%s",
+                           method, entry["command"], entry["collection"], entry["filter"])
+
+    def snapshot(self) -> dict:
+        """按总耗时倒序返回各方法的统计和最近的慢查询"""
+        with self._lock:
+            methods = []
+            for method, stats in self.methods.items():
+                methods.append({
+                    "method": method,
+                    **stats,
+                    "commands": dict(stats["commands"]),
+                    "total_ms": round(stats["total_ms"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "avg_ms": round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else 0.0,
+                })
+            methods.sort(key=lambda item: item["total_ms"], reverse=True)
+            return {
+                "slow_query_ms": self.slow_ms,
+                "explain": self.explain,
+                "methods": methods,
+                "slow_queries": list(self.slow_queries),
+            }
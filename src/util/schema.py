@@ -0,0 +1,71 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from util.dbutil import DBUtil
+from util import search
+
+# 所有集合的索引声明，启动时统一创建，DAO构造函数中不再建索引
+INDEXES = {
+    "users": [
+        IndexModel([("phone_number", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("nickname", ASCENDING)], unique=True),
+        # 搜索字段：规范化小写前缀和 n-gram 多键索引，见 util.search
+        IndexModel([("nickname_lc", ASCENDING)]),
+        IndexModel([("nickname_ngrams", ASCENDING)]),
+    ],
+    "admins": [
+        IndexModel([("adminAccount", ASCENDING)], unique=True),
+        IndexModel([("adminName_lc", ASCENDING)]),
+        IndexModel([("adminName_ngrams", ASCENDING)]),
+    ],
+    "posts": [
+        # 用户时间线：按用户筛选、按 (date, _id) 倒序分页和时间范围，也服务只按 user_id 的查询
+        IndexModel([("user_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]),
+        # 同时服务按日期排序和 (date, _id) 游标分页
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("title", ASCENDING)]),
+        IndexModel([("title_lc", ASCENDING)]),
+        IndexModel([("title_ngrams", ASCENDING)]),
+        # 从快照恢复倒排索引时查找快照之后修改过的帖子
+        IndexModel([("updated_at", ASCENDING)]),
+    ],
+    # 物化统计，按帖子数取发帖最多的用户，见 util.stats
+    "stats": [
+        IndexModel([("kind", ASCENDING), ("posts", DESCENDING)]),
+    ],
+}
+
+# 需要维护派生搜索字段的集合和字段
+SEARCH_FIELDS = {
+    "users": "nickname",
+    "admins": "adminName",
+    "posts": "title",
+}
+
+
+def ensure_indexes() -> dict:
+    """创建 INDEXES 中声明的全部索引（已存在的索引不会重复创建）
+
+    Returns:
+        dict: 集合名 -> 索引名列表
+    """
+    created = {}
+    for name, indexes in INDEXES.items():
+        created[name] = DBUtil.collection(name).create_indexes(indexes)
+    return created
+
+
+def backfill_search_fields() -> dict:
+    """为旧文档补全派生搜索字段
+
+    Returns:
+        dict: 集合名 -> 更新的文档数
+    """
+    return {name: search.backfill(DBUtil.collection(name), field)
+            for name, field in SEARCH_FIELDS.items()}
+
+
+if __name__ == "__main__":
+    for collection, names in ensure_indexes().items():
+        print(f"{collection}: {', '.join(names)}")
+    for collection, count in backfill_search_fields().items():
+        print(f"{collection}: backfilled {count} documents")
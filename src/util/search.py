@@ -0,0 +1,145 @@
+import re
+import unicodedata
+
+# 搜索参数
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_QUERY_LENGTH = 64
+
+
+def normalize(text) -> str:
+    """统一全角/半角并转为小写，用于建立和匹配搜索字段"""
+    return unicodedata.normalize("NFKC", str(text)).casefold().strip()
+
+
+def tokens(text) -> list:
+    """生成单字和相邻两字的 n-gram，中英文都按字符切分
+
+    例如 "Hi 张三" -> ["h", "i", "hi", "张", "三", "张三"]（顺序不保证）
+    """
+    value = normalize(text)
+    grams = set()
+    for i, ch in enumerate(value):
+        if ch.isspace():
+            continue
+        grams.add(ch)
+        if i + 1 < len(value) and not value[i + 1].isspace():
+            grams.add(value[i:i + 2])
+    return sorted(grams)
+
+
+def _query_tokens(query: str) -> list:
+    """子串查询用的 n-gram：长度为1时用单字，否则只用两字组合"""
+    if len(query) == 1:
+        return [query]
+    grams = {query[i:i + 2] for i in range(len(query) - 1)
+             if not query[i].isspace() and not query[i + 1].isspace()}
+    return sorted(grams) or [ch for ch in query if not ch.isspace()][:1]
+
+
+def search_fields(field: str, value) -> dict:
+    """返回需要和原字段一起写入文档的派生搜索字段"""
+    return {f"{field}_lc": normalize(value), f"{field}_ngrams": tokens(value)}
+
+
+def search_projection(field: str) -> dict:
+    """查询结果中排除派生搜索字段的投影"""
+    return {f"{field}_lc": 0, f"{field}_ngrams": 0}
+
+
+def _rank(value: str, query: str) -> tuple:
+    if value == query:
+        rank = 0
+    elif value.startswith(query):
+        rank = 1
+    else:
+        rank = 2
+    return rank, len(value), value
+
+
+def _prepare(field: str, query: str, limit: int, projection: dict):
+    """规范化输入，返回 (q, limit, projection, 前缀查询)；输入为空时返回 None"""
+    q = normalize(query)[:MAX_QUERY_LENGTH]
+    if not q:
+        return None
+    limit = max(1, min(limit, MAX_LIMIT))
+    if projection is None:
+        projection = search_projection(field)
+    prefix_query = {f"{field}_lc": {"$regex": "^" + re.escape(q)}}
+    return q, limit, projection, prefix_query
+
+
+def _substring_query(field: str, q: str, found: list) -> dict:
+    """n-gram 候选 + 子串正则，排除已经按前缀找到的文档"""
+    return {
+        f"{field}_ngrams": {"$all": _query_tokens(q)},
+        f"{field}_lc": {"$regex": re.escape(q)},
+        "_id": {"$nin": [doc["_id"] for doc in found]},
+    }
+
+
+def search(collection, field: str, query: str, limit: int = DEFAULT_LIMIT, projection: dict = None) -> list:
+    """按前缀和子串搜索 field 字段并排序
+
+    先用 <field>_lc 索引做前缀匹配，结果不足 limit 时再用 <field>_ngrams
+    多键索引找出包含全部 n-gram 的候选并用转义后的正则确认子串。
+    结果按 完全匹配 > 前缀匹配 > 子串匹配、长度从短到长排序。
+
+    Args:
+        collection: Mongo集合
+        field: 被搜索的原字段名
+        query: 用户输入，作为普通文本处理（会被转义）
+        limit: 最多返回的条数
+        projection: 结果投影，默认只排除派生搜索字段
+    """
+    prepared = _prepare(field, query, limit, projection)
+    if prepared is None:
+        return []
+    q, limit, projection, prefix_query = prepared
+
+    # 前缀匹配按 _lc 升序，完全匹配的文档排在最前
+    results = list(collection.find(prefix_query, projection).sort(f"{field}_lc", 1).limit(limit))
+    if len(results) < limit:
+        results += list(
+            collection.find(_substring_query(field, q, results), projection).limit(limit - len(results))
+        )
+    results.sort(key=lambda doc: _rank(normalize(doc.get(field, "")), q))
+    return results
+
+
+async def search_async(collection, field: str, query: str, limit: int = DEFAULT_LIMIT,
+                       projection: dict = None) -> list:
+    """search 的异步版本，collection 为 AsyncMongoClient 的集合"""
+    prepared = _prepare(field, query, limit, projection)
+    if prepared is None:
+        return []
+    q, limit, projection, prefix_query = prepared
+
+    results = await collection.find(prefix_query, projection).sort(f"{field}_lc", 1).limit(limit).to_list()
+    if len(results) < limit:
+        results += await collection.find(
+            _substring_query(field, q, results), projection).limit(limit - len(results)).to_list()
+    results.sort(key=lambda doc: _rank(normalize(doc.get(field, "")), q))
+    return results
+
+
+def backfill(collection, field: str, batch_size: int = 1000) -> int:
+    """为缺少派生搜索字段的旧文档补全字段
+
+    Returns:
+        int: 更新的文档数
+    """
+    from pymongo import UpdateOne
+
+    updated = 0
+    ops = []
+    cursor = collection.find({f"{field}_ngrams": {"$exists": False}, field: {"$exists": True}},
+                             {field: 1}).batch_size(batch_size)
+    for doc in cursor:
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": search_fields(field, doc[field])}))
+        if len(ops) >= batch_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
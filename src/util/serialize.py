@@ -0,0 +1,58 @@
+import json
+from datetime import date, datetime
+from bson import ObjectId
+from flask import make_response
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖，未安装时使用标准库
+    orjson = None
+
+# 当前使用的编码后端
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def default(value):
+    """编码器无法处理的类型：ObjectId 转为字符串，日期转为 ISO 8601"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    """把响应数据编码为 UTF-8 JSON，直接接受 Mongo 文档中的 ObjectId 和 datetime"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def project(doc: dict, fields: tuple) -> dict:
+    """从 Mongo 文档中取出需要返回的字段，缺失的字段不输出，值交给编码器转换"""
+    return {field: doc[field] for field in fields if field in doc}
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful 的 application/json 表示，替换默认的标准库编码"""
+    response = make_response(dumps(data), code)
+    response.headers["Content-Type"] = "application/json"
+    response.headers.extend(headers or {})
+    return response
+
+
+class FastJSONProvider(JSONProvider):
+    """让 jsonify 也使用同一个编码器"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature
+
+# 保存签名会话令牌的 Cookie 名称
+SESSION_COOKIE = "adminSession"
+# 会话有效期（秒）
+SESSION_MAX_AGE = 8 * 60 * 60
+
+
+@lru_cache(maxsize=4)
+def _serializer(secret_key: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key, salt="admin-session")
+
+
+def _secret_key(secret_key: str = None) -> str:
+    # 异步入口没有 Flask 应用上下文，需要显式传入密钥
+    return secret_key if secret_key is not None else current_app.config["SECRET_KEY"]
+
+
+def issue_token(admin, secret_key: str = None) -> str:
+    """为登录成功的管理员签发会话令牌，令牌中只包含账号和名字"""
+    serializer = _serializer(_secret_key(secret_key))
+    return serializer.dumps({"account": admin.adminAccount, "name": admin.adminName})
+
+
+def verify_token(token: str, max_age: int = SESSION_MAX_AGE, secret_key: str = None):
+    """在本地校验令牌签名和有效期，不访问数据库
+
+    Returns:
+        dict | None: 令牌中的 {"account", "name"}；签名无效或已过期时返回 None
+    """
+    if not token:
+        return None
+    serializer = _serializer(_secret_key(secret_key))
+    try:
+        return serializer.loads(token, max_age=max_age)
+    except BadSignature:
+        return None
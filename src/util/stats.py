@@ -0,0 +1,246 @@
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from util.asyncdb import AsyncDBUtil
+from util.dbutil import DBUtil
+
+logger = logging.getLogger("stats")
+
+# 物化统计：totals 文档保存用户数和帖子数，每个用户(user:<user_id>)和每天(day:<YYYY-MM-DD>)
+# 各一个文档保存帖子数；DAO 写操作时用 $inc 增量更新，读取只按 _id 或索引取少量文档
+STATS_COLLECTION = "stats"
+TOTALS_ID = "totals"
+# 对账租约，多个工作进程中同一时间只有一个执行对账
+RECONCILE_LOCK_ID = "reconcile"
+# 后台对账间隔(秒)，0 表示不自动对账
+STATS_RECONCILE_INTERVAL = float(os.environ.get("STATS_RECONCILE_INTERVAL", 600))
+# /stats 默认返回的天数和发帖最多的用户数
+DEFAULT_DAYS = 30
+MAX_DAYS = 366
+DEFAULT_TOP_USERS = 10
+MAX_TOP_USERS = 100
+# 对账时每批写入的计数文档数
+RECONCILE_BATCH_SIZE = 1000
+
+_TOP_QUERY = {"kind": "user", "posts": {"$gt": 0}}
+_TOP_PROJECTION = {"_id": 0, "user_id": 1, "posts": 1}
+
+
+def day_key(value) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _user_op(user_id: str, delta: int) -> UpdateOne:
+    return UpdateOne({"_id": f"user:{user_id}"},
+                     {"$inc": {"posts": delta}, "$setOnInsert": {"kind": "user", "user_id": user_id}},
+                     upsert=True)
+
+
+def _day_op(day: str, delta: int) -> UpdateOne:
+    return UpdateOne({"_id": f"day:{day}"},
+                     {"$inc": {"posts": delta}, "$setOnInsert": {"kind": "day", "day": day}},
+                     upsert=True)
+
+
+def user_ops(delta: int) -> list:
+    return [UpdateOne({"_id": TOTALS_ID}, {"$inc": {"users": delta}}, upsert=True)] if delta else []
+
+
+def post_ops(added=(), removed=()) -> list:
+    """新增/删除帖子对应的计数更新；修改日期时旧值算作删除、新值算作新增
+
+    Args:
+        added, removed: 含 user_id 和 date 字段的帖子文档
+    """
+    total = 0
+    by_user, by_day = Counter(), Counter()
+    for posts, sign in ((added, 1), (removed, -1)):
+        for post in posts:
+            total += sign
+            by_user[post["user_id"]] += sign
+            if isinstance(post.get("date"), datetime):
+                by_day[day_key(post["date"])] += sign
+    ops = [UpdateOne({"_id": TOTALS_ID}, {"$inc": {"posts": total}}, upsert=True)] if total else []
+    ops += [_user_op(user_id, delta) for user_id, delta in by_user.items() if delta]
+    ops += [_day_op(day, delta) for day, delta in by_day.items() if delta]
+    return ops
+
+
+def apply_ops(ops: list):
+    """写入计数更新；失败只记录日志，不影响已经完成的业务写操作，由下次对账修正"""
+    if not ops:
+        return
+    try:
+        DBUtil.collection(STATS_COLLECTION).bulk_write(ops, ordered=False)
+    except PyMongoError as e:
+        logger.warning("Failed to update stats counters: %s", e)
+
+
+async def apply_ops_async(ops: list):
+    if not ops:
+        return
+    try:
+        await AsyncDBUtil.collection(STATS_COLLECTION).bulk_write(ops, ordered=False)
+    except PyMongoError as e:
+        logger.warning("Failed to update stats counters: %s", e)
+
+
+def _day_range(days: int) -> list:
+    today = date.today()
+    return [day_key(today - timedelta(days=offset)) for offset in range(days - 1, -1, -1)]
+
+
+def _day_query(day_list: list) -> dict:
+    return {"_id": {"$gte": f"day:{day_list[0]}", "$lte": f"day:{day_list[-1]}"}}
+
+
+def _summary(totals: dict, day_list: list, per_day: list, top_users: list, user_id: str, user: dict) -> dict:
+    users = max(totals.get("users", 0), 0)
+    posts = max(totals.get("posts", 0), 0)
+    counts = {doc["_id"][len("day:"):]: doc["posts"] for doc in per_day}
+    summary = {
+        "users": users,
+        "posts": posts,
+        "posts_per_user": round(posts / users, 2) if users else 0.0,
+        "posts_per_day": [{"day": day, "posts": max(counts.get(day, 0), 0)} for day in day_list],
+        "top_users": top_users,
+        "reconciled_at": totals.get("reconciled_at"),
+    }
+    if user_id is not None:
+        summary["user"] = {"user_id": user_id, "posts": max((user or {}).get("posts", 0), 0)}
+    return summary
+
+
+def read_stats(days: int = DEFAULT_DAYS, top: int = DEFAULT_TOP_USERS, user_id: str = None) -> dict:
+    """读取物化统计，不扫描 users/posts
+
+    Returns:
+        dict: users/posts 总数、平均每个用户的帖子数、最近 days 天每天的帖子数(没有帖子的日期为0)、
+        帖子最多的 top 个用户，指定 user_id 时附带该用户的帖子数
+    """
+    collection = DBUtil.collection(STATS_COLLECTION)
+    day_list = _day_range(days)
+    totals = collection.find_one({"_id": TOTALS_ID}) or {}
+    per_day = list(collection.find(_day_query(day_list), {"posts": 1}))
+    top_users = list(collection.find(_TOP_QUERY, _TOP_PROJECTION).sort("posts", -1).limit(top)) if top else []
+    user = collection.find_one({"_id": f"user:{user_id}"}) if user_id is not None else None
+    return _summary(totals, day_list, per_day, top_users, user_id, user)
+
+
+async def read_stats_async(days: int = DEFAULT_DAYS, top: int = DEFAULT_TOP_USERS, user_id: str = None) -> dict:
+    collection = AsyncDBUtil.collection(STATS_COLLECTION)
+    day_list = _day_range(days)
+    totals = await collection.find_one({"_id": TOTALS_ID}) or {}
+    per_day = await collection.find(_day_query(day_list), {"posts": 1}).to_list()
+    top_users = []
+    if top:
+        top_users = await collection.find(_TOP_QUERY, _TOP_PROJECTION).sort("posts", -1).limit(top).to_list()
+    user = await collection.find_one({"_id": f"user:{user_id}"}) if user_id is not None else None
+    return _summary(totals, day_list, per_day, top_users, user_id, user)
+
+
+def reconcile() -> dict:
+    """用聚合重新计算全部计数，覆盖增量维护的值并删除不再有帖子的用户/日期
+
+    对账期间并发写入的增量可能被覆盖，造成短暂偏差，下次对账时修正。
+
+    Returns:
+        dict: 用户数、帖子数和写入的用户/日期计数文档数
+    """
+    db = DBUtil.connect()
+    collection = db[STATS_COLLECTION]
+    run = ObjectId()
+    written = {"user": 0, "day": 0}
+    # 计数类型 -> (保存分组值的字段, 分组表达式)
+    group_keys = {
+        "user": ("user_id", "$user_id"),
+        "day": ("day", {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}),
+    }
+    for kind, (field, key) in group_keys.items():
+        ops = []
+        pipeline = [{"$match": {"date": {"$type": "date"}}}] if kind == "day" else []
+        pipeline.append({"$group": {"_id": key, "posts": {"$sum": 1}}})
+        for row in db["posts"].aggregate(pipeline, allowDiskUse=True):
+            if row["_id"] is None:
+                continue
+            ops.append(UpdateOne({"_id": f"{kind}:{row['_id']}"},
+                                 {"$set": {"kind": kind, field: row["_id"], "posts": row["posts"], "run": run}},
+                                 upsert=True))
+            if len(ops) >= RECONCILE_BATCH_SIZE:
+                collection.bulk_write(ops, ordered=False)
+                written[kind] += len(ops)
+                ops = []
+        if ops:
+            collection.bulk_write(ops, ordered=False)
+            written[kind] += len(ops)
+    collection.delete_many({"kind": {"$in": list(group_keys)}, "run": {"$ne": run}})
+
+    totals = {
+        "users": db["users"].count_documents({}),
+        "posts": db["posts"].count_documents({}),
+    }
+    collection.update_one({"_id": TOTALS_ID},
+                          {"$set": {**totals, "reconciled_at": datetime.now(timezone.utc)}}, upsert=True)
+    return {**totals, "user_rows": written["user"], "day_rows": written["day"]}
+
+
+def try_reconcile(interval: float = STATS_RECONCILE_INTERVAL) -> bool:
+    """租约到期(或从未对账)时对账并续约 interval 秒；其他进程持有租约时返回 False"""
+    now = datetime.now(timezone.utc)
+    try:
+        DBUtil.collection(STATS_COLLECTION).update_one(
+            {"_id": RECONCILE_LOCK_ID, "$or": [{"until": {"$lt": now}}, {"until": {"$exists": False}}]},
+            {"$set": {"until": now + timedelta(seconds=interval)}},
+            upsert=True)
+    except DuplicateKeyError:
+        return False
+    reconcile()
+    return True
+
+
+class StatsReconciler:
+    """后台线程：每隔 interval 秒尝试一次对账，每个工作进程各自运行，由租约保证只有一个进程执行"""
+
+    def __init__(self, interval: float = STATS_RECONCILE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """启动对账线程(已在本进程中运行时不做任何事)"""
+        if self.interval <= 0 or (self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="stats-reconciler", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                if try_reconcile(self.interval):
+                    logger.info("Stats reconciled")
+            except Exception as e:
+                logger.warning("Stats reconcile failed: %r", e)
+            if self._stop.wait(self.interval):
+                return
+
+
+# 进程内共享的对账线程
+reconciler = StatsReconciler()
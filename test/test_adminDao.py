@@ -7,8 +7,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 
 from src.po.admin import Admin
 from src.dao.impl.adminDaoImpl import AdminDaoImpl
+from util.schema import ensure_indexes
 
 class TestAdminDao(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ensure_indexes()
+
     def setUp(self):
         self.adminDao = AdminDaoImpl()
 
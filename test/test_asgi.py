@@ -0,0 +1,108 @@
+import asyncio
+import json
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from api.payloads import PayloadError, parse_new_user, parse_user_update, parse_post_update
+from util.asgi import ASGIApp, HTTPError, Response
+
+JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+def call(app, method: str, path: str, body: bytes = b"", headers: list = None, query: bytes = b""):
+    """在新的事件循环中发送一个请求，返回 (状态码, 响应头, 响应体)"""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": headers or []}
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"]
+
+
+class EchoView:
+    async def get(self, request):
+        return {"code": 200, "data": request.args, "cookies": request.cookies}
+
+    async def post(self, request):
+        data = request.get_json()
+        if data is None:
+            return {"code": 400, "message": "empty"}, 400
+        return {"code": 201, "data": data}
+
+    async def delete(self, request):
+        raise HTTPError(404, "gone")
+
+
+class LoginView:
+    async def post(self, request):
+        response = Response(b"{}")
+        response.set_cookie("session", "token", max_age=60, httponly=True, samesite="Lax")
+        return response
+
+
+class TestASGIApp(unittest.TestCase):
+    def setUp(self):
+        self.app = ASGIApp(max_body_size=64)
+        self.app.add_resource(EchoView, "/echo", "/echo2")
+        self.app.add_resource(LoginView, "/login")
+
+    def test_dispatch_by_method(self):
+        status, headers, body = call(self.app, "GET", "/echo2", query=b"a=1&a=2&b=%E4%BD%A0",
+                                     headers=[(b"cookie", b"adminSession=abc")])
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/json")
+        payload = json.loads(body)
+        self.assertEqual(payload["data"], {"a": "1", "b": "你"})
+        self.assertEqual(payload["cookies"], {"adminSession": "abc"})
+
+        status, _, body = call(self.app, "POST", "/echo", b'{"x": 1}', JSON_HEADERS)
+        self.assertEqual((status, json.loads(body)["data"]), (200, {"x": 1}))
+        self.assertEqual(call(self.app, "POST", "/echo")[0], 400)
+        self.assertEqual(call(self.app, "DELETE", "/echo")[0], 404)
+
+    def test_errors(self):
+        self.assertEqual(call(self.app, "GET", "/missing")[0], 404)
+        self.assertEqual(call(self.app, "PUT", "/echo")[0], 405)
+        # 修改数据的请求体必须是 JSON，跨站表单无法提交
+        self.assertEqual(call(self.app, "POST", "/echo", b"x=1",
+                              [(b"content-type", b"application/x-www-form-urlencoded")])[0], 415)
+        self.assertEqual(call(self.app, "POST", "/echo", b"{bad", JSON_HEADERS)[0], 400)
+        self.assertEqual(call(self.app, "POST", "/echo", b"[" + b"1," * 40 + b"1]", JSON_HEADERS)[0], 413)
+
+    def test_set_cookie(self):
+        _, headers, _ = call(self.app, "POST", "/login")
+        cookie = headers[b"set-cookie"].decode()
+        self.assertIn("session=token", cookie)
+        self.assertIn("HttpOnly", cookie)
+        self.assertIn("SameSite=Lax", cookie)
+
+
+class TestPayloads(unittest.TestCase):
+    def test_new_user(self):
+        user = parse_new_user({"nickname": "tom", "phone_number": "13800000000", "email": "t@x", "password": "p"})
+        self.assertEqual(user.phone_number, 13800000000)
+        with self.assertRaisesRegex(PayloadError, "缺少必需字段: email"):
+            parse_new_user({"nickname": "tom", "phone_number": 1, "password": "p"})
+        with self.assertRaisesRegex(PayloadError, "手机号必须是数字"):
+            parse_new_user({"nickname": "tom", "phone_number": "abc", "email": "t@x", "password": "p"})
+        with self.assertRaisesRegex(PayloadError, "请求体不能为空"):
+            parse_new_user(None)
+
+    def test_updates_keep_allowed_fields(self):
+        self.assertEqual(parse_user_update({"phone_number": "12", "salt": "x"}), {"phone_number": 12})
+        self.assertEqual(parse_post_update({"title": "t", "user_id": "u"}), {"title": "t"})
+        with self.assertRaises(PayloadError):
+            parse_post_update({"user_id": "u"})
+
+if __name__ == '__main__':
+    unittest.main()
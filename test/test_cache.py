@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.cache import MISSING, TTLCache, SharedCache, make_cache
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expiry_and_negative_entries(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("missing", None, ttl=0)
+        cache.set("absent", None)
+        self.assertIs(cache.get("missing", MISSING), MISSING)
+        self.assertIsNone(cache.get("absent", MISSING))
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["negative_hits"]), (1, 1))
+
+    def test_delete_many(self):
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a", "b", "c")
+        self.assertEqual(len(cache), 0)
+
+class TestSharedCache(unittest.TestCase):
+    def test_shared_store_returns_copies(self):
+        first = make_cache("shared", namespace="test-shared")
+        second = SharedCache("test-shared")
+        first.set("user", {"tags": ["a"]})
+        value = second.get("user")
+        value["tags"].append("b")
+        self.assertEqual(first.get("user"), {"tags": ["a"]})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            make_cache("memcached")
+
+if __name__ == '__main__':
+    unittest.main()
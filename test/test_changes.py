@@ -0,0 +1,174 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect, OperationFailure
+from util import changes
+from util.cache import MISSING
+from util.changes import ChangeHub, ChangeWatcher, CollectionVersions, make_event, sse_stream
+from dao.impl.userDaoImpl import user_cache
+
+
+class TestChangeHub(unittest.TestCase):
+    def test_make_event_drops_private_fields(self):
+        event = make_event("users", "update", ObjectId("0123456789abcdef01234567"),
+                           {"nickname": "tom", "password": "h", "salt": "s", "nickname_lower": "tom"})
+        self.assertEqual(event["id"], "0123456789abcdef01234567")
+        self.assertEqual(event["doc"], {"nickname": "tom"})
+        self.assertIsNone(make_event("posts", "delete", "x")["doc"])
+
+    def test_since_replays_from_event_id(self):
+        hub = ChangeHub(history=3)
+        start = hub.last_id
+        for i in range(2):
+            hub.publish(make_event("posts", "insert", i, {}))
+        events, complete = hub.since(start)
+        self.assertTrue(complete)
+        self.assertEqual([event["id"] for event in events], ["0", "1"])
+        self.assertEqual(hub.since(hub.last_id), ([], True))
+        # 超出保留范围、早于进程开始接收变更或格式错误的ID无法衔接
+        for i in range(3):
+            hub.publish(make_event("posts", "insert", i, {}))
+        self.assertFalse(hub.since(start)[1])
+        self.assertEqual(ChangeHub().since(start), ([], False))
+        self.assertEqual(hub.since("abc-1"), ([], False))
+
+    def test_since_accepts_ids_from_other_workers(self):
+        # 两个工作进程从同一个事件源收到相同ID的事件
+        first, second = ChangeHub(), ChangeHub()
+        event_ids = [str(ObjectId()) for _ in range(2)]
+        first.publish(make_event("posts", "insert", 0, {}), event_ids[0])
+        first.publish(make_event("posts", "insert", 1, {}), event_ids[1])
+        self.assertEqual(first.last_id, event_ids[1])
+        # 第二个进程还没收到这些事件：没有需要补发的，位置仍然有效
+        self.assertEqual(second.since(event_ids[0]), ([], True))
+        second.publish(make_event("posts", "insert", 0, {}), event_ids[0])
+        second.publish(make_event("posts", "insert", 1, {}), event_ids[1])
+        events, complete = second.since(event_ids[0])
+        self.assertTrue(complete)
+        self.assertEqual([event["event_id"] for event in events], event_ids[1:])
+
+    def test_subscription_overflow_sends_reset(self):
+        hub = ChangeHub()
+        subscription = hub.subscribe(maxsize=1)
+        stream = sse_stream(subscription, heartbeat=0.01)
+        self.assertTrue(next(stream).startswith("retry:"))
+        self.assertEqual(hub.subscriber_count, 1)
+        hub.publish(make_event("users", "insert", 1, {"nickname": "a"}))
+        self.assertIn('"nickname":"a"', next(stream))
+        self.assertEqual(next(stream), ": ping\n\n")
+        hub.publish(make_event("users", "insert", 2, {}))
+        hub.publish(make_event("users", "insert", 3, {}))
+        self.assertIn("event: reset", next(stream))
+        self.assertRaises(StopIteration, next, stream)
+        self.assertEqual(hub.subscriber_count, 0)
+
+    def test_listener_errors_are_isolated(self):
+        hub = ChangeHub()
+        seen = []
+        hub.add_listener("users", lambda event: 1 / 0)
+        hub.add_listener("users", seen.append)
+        hub.publish(make_event("users", "delete", 1))
+        self.assertEqual(len(seen), 1)
+
+
+class FlakyWatcher(ChangeWatcher):
+    """第一次监听在收到 resume token 后因历史丢失而失败，第二次成功后停止"""
+
+    def __init__(self, hub):
+        super().__init__(hub, mode="stream", poll_interval=0.001)
+        self.resume_tokens = []
+
+    def _watch_stream(self):
+        self.resume_tokens.append(self._resume_token)
+        if len(self.resume_tokens) == 1:
+            self._begin_watching(complete=True)
+            self._resume_token = {"_data": "expired"}
+            raise OperationFailure("resume point no longer in oplog", code=286)
+        self._begin_watching(complete=self._resume_token is not None)
+        self._stop.set()
+
+
+class TestWatcherRestart(unittest.TestCase):
+    def test_history_lost_restarts_fresh_and_resets(self):
+        hub = ChangeHub()
+        versions = CollectionVersions(hub)
+        resets = []
+        hub.add_reset_listener(lambda: resets.append(True))
+        subscription = hub.subscribe()
+        old_id = hub.last_id
+
+        watcher = FlakyWatcher(hub)
+        watcher._run()
+        self.assertEqual(watcher.resume_tokens, [None, None])
+        self.assertEqual(resets, [True])
+        self.assertIsNotNone(watcher.watching_since)
+        self.assertEqual(versions.snapshot(("users",))[0], (1,))
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(hub.since(old_id), ([], False))
+
+class FakeLog:
+    """变更日志集合的替身，第一次写入因连接中断而失败"""
+
+    def __init__(self):
+        self.entries = []
+        self.fail = True
+
+    def insert_many(self, entries, ordered=True):
+        if self.fail:
+            self.fail = False
+            raise AutoReconnect("connection reset")
+        self.entries.extend(entries)
+
+    def find(self, query):
+        floor = query["_id"]["$gte"]
+        entries = [entry for entry in self.entries if entry["_id"] >= floor]
+        return type("Cursor", (), {"sort": lambda cursor, *args: sorted(entries, key=lambda e: e["_id"])})()
+
+    def find_one(self, query, projection=None, sort=None):
+        return min(self.entries, key=lambda e: e["_id"], default=None)
+
+
+class PollWatcher(ChangeWatcher):
+    def __init__(self, hub, log):
+        super().__init__(hub, mode="poll", poll_interval=0.001)
+        self.log = log
+
+    def _ensure_log(self):
+        return self.log
+
+
+class TestPollRetry(unittest.TestCase):
+    def test_transient_error_resumes_without_reset(self):
+        hub = ChangeHub()
+        resets, seen = [], []
+        hub.add_reset_listener(lambda: resets.append(True))
+        watcher = PollWatcher(hub, FakeLog())
+        hub.add_listener("posts", lambda event: (seen.append(event), watcher._stop.set()))
+        watcher._pending.append({"_id": ObjectId(), **make_event("posts", "insert", 1, {"title": "t"})})
+        watcher._run()
+        # 写入日志失败后重试，没有丢掉本进程的写操作，也不需要重置
+        self.assertEqual(resets, [])
+        self.assertEqual([event["id"] for event in seen], ["1"])
+        self.assertEqual(seen[0]["event_id"], str(watcher.log.entries[0]["_id"]))
+
+
+class TestUserCacheInvalidation(unittest.TestCase):
+    def test_change_from_other_process_evicts_old_and_new_keys(self):
+        user_id = ObjectId()
+        doc = {"_id": user_id, "nickname": "tom", "phone_number": 1, "email": "old@x"}
+        user_cache.set(("phone_number", 1), doc)
+        user_cache.set(("email", "old@x"), doc)
+        user_cache.set(("_id", str(user_id)), [("phone_number", 1), ("email", "old@x")])
+        user_cache.set(("email", "new@x"), None)
+
+        changes.hub.publish(make_event("users", "update", user_id, {"phone_number": 1, "email": "new@x"}))
+        for key in [("phone_number", 1), ("email", "old@x"), ("email", "new@x"), ("_id", str(user_id))]:
+            self.assertIs(user_cache.get(key, MISSING), MISSING)
+
+if __name__ == '__main__':
+    unittest.main()
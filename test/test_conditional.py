@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add the src and test directories to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from flask import Flask
+from test_asgi import call
+from util.asgi import ASGIApp
+from util.changes import ChangeHub, CollectionVersions, make_event
+from util.conditional import ConditionalCache, conditional, conditional_async, http_date, make_etag, not_modified
+
+
+class TestNotModified(unittest.TestCase):
+    def test_if_none_match_takes_precedence(self):
+        etag = make_etag(b"{}")
+        modified = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+        self.assertTrue(not_modified({"if-none-match": f'"x", W/{etag}'}, etag, modified))
+        self.assertTrue(not_modified({"if-none-match": "*"}, etag, modified))
+        self.assertFalse(not_modified({"if-none-match": '"x"', "if-modified-since": http_date(modified)},
+                                      etag, modified))
+        # HTTP 日期只精确到秒
+        self.assertTrue(not_modified({"if-modified-since": http_date(modified)}, etag, modified))
+        self.assertFalse(not_modified({"if-modified-since": http_date(modified - timedelta(seconds=1))},
+                                      etag, modified))
+        self.assertFalse(not_modified({"if-modified-since": "yesterday"}, etag, modified))
+        self.assertFalse(not_modified({}, etag, modified))
+
+
+class CountingView:
+    calls = 0
+
+    async def get(self, request):
+        CountingView.calls += 1
+        if request.args.get("missing"):
+            return {"code": 404, "message": "missing"}
+        return {"code": 200, "data": [{"title": "t", "date": datetime(2024, 5, 1)}]}
+
+
+class TestConditionalCache(unittest.TestCase):
+    def setUp(self):
+        self.hub = ChangeHub()
+        self.cache = ConditionalCache(versions=CollectionVersions(self.hub),
+                                      watching_since=lambda: datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.app = ASGIApp()
+        view = type("View", (CountingView,), {"get": conditional_async("posts", cache=self.cache)(CountingView.get)})
+        self.app.add_resource(view, "/posts")
+        CountingView.calls = 0
+
+    def test_unchanged_versions_skip_the_view(self):
+        status, headers, body = call(self.app, "GET", "/posts")
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"etag"].decode(), make_etag(body))
+        self.assertEqual(headers[b"cache-control"], b"no-cache")
+
+        status, headers, body = call(self.app, "GET", "/posts", headers=[(b"if-none-match", headers[b"etag"])])
+        self.assertEqual((status, body, CountingView.calls), (304, b"", 1))
+        self.assertNotIn(b"content-type", headers)
+
+        # 集合变更后重新执行视图，内容没变时仍然返回 304
+        self.hub.publish(make_event("posts", "insert", 1, {}))
+        status, _, _ = call(self.app, "GET", "/posts", headers=[(b"if-none-match", headers[b"etag"])])
+        self.assertEqual((status, CountingView.calls), (304, 2))
+        self.assertEqual(self.cache.stats()["not_modified_computed"], 1)
+
+        status, headers, _ = call(self.app, "GET", "/posts", query=b"missing=1")
+        self.assertEqual(status, 200)
+        self.assertNotIn(b"etag", headers)
+
+    def test_flask_view_encodes_once(self):
+        app = Flask(__name__)
+        app.add_url_rule("/posts", view_func=conditional("posts", cache=self.cache)(
+            lambda: {"code": 200, "data": [{"date": datetime(2024, 5, 1)}]}))
+        client = app.test_client()
+        response = client.get("/posts")
+        self.assertEqual(response.headers["ETag"], make_etag(response.data))
+        self.assertEqual(client.get("/posts", headers={"If-Modified-Since": response.headers["Last-Modified"]})
+                         .status_code, 304)
+        self.assertEqual(client.get("/posts", headers={"If-None-Match": '"other"'}).status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
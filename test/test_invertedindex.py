@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.invertedindex import InvertedIndex, tokenize
+
+class TestInvertedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add(1, "Python入门教程 学习python")
+        self.index.add(2, "机器学习 and deep learning")
+        self.index.add(3, "Flask教程")
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello 世界杯"), ["hello", "世界", "界杯"])
+        self.assertEqual(tokenize("字"), ["字"])
+
+    def test_search_ranks_by_score(self):
+        ranked, total = self.index.search("python")
+        self.assertEqual(total, 1)
+        self.assertEqual(ranked[0][0], 1)
+        ranked, total = self.index.search("教程")
+        self.assertEqual(total, 2)
+        self.assertEqual(ranked[0][0], 3)
+
+    def test_replace_and_remove(self):
+        self.index.add(3, "Django")
+        self.assertEqual(self.index.search("教程")[1], 1)
+        self.index.remove(1)
+        self.assertEqual(self.index.search("教程"), ([], 0))
+        self.assertEqual(len(self.index), 2)
+
+    def test_replace_swaps_content(self):
+        rebuilt = InvertedIndex()
+        rebuilt.add(4, "Flask教程")
+        self.index.replace(rebuilt)
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.search("教程")[0][0][0], 4)
+        self.assertEqual(self.index.search("python"), ([], 0))
+
+    def test_snapshot(self):
+        path = os.path.join(tempfile.mkdtemp(), "index.json")
+        self.index.save(path, {"max_id": 3})
+        restored = InvertedIndex()
+        self.assertEqual(restored.load(path, decode_id=int), {"max_id": 3})
+        self.assertEqual(restored.search("学习"), self.index.search("学习"))
+        restored.remove(1)
+        self.assertEqual(restored.search("教程")[1], 1)
+        with self.assertRaises(ValueError):
+            restored.load(path + ".missing")
+
+    def test_snapshot_rejects_other_content(self):
+        path = os.path.join(tempfile.mkdtemp(), "index.json")
+        # 旧版本的 pickle 快照或被篡改的文件只会被拒绝，不会被执行
+        for content in (b"\x80\x04cos\nsystem\n.", b'{"version": 2, "postings": {"a": [[9, 1]]}, "doc_len": []}'):
+            with open(path, "wb") as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                InvertedIndex().load(path, decode_id=int)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.jobs import JobManager, SUCCEEDED, FAILED, CANCELLED
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = JobManager(max_workers=1)
+
+    def tearDown(self):
+        self.manager.shutdown()
+
+    def wait(self, job):
+        for _ in range(200):
+            if job.finished_at is not None:
+                return
+            threading.Event().wait(0.01)
+        self.fail("job did not finish")
+
+    def test_job_result_and_progress(self):
+        def task(job, n):
+            for i in range(n):
+                job.progress(i + 1)
+            return {"rows": n}
+        job = self.manager.submit("test", task, 5)
+        self.wait(job)
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(self.manager.get(job.id).to_dict()["result"], {"rows": 5})
+
+    def test_job_failure(self):
+        def task(job):
+            raise ValueError("boom")
+        job = self.manager.submit("test", task)
+        self.wait(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "boom")
+
+    def test_cancel_running_job(self):
+        started = threading.Event()
+        def task(job):
+            started.set()
+            while True:
+                job.progress(1)
+                threading.Event().wait(0.01)
+        job = self.manager.submit("test", task)
+        started.wait(1)
+        self.manager.cancel(job.id)
+        self.wait(job)
+        self.assertEqual(job.status, CANCELLED)
+
+    def test_cleanup_runs_when_cancelled_before_start(self):
+        release = threading.Event()
+        blocker = self.manager.submit("test", lambda job: release.wait(1))
+        cleaned = []
+        job = self.manager.submit("test", lambda job: None, cleanup=lambda: cleaned.append(True))
+        self.manager.cancel(job.id)
+        release.set()
+        self.wait(blocker)
+        self.wait(job)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertEqual(cleaned, [True])
+
+    def test_shutdown_removes_job_files(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        job = self.manager.submit("test", lambda job: None, files=[path])
+        self.wait(job)
+        self.manager.shutdown()
+        self.assertFalse(os.path.exists(path))
+
+    def test_unknown_job(self):
+        with self.assertRaises(KeyError):
+            self.manager.get("missing")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import sys
+import os
+import io
+import json
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.jsonstream import iter_json_array
+
+class TestJsonStream(unittest.TestCase):
+    def test_items_across_chunks(self):
+        data = [{"nickname": f"用户{i}", "phone_number": i} for i in range(50)] + [12345, "x", None]
+        raw = json.dumps(data, ensure_ascii=False, indent=4).encode()
+        for chunk_size in (1, 7, 1024):
+            self.assertEqual(list(iter_json_array(io.BytesIO(raw), chunk_size)), data)
+
+    def test_text_stream_and_bom(self):
+        self.assertEqual(list(iter_json_array(io.BytesIO(b'\xef\xbb\xbf[1, 2]'))), [1, 2])
+        self.assertEqual(list(iter_json_array(io.StringIO('[{"a": 1}]'), 2)), [{"a": 1}])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_json_array(io.BytesIO(b' [ ] '))), [])
+
+    def test_invalid_content(self):
+        for raw in (b'{}', b'[1,', b'[1,]', b'[1 2]', b''):
+            with self.assertRaises(ValueError):
+                list(iter_json_array(io.BytesIO(raw), 2))
+
+if __name__ == '__main__':
+    unittest.main()
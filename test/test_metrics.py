@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from flask import Flask
+from util import metrics
+from util.dbutil import CommandStatsListener, start_db_tracking, stop_db_tracking
+from util.metrics import Histogram, RequestMetrics
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_is_cumulative(self):
+        hist = Histogram((0.1, 1.0))
+        hist.observe(0.05)
+        hist.observe(0.5)
+        hist.observe(5)
+        self.assertEqual(hist.counts, [1, 2])
+        self.assertEqual(hist.count, 3)
+
+    def test_db_commands_counted_per_request(self):
+        listener = CommandStatsListener()
+        listener.succeeded(SimpleNamespace(duration_micros=1500))
+        stats = start_db_tracking()
+        listener.succeeded(SimpleNamespace(duration_micros=2000))
+        listener.failed(SimpleNamespace(duration_micros=1000))
+        stop_db_tracking()
+        listener.succeeded(SimpleNamespace(duration_micros=1500))
+        self.assertEqual(stats[0], 2)
+        self.assertAlmostEqual(stats[1], 0.003)
+
+    def test_middleware_and_exposition(self):
+        app = Flask(__name__)
+        metrics.request_metrics.reset()
+        metrics.init_app(app)
+
+        @app.route("/items/<int:item_id>")
+        def item(item_id):
+            return {"id": item_id}
+
+        client = app.test_client()
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+        text = client.get("/metrics").data.decode()
+        self.assertIn('http_requests_total{endpoint="/items/<int:item_id>",method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{endpoint="unmatched",method="GET",status="404"} 1', text)
+        self.assertIn('http_request_duration_seconds_count{endpoint="/items/<int:item_id>",method="GET"} 2', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from bson import ObjectId
+from util.pagination import encode_cursor, parse_date, parse_timeline_args
+from dao.impl.postDaoImpl import _page_query, _split_page
+
+
+class TestTimelineArgs(unittest.TestCase):
+    def test_defaults_and_after_alias(self):
+        self.assertEqual(parse_timeline_args({}), (50, None, None, None))
+        cursor = encode_cursor(ObjectId(), datetime(2024, 5, 1))
+        self.assertEqual(parse_timeline_args({"after": cursor, "limit": "5"})[:2], (5, cursor))
+
+    def test_rejects_bad_values(self):
+        for args in ({"since": "yesterday"}, {"before": "abc"}, {"before": encode_cursor(ObjectId())}):
+            with self.assertRaises(ValueError):
+                parse_timeline_args(args)
+
+    def test_parse_date_converts_to_local_naive(self):
+        self.assertEqual(parse_date("2024-05-01"), datetime(2024, 5, 1))
+        aware = parse_date("2024-05-01T00:00:00+00:00")
+        self.assertIsNone(aware.tzinfo)
+        self.assertEqual(aware, datetime(2024, 5, 1, tzinfo=timezone.utc).astimezone().replace(tzinfo=None))
+        self.assertEqual(parse_date(datetime(2024, 5, 1, tzinfo=timezone.utc)), aware)
+
+
+class TestPageQuery(unittest.TestCase):
+    def test_range_and_keyset(self):
+        since, until, date = datetime(2024, 1, 1), datetime(2024, 2, 1), datetime(2024, 1, 15)
+        _id = ObjectId()
+        query = _page_query(encode_cursor(_id, date), since, until)
+        self.assertEqual(query["date"], {"$gte": since, "$lt": until, "$lte": date})
+        self.assertEqual(query["$or"][1], {"date": date, "_id": {"$lt": _id}})
+        self.assertEqual(_page_query(), {})
+
+    def test_split_page(self):
+        posts = [{"_id": ObjectId(), "date": datetime(2024, 1, 3 - i)} for i in range(3)]
+        page, next_cursor = _split_page(posts, 2)
+        self.assertEqual(len(page), 2)
+        self.assertEqual(next_cursor, encode_cursor(posts[1]["_id"], posts[1]["date"]))
+        self.assertEqual(_split_page(posts, 3), (posts, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.passwords import HashPool, HashPoolBusy, hash_password, check_password, hash_rounds, needs_rehash
+
+class TestPasswords(unittest.TestCase):
+    def test_hash_and_check(self):
+        hashed, salt = hash_password("Amy&900s", rounds=4)
+        self.assertTrue(hashed.startswith(salt[:29]))
+        self.assertTrue(check_password("Amy&900s", hashed))
+        self.assertFalse(check_password("wrong", hashed))
+
+    def test_needs_rehash(self):
+        hashed, _ = hash_password("pw", rounds=4)
+        self.assertEqual(hash_rounds(hashed), 4)
+        self.assertTrue(needs_rehash(hashed, rounds=5))
+        self.assertFalse(needs_rehash(hashed, rounds=4))
+        self.assertTrue(needs_rehash("plain-text", rounds=4))
+
+    def test_pool_rejects_when_full(self):
+        pool = HashPool(max_workers=1, max_pending=1)
+        release = threading.Event()
+        running = [pool.submit(release.wait), pool.submit(release.wait)]
+        with self.assertRaises(HashPoolBusy):
+            pool.submit(release.wait)
+        release.set()
+        for future in running:
+            future.result()
+        pool.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from po.post import Post, PostRow
+from po.user import User, UserRow
+from po.admin import Admin
+
+class TestPo(unittest.TestCase):
+    def test_post_round_trip(self):
+        doc = {"_id": 1, "user_id": "u1", "date": datetime(2024, 1, 1), "title": "t"}
+        post = Post.from_doc(doc)
+        self.assertEqual(post.content, "")
+        self.assertEqual(Post.from_doc(post.to_doc()), post)
+        self.assertFalse(hasattr(post, "__dict__"))
+
+    def test_rows_are_read_only(self):
+        row = PostRow.from_doc({"_id": 1, "user_id": "u1", "date": datetime(2024, 1, 1), "title": "t"})
+        self.assertEqual(row.to_doc()["_id"], 1)
+        with self.assertRaises(AttributeError):
+            row.title = "changed"
+        user = UserRow.from_doc({"_id": 2, "nickname": "n", "phone_number": 1, "email": "e", "password": "p"})
+        self.assertNotIn("password", user.to_doc())
+
+    def test_user_and_admin_from_doc(self):
+        user = User.from_doc({"nickname": "n", "phone_number": 1, "email": "e", "password": "p", "salt": "s"})
+        self.assertEqual(user.to_doc()["salt"], "s")
+        admin = Admin.from_doc({"adminAccount": "a", "adminName": "n", "adminPassword": "p", "salt": "s"})
+        self.assertEqual(Admin(**admin.to_doc()), admin)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,17 +6,26 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
 from src.dao.postDao import PostDao
-from src.dao.impl.postDaoImpl import PostDaoImpl
+from src.dao.impl import postDaoImpl as post_module
+from src.dao.impl.postDaoImpl import PostDaoImpl, post_index, save_post_index
 from src.po.post import Post
 from src.dao.impl.userDaoImpl import UserDaoImpl
 from src.dao.userDao import UserDao
-from datetime import datetime
+from util.schema import ensure_indexes
+from datetime import datetime, timezone
+from unittest import mock
+import shutil
+import tempfile
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'src.django_settings')
 
 
 class TestPostDao(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ensure_indexes()
+
     def setUp(self):
         self.postDao = PostDaoImpl()
         self.userDao = UserDaoImpl()
@@ -26,5 +35,59 @@ class TestPostDao(unittest.TestCase):
         post = Post(str(user_id), datetime.now(), "测试")
         self.postDao.insert_post(post)
 
+    def test_find_posts_by_user_ids(self):
+        user_id = str(self.userDao.find_id_by_number(15975245))
+        posts = self.postDao.find_posts_by_user_ids([user_id, "missing"])
+        self.assertEqual(posts["missing"], [])
+        self.assertTrue(all(post["user_id"] == user_id for post in posts[user_id]))
+        newest = self.postDao.find_posts_by_user_ids([user_id], per_user=1)[user_id]
+        self.assertLessEqual(len(newest), 1)
+        self.assertEqual(newest, posts[user_id][:1])
+
+    def test_find_posts_by_user_pages_newest_first(self):
+        user_id = str(self.userDao.find_id_by_number(15975245))
+        first, next_cursor = self.postDao.find_posts_by_user(user_id, limit=1)
+        self.assertEqual(len(first), 1)
+        if next_cursor:
+            second, _ = self.postDao.find_posts_by_user(user_id, limit=1, before=next_cursor, ids_only=True)
+            self.assertEqual(set(second[0]), {"_id", "date"})
+            self.assertLessEqual(second[0]["date"], first[0]["date"])
+        since = first[0]["date"]
+        recent, _ = self.postDao.find_posts_by_user(user_id, since=since)
+        self.assertTrue(all(post["date"] >= since for post in recent))
+
+    def test_search_index_snapshot_picks_up_later_edits(self):
+        user_id = str(self.userDao.find_id_by_number(15975245))
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir, ignore_errors=True)
+        path = os.path.join(snapshot_dir, "post_index.json")
+        for name, value in (("POST_INDEX_PATH", path), ("POST_INDEX_SYNC_MARGIN", 0)):
+            patcher = mock.patch.object(post_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        originals = list(self.postDao.collection.find({"user_id": user_id}, {"title": 1, "updated_at": 1}))
+        self.addCleanup(self._restore_posts, originals)
+
+        self.postDao.build_search_index(use_snapshot=False)
+        self.assertTrue(save_post_index(path))
+        # 模拟停机期间的修改：绕过 DAO，只更新数据库中的标题和修改时间
+        self.postDao.collection.update_many({"user_id": user_id},
+                                            {"$set": {"title": "快照之后改名", "updated_at": datetime.now(timezone.utc)}})
+        post_index.clear()
+        self.postDao.build_search_index()
+        posts, _ = self.postDao.search_posts("快照之后改名")
+        self.assertTrue(posts)
+        self.assertTrue(all(post["user_id"] == user_id for post in posts))
+
+    def _restore_posts(self, originals: list):
+        """恢复被改名的帖子并按恢复后的数据重建索引"""
+        for post in originals:
+            if "updated_at" in post:
+                update = {"$set": {"title": post["title"], "updated_at": post["updated_at"]}}
+            else:
+                update = {"$set": {"title": post["title"]}, "$unset": {"updated_at": ""}}
+            self.postDao.collection.update_one({"_id": post["_id"]}, update)
+        self.postDao.build_search_index(use_snapshot=False)
+
 if __name__ == '__main__':
     unittest.main()
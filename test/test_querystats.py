@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.querystats import QueryStatsListener, command_filter, filter_shape, track_dao
+
+class TestQueryStats(unittest.TestCase):
+    def setUp(self):
+        self.listener = QueryStatsListener(slow_ms=10, explain=False)
+        listener = self.listener
+
+        @track_dao
+        class FakeDao:
+            def find_user(self, phone):
+                return run("find", {"find": "users", "filter": {"phone_number": phone}}, 50)
+
+            def list_users(self):
+                return run("find", {"find": "users", "filter": {}}, 1, cursor_id=7)
+
+            async def count_users(self):
+                await asyncio.sleep(0)
+                return run("count", {"count": "users", "query": {}}, 1)
+
+        self.dao = FakeDao()
+        self.request_id = 0
+
+        def run(name, command, millis, cursor_id=0):
+            self.request_id += 1
+            event = SimpleNamespace(command_name=name, command=command, connection_id=("h", 1),
+                                    request_id=self.request_id, duration_micros=millis * 1000,
+                                    database_name="test", reply={"cursor": {"id": cursor_id}})
+            listener.started(event)
+            listener.succeeded(event)
+        self.run_command = run
+
+    def test_filter_shape(self):
+        shape = filter_shape({"_id": {"$in": [1, 2]}, "$or": [{"a": 1}, {"b": {"$gt": 2}}]})
+        self.assertEqual(shape, {"_id": {"$in": ["?"]}, "$or": [{"a": "?"}, {"b": {"$gt": "?"}}]})
+        self.assertEqual(command_filter("delete", {"deletes": [{"q": {"x": 1}}]}), {"x": 1})
+
+    def test_attribution_and_slow_log(self):
+        with self.assertLogs("dao.slow_query", level="WARNING"):
+            self.dao.find_user(123)
+        self.dao.list_users()
+        # 游标之后的 getMore 归到打开游标的方法
+        self.run_command("getMore", {"getMore": 7, "collection": "users"}, 1)
+        self.run_command("ping", {"ping": 1}, 1)
+
+        methods = {item["method"]: item for item in self.listener.snapshot()["methods"]}
+        self.assertEqual(methods["FakeDao.find_user"]["slow"], 1)
+        self.assertEqual(methods["FakeDao.list_users"]["commands"], {"find": 1, "getMore": 1})
+        self.assertIn("unattributed", methods)
+        slow = self.listener.snapshot()["slow_queries"][0]
+        self.assertEqual(slow["filter"], {"phone_number": "?"})
+
+    def test_attribution_of_coroutine_methods(self):
+        asyncio.run(self.dao.count_users())
+        self.run_command("ping", {"ping": 1}, 1)
+        methods = {item["method"]: item for item in self.listener.snapshot()["methods"]}
+        self.assertEqual(methods["FakeDao.count_users"]["commands"], {"count": 1})
+        self.assertEqual(methods["unattributed"]["commands"], {"ping": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from util.search import normalize, tokens, search_fields
+
+class TestSearchFields(unittest.TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize(" Ｐｙｔｈｏｎ "), "python")
+
+    def test_tokens_cjk_and_latin(self):
+        grams = tokens("Hi 张三")
+        for gram in ("h", "i", "hi", "张", "三", "张三"):
+            self.assertIn(gram, grams)
+        self.assertNotIn("i ", grams)
+
+    def test_search_fields(self):
+        fields = search_fields("title", "Python入门")
+        self.assertEqual(fields["title_lc"], "python入门")
+        self.assertIn("入门", fields["title_ngrams"])
+
+if __name__ == '__main__':
+    unittest.main()
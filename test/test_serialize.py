@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from bson import ObjectId
+from util import serialize
+from util.serialize import dumps, loads, project
+
+class TestSerialize(unittest.TestCase):
+    def setUp(self):
+        self.backend = serialize.orjson
+        self.doc = {"_id": ObjectId("65a1b2c3d4e5f60718293a4b"), "title": "标题",
+                    "date": datetime(2024, 1, 2, 3, 4, 5), "title_lc": "标题"}
+
+    def tearDown(self):
+        serialize.orjson = self.backend
+
+    def test_project(self):
+        self.assertEqual(list(project(self.doc, ("_id", "title", "content"))), ["_id", "title"])
+
+    def _check_round_trip(self):
+        data = loads(dumps({"data": [project(self.doc, ("_id", "title", "date"))]}))
+        self.assertEqual(data["data"][0], {"_id": "65a1b2c3d4e5f60718293a4b", "title": "标题",
+                                           "date": "2024-01-02T03:04:05"})
+
+    def test_stdlib_backend(self):
+        serialize.orjson = None
+        self._check_round_trip()
+        self.assertIn("标题".encode(), dumps({"t": "标题"}))
+
+    def test_fast_backend(self):
+        if self.backend is None:
+            self.skipTest("orjson not installed")
+        self._check_round_trip()
+
+    def test_unsupported_type(self):
+        serialize.orjson = None
+        with self.assertRaises(TypeError):
+            dumps({"value": object()})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+from datetime import date, datetime, timedelta
+
+# Add the src directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from api.payloads import PayloadError, parse_stats_args, with_nicknames
+from util import stats
+
+
+def _updates(ops: list) -> dict:
+    return {op._filter["_id"]: op._doc for op in ops}
+
+
+class TestCounterOps(unittest.TestCase):
+    def test_post_ops_group_by_user_and_day(self):
+        day = datetime(2024, 5, 1, 23, 59)
+        ops = _updates(stats.post_ops(added=[
+            {"user_id": "u1", "date": day},
+            {"user_id": "u1", "date": day},
+            {"user_id": "u2", "date": day + timedelta(minutes=2)},
+        ]))
+        self.assertEqual(ops["totals"]["$inc"], {"posts": 3})
+        self.assertEqual(ops["user:u1"]["$inc"], {"posts": 2})
+        self.assertEqual(ops["user:u1"]["$setOnInsert"], {"kind": "user", "user_id": "u1"})
+        self.assertEqual(ops["day:2024-05-01"]["$inc"], {"posts": 2})
+        self.assertEqual(ops["day:2024-05-02"]["$inc"], {"posts": 1})
+
+    def test_date_change_moves_between_days_only(self):
+        old = {"user_id": "u1", "date": datetime(2024, 5, 1)}
+        ops = _updates(stats.post_ops(added=[{**old, "date": datetime(2024, 5, 3)}], removed=[old]))
+        self.assertEqual(set(ops), {"day:2024-05-01", "day:2024-05-03"})
+        self.assertEqual(ops["day:2024-05-01"]["$inc"], {"posts": -1})
+        self.assertEqual(stats.post_ops(), [])
+        self.assertEqual(stats.user_ops(0), [])
+
+
+class TestSummary(unittest.TestCase):
+    def test_zero_filled_days_and_average(self):
+        day_list = stats._day_range(3)
+        self.assertEqual(day_list[-1], date.today().strftime("%Y-%m-%d"))
+        summary = stats._summary({"users": 4, "posts": 10}, day_list,
+                                 [{"_id": f"day:{day_list[1]}", "posts": 7}],
+                                 [{"user_id": "u1", "posts": 6}], "u9", None)
+        self.assertEqual(summary["posts_per_user"], 2.5)
+        self.assertEqual([row["posts"] for row in summary["posts_per_day"]], [0, 7, 0])
+        self.assertEqual(summary["user"], {"user_id": "u9", "posts": 0})
+        self.assertEqual(stats._summary({}, day_list, [], [], None, None)["posts_per_user"], 0.0)
+
+    def test_args_and_nicknames(self):
+        self.assertEqual(parse_stats_args({}), (stats.DEFAULT_DAYS, stats.DEFAULT_TOP_USERS, None))
+        self.assertEqual(parse_stats_args({"days": "9999", "top": "3", "user_id": "u"}), (stats.MAX_DAYS, 3, "u"))
+        with self.assertRaises(PayloadError):
+            parse_stats_args({"days": "x"})
+        summary = with_nicknames({"top_users": [{"user_id": "u1"}, {"user_id": "u2"}]}, {"u1": {"nickname": "tom"}})
+        self.assertEqual([row["nickname"] for row in summary["top_users"]], ["tom", None])
+
+if __name__ == '__main__':
+    unittest.main()
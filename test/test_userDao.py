@@ -8,8 +8,13 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 's
 from src.dao.userDao import UserDao
 from src.dao.impl.userDaoImpl import UserDaoImpl
 from src.po.user import User
+from util.schema import ensure_indexes
 
 class TestUserDao(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        ensure_indexes()
+
     def setUp(self):
         self.userDao = UserDaoImpl()
 
@@ -29,6 +34,12 @@ class TestUserDao(unittest.TestCase):
         self.assertIsNotNone(user2)
         self.assertEqual(user2.nickname, "David7545")
 
+    def test_user_find_by_ids(self):
+        user_id = str(self.userDao.find_id_by_number(15975245))
+        users = self.userDao.find_users_by_ids([user_id, "not-an-id"])
+        self.assertEqual(list(users), [user_id])
+        self.assertNotIn("password", users[user_id])
+
     def test_user_update(self):
         self.userDao.update_user_by_number(158765, nickname="David7545", phone_number=158765, email="Dav1234@qq.com", password="NewPassword123")
         user2 = self.userDao.find_user_by_number(158765)